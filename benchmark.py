@@ -0,0 +1,116 @@
+"""Compare storage engines on the same queries.
+
+Usage:
+    python benchmark.py <db> [<db> ...]
+
+Each database is opened fresh for every measurement, so times include the
+I/O of the columns the operation touches (cold for the process, warm in the
+OS page cache after the first run).
+"""
+
+import contextlib
+import io
+import os
+import random
+import sys
+import time
+
+from model.DatabaseModel import DatabaseModel
+from model.QueryModel import Query
+from model.TableModel import Table
+
+REPEATS = 3
+TOWNS = {"BEDOK", "TAMPINES", "YISHUN"}
+
+
+def open_table(db_name: str) -> Table:
+    table = Table(DatabaseModel(db_name).get_engine(), name=db_name)
+    return table.load()
+
+
+def scan(table: Table):
+    """Full scan of one column."""
+    return Query(table).aggregate("psm_price", "sum")
+
+
+def filter_only(table: Table):
+    """Two predicates on two columns, no materialization."""
+    q = Query(table).where_in("town", TOWNS).where_gte("floor_area_sqm", 100.0)
+    return len(q.select())
+
+
+def filter_fetch(table: Table):
+    """The same filter, then every column of the matching rows as a columnar batch."""
+    q = Query(table).where_in("town", TOWNS).where_gte("floor_area_sqm", 100.0)
+    return len(q.fetch()["town"])
+
+
+def filter_fetch_dicts(table: Table):
+    """The same filter, then three columns of the matching rows as dicts."""
+    q = Query(table).where_in("town", TOWNS).where_gte("floor_area_sqm", 100.0)
+    return len(q.fetch(["month", "block", "resale_price"], as_dicts=True))
+
+
+def group_min(table: Table):
+    """Minimum psm_price per town per month, one grouped pass."""
+    return len(Query(table).group_by(["town", "month_num"], [("min", "psm_price")])["town"])
+
+
+def point_fetch(table: Table):
+    """1000 random whole rows."""
+    rng = random.Random(0)
+    positions = sorted(rng.sample(range(table.num_rows()), 1000))
+    return len(table.get_rows(positions))
+
+
+OPERATIONS = [
+    ("open", lambda table: None),
+    ("scan psm_price", scan),
+    ("filter town+area", filter_only),
+    ("filter+fetch", filter_fetch),
+    ("fetch 3 cols dicts", filter_fetch_dicts),
+    ("fetch 1000 rows", point_fetch),
+    ("group town+month", group_min),
+]
+
+
+def size_on_disk(db_name: str) -> int:
+    """Bytes of every file of the database, including those in subdirectories (projections)."""
+    path = os.path.join(DatabaseModel.BASE_DIR, db_name)
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+
+
+def measure(db_name: str) -> dict:
+    """Best-of-REPEATS milliseconds for each operation on a freshly opened table."""
+    timings = {}
+    for label, operation in OPERATIONS:
+        best = float("inf")
+        for _ in range(REPEATS):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                operation(open_table(db_name))
+                best = min(best, time.perf_counter() - start)
+        timings[label] = best * 1000
+    return timings
+
+
+def main(db_names: list) -> None:
+    if not db_names:
+        print(__doc__)
+        return
+
+    header = f"{'database':<14}{'engine':<9}{'size MB':>9}" + "".join(f"{label:>19}" for label, _ in OPERATIONS)
+    print(header)
+    print("-" * len(header))
+    for db_name in db_names:
+        try:
+            engine = DatabaseModel(db_name).get_engine().format_name()
+            timings = measure(db_name)
+            size = size_on_disk(db_name) / 1e6
+            print(f"{db_name:<14}{engine:<9}{size:>9.1f}" + "".join(f"{timings[label]:>16.1f} ms" for label, _ in OPERATIONS))
+        except Exception as e:
+            print(f"Error benchmarking '{db_name}': {e}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
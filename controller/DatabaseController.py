@@ -4,10 +4,14 @@ import time
 from model.DatabaseModel import DatabaseModel
 from model.TableModel import Table
 from model.ColumnModel import Column
+from model.ParquetModel import ParquetColumn
+from model.RowModel import PaxRow, Row
 from view.DatabaseView import DatabaseView
 from utils.conditions import Condition
 from utils.helpers import Helpers
 from model.QueryModel import Query
+from model.ExecutorModel import Executor
+from utils.query_parser import QueryParser
 from utils.output_writer import OutputWriter
 
 
@@ -62,17 +66,111 @@ class DatabaseController:
 
             if choice == "2":
                 engine = Column
+            elif choice == "3":
+                engine = ParquetColumn
             elif choice == "1":
-                raise NotImplementedError("Row-oriented format not yet implemented.")
+                engine = Row
+            elif choice == "4":
+                engine = PaxRow
             else:
                 raise ValueError(f"Unknown orientation: {choice}")
 
+            memory_mb = None
+            if choice == "2":
+                memory_mb = DatabaseModel.validate_memory_budget(self.db_view.prompt_user(
+                    "\nMemory budget in MB for streaming ingest (press Enter to load the CSV in memory)"
+                ))
+
             db_model = DatabaseModel(name, engine)
-            db_model.create_database(path)
+            db_model.create_database(path, memory_mb)
             self.db_view.display_success(f"Database '{name}' created successfully.")
         except Exception as e:
             self.db_view.display_error(str(e))
 
+    def append_db(self) -> None:
+        try:
+            databases = DatabaseModel.list_all_databases()
+            if not databases:
+                self.db_view.display_error("No databases found.")
+                return
+
+            self.db_view.display_databases(databases)
+            db_name = self._resolve_db_name(databases, self.db_view.prompt_user("\nEnter database name or number"))
+            db_model = DatabaseModel(db_name)
+            if not db_model.can_append():
+                self.db_view.display_error(
+                    f"Database '{db_name}' uses the {db_model.get_engine().format_name()} engine; "
+                    "only column databases support appending rows."
+                )
+                return
+
+            path = self.db_view.prompt_user("\nEnter path to CSV of new rows")
+            DatabaseModel.validate_source_dir(path)
+
+            db_model.append_csv(path)
+            self.db_view.display_success(f"Rows from '{path}' appended to '{db_name}'.")
+        except Exception as e:
+            self.db_view.display_error(str(e))
+
+    def analyze_db(self) -> None:
+        """Recompute and show the column statistics of a database.
+
+        Indexes of an older layout (inline in db.meta.json, or older bitmap
+        sidecars) are moved to current sidecar files first; loading a
+        database never rewrites it.
+        """
+        try:
+            databases = DatabaseModel.list_all_databases()
+            if not databases:
+                self.db_view.display_error("No databases found.")
+                return
+
+            self.db_view.display_databases(databases)
+            db_name = self._resolve_db_name(databases, self.db_view.prompt_user("\nEnter database name or number"))
+
+            start = time.perf_counter()
+            db_model = DatabaseModel(db_name)
+            db_model.migrate_indexes()
+            stats = db_model.analyze()
+            self.db_view.display_stats(stats)
+            self.db_view.display_success(f"Analyzed '{db_name}' in {time.perf_counter() - start:.2f}s.")
+        except Exception as e:
+            self.db_view.display_error(str(e))
+
+    def query_console(self) -> None:
+        """Run statements typed at a prompt against a database until an empty line."""
+        try:
+            databases = DatabaseModel.list_all_databases()
+            if not databases:
+                self.db_view.display_error("No databases found.")
+                return
+
+            self.db_view.display_databases(databases)
+            db_name = self._resolve_db_name(databases, self.db_view.prompt_user("\nEnter database name or number"))
+            tables = {}
+            print("\nEnter SELECT or EXPLAIN [ANALYZE] SELECT statements; an empty line returns to the menu.")
+            while True:
+                text = self.db_view.prompt_user("\nquery")
+                if not text:
+                    return
+                try:
+                    statement = QueryParser.parse(text)
+                    name = statement.table or db_name
+                    if name not in tables:
+                        if name not in databases:
+                            raise ValueError(f"Database '{name}' not found.")
+                        tables[name] = Table(DatabaseModel(name).get_engine(), name=name).load()
+                    result = Executor(tables[name]).run(statement)
+                    if statement.explain:
+                        self.db_view.display_plan(result.explain())
+                    else:
+                        self.db_view.display_result(result.columns, result.rows)
+                        print(f"Time: {(result.planning_seconds + result.seconds) * 1000:.2f} ms")
+                except ValueError as e:
+                    self.db_view.display_error(str(e))
+        except Exception as e:
+            self.db_view.display_error(str(e))
+
     def select_db(self) -> None:
         try:
 
@@ -102,13 +200,14 @@ class DatabaseController:
             engine = db_model.get_engine()
             table = Table(engine, name=db_name)
             table.load()
+            # Columns in the order the query below filters on them; each
+            # predicate runs as soon as its column is in, while later ones load.
+            # month_num is left out: its bounds are found on its runs.
+            table.prefetch(["town", "floor_area_sqm", "psm_price"])
 
             condition = Condition()
             start_yr_mth = condition.start_yr_mth_from_matric(matric_num)
-            # valid_towns = set(
-            #     t.upper() for t in condition.towns_from_matric(matric_num)
-            # )
-            valid_towns_int = {int(v) for v in condition.town_ints_from_matric(matric_num)}
+            valid_towns = set(condition.towns_from_matric(matric_num))
 
             results = []
 
@@ -116,18 +215,12 @@ class DatabaseController:
                 start = time.time()
                 base_query = Query(table)
 
-                # base_query.where_in(
-                #     "town",
-                #     valid_towns
-                # )
-                
-                base_query.where_in("town_int", valid_towns_int)
-
-                print(f"Number of records after town filter: {len(base_query.select())}")
-
+                # The planner orders the predicates and picks their access
+                # paths when the rows are first counted.
+                base_query.where_in("town", valid_towns)
                 base_query.where_gte("month_num", start_yr_mth)
 
-                print(f"Number of records after month filter: {len(base_query.select())}")
+                print(f"Number of records after town and month filters: {base_query.count()}")
 
                 for x in range(1, 9):
                     end_month = Helpers.add_months(start_yr_mth, int(x))
@@ -147,7 +240,8 @@ class DatabaseController:
                         q = area_query.clone()
                         q.where_eq("psm_price", min_psm)
 
-                        flats = q.fetch()
+                        # Only the first match is reported; read just its row
+                        flats = next(q.fetch_iter(1, OutputWriter.COLUMNS, as_dicts=True), [])
 
                         if not flats:
                             results.append({"x": x, "y": y, "row": None})
@@ -1,18 +1,22 @@
 from controller.DatabaseController import DatabaseController
 from model.DatabaseModel import DatabaseModel
 from utils.column_format import ColumnFormat
+from utils.parquet_format import ParquetFormat
+from utils.row_format import PaxFormat, RowFormat
 from view.MainView import MainView
 
 
-# Register all available engines here — add RowFormat here in future
+# Register all available engines here
 DatabaseModel.ENGINE_REGISTRY = {
     "column": ColumnFormat,
-    # "row": RowFormat,   ← add when ready
+    "parquet": ParquetFormat,
+    "row": RowFormat,
+    "pax": PaxFormat,
 }
 
 
 class MainController:
-    _VALID_CHOICES = {"1", "2", "3"}
+    _VALID_CHOICES = {"1", "2", "3", "4", "5", "6"}
 
     def __init__(self):
         self.main = MainView()
@@ -25,7 +29,7 @@ class MainController:
         if not clean.isdigit():
             raise ValueError(f"'{clean}' is not a valid number.")
         if clean not in self._VALID_CHOICES:
-            raise ValueError("Please select 1, 2, or 3.")
+            raise ValueError("Please select 1 to 6.")
         return clean
 
     def run(self) -> None:
@@ -39,6 +43,12 @@ class MainController:
                 elif choice == "2":
                     self.db_controller.create_db()
                 elif choice == "3":
+                    self.db_controller.append_db()
+                elif choice == "4":
+                    self.db_controller.analyze_db()
+                elif choice == "5":
+                    self.db_controller.query_console()
+                elif choice == "6":
                     self.main.display_message("Exiting. Goodbye!")
                     break
 
@@ -4,29 +4,228 @@ from typing import Dict
 
 from model.StorageModel import StorageModel
 from utils.column_format import ColumnFormat
+from utils.encodings import RunLengthColumn
+from utils.helpers import Helpers
+from utils.schema import Schema
+from optimization.ZoneMap import ZoneMap
+import numpy as np
 import pandas as pd
 
 
 class Column(StorageModel):
-    """A single typed column of in-memory data."""
+    """A single typed column of in-memory data, held as a NumPy array.
 
-    def __init__(self, dtype: type = str, db_path: str = None):
+    Integers are int64 (int32 for dictionary codes), floats float64 with NaN
+    for nulls; strings and integers with nulls (None) are object arrays.
+    Mapped binary columns stay zero-copy views over the file.
+
+    A column created with a name and db_path is backed by its .col file and
+    only read on first access (see load / take).
+    """
+
+    # In-memory array dtype per Python value type; anything else is object
+    NP_DTYPES = {int: np.int64, float: np.float64}
+
+    def __init__(self, dtype: type = str, db_path: str = None, name: str = None):
         self.dtype = dtype
         self.columnformat = ColumnFormat(db_path)
         self.db_path = db_path
-        self.data: list = []
+        self.name = name
+        self.data: np.ndarray = np.empty(0, dtype=self.NP_DTYPES.get(dtype, object))
+        # Value dictionary (sorted at ingest) when data holds integer codes
+        self.dictionary: list | None = None
+        self._codes: Dict = {}
+        # Schema entry from db.meta.json; None for databases written without one
+        self.schema: dict | None = None
+        # File-backed columns start unloaded; _raw caches the stored values
+        self._loaded = name is None or db_path is None
+        self._raw = None
+
+    def _typed(self) -> bool:
+        """True when the stored values were decoded from a typed file."""
+        return self.name in self.columnformat.dtypes
+
+    def _source(self):
+        """Stored values: decoded binary data, or raw text lines (cached)."""
+        if self._raw is None:
+            self._raw = self.columnformat.read_column(self.name)
+            if self.schema is not None:
+                if self._typed():
+                    Schema.check_typed(self.name, self.schema, self.columnformat.dtypes[self.name])
+                self.dtype = Schema.py_type(self.schema)
+            elif self._typed():
+                self.dtype = self.columnformat.dtypes[self.name]
+            else:
+                # Databases without a schema: sample the values
+                self.dtype = Helpers._infer_dtype(self._raw)
+        return self._raw
+
+    def _decode(self, raw: list) -> list:
+        """Convert raw text values to the column type."""
+        if self.schema is not None:
+            return Schema.decode_text(self.name, raw, self.schema)
+        return [Helpers._safe_cast(v, self.dtype) for v in raw]
+
+    def to_array(self, values) -> np.ndarray:
+        """Stored values (view, run-length column or list) as an array of the column type."""
+        if isinstance(values, np.ndarray):
+            return values
+        if isinstance(values, RunLengthColumn):
+            return values.to_array()
+        if isinstance(values, memoryview):
+            # Zero-copy over the mapped file or the decoded buffer
+            return np.asarray(values)
+        np_dtype = self.NP_DTYPES.get(self.dtype)
+        if np_dtype is not None:
+            try:
+                return np.asarray(values, dtype=np_dtype)
+            except (TypeError, ValueError):
+                pass
+        array = np.empty(len(values), dtype=object)
+        array[:] = values
+        return array
+
+    def loaded(self) -> bool:
+        """True once the column's values are in memory."""
+        return self._loaded
+
+    def load(self) -> None:
+        """Read the backing file into data, casting text values once."""
+        if self._loaded:
+            return
+        raw = self._source()
+        self.data = self.to_array(raw if self._typed() else self._decode(raw))
+        self._raw = None
+        self._loaded = True
 
     def append(self, value) -> None:
-        self.data.append(self.dtype(value))
+        self.load()
+        # np.append copies, so read-only mapped data is never written to
+        if self.dictionary is not None:
+            value = self.encode(value, add=True)
+        else:
+            value = self.dtype(value)
+        self.data = np.append(self.data, np.asarray([value], dtype=self.data.dtype))
 
-    def scan(self) -> list:
+    def encode(self, value, add: bool = False) -> int | None:
+        """Dictionary code for value; optionally extend the dictionary with it."""
+        if len(self._codes) != len(self.dictionary):
+            self._codes = {v: code for code, v in enumerate(self.dictionary)}
+        code = self._codes.get(value)
+        if code is None and add:
+            code = len(self.dictionary)
+            self.dictionary.append(value)
+            self._codes[value] = code
+        return code
+
+    def scan(self) -> np.ndarray:
         """Return entire column data."""
+        self.load()
         return self.data
+
+    def take(self, positions) -> list:
+        """Values at positions; an unloaded column decodes only those rows."""
+        return self.gather(positions).tolist()
+
+    def gather(self, positions) -> np.ndarray:
+        """Values at positions as an array; an unloaded column decodes only those rows."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if self._loaded:
+            return self.data[positions]
+
+        raw = self._source()
+        if self._typed():
+            if isinstance(raw, (np.ndarray, memoryview)):
+                return np.asarray(raw)[positions]
+            if isinstance(raw, RunLengthColumn):
+                return raw.take(positions)
+            # Decoded lists are indexed in place
+            return self.to_array([raw[i] for i in positions.tolist()])
+        if self.schema is None:
+            return self.to_array([Helpers._safe_cast(raw[i], self.dtype) for i in positions.tolist()])
+        # Text files are read whole anyway; decode them once in bulk
+        self.load()
+        return self.data[positions]
     
+    def zonemap(self) -> ZoneMap | None:
+        """Row group statistics from the column file footer (None for text columns)."""
+        if self.name is None or self.db_path is None:
+            return None
+        stats = self.columnformat.read_row_groups(self.name)
+        if stats is None:
+            return None
+        group_rows, blocks = stats
+        return ZoneMap(blocks, group_rows, row_groups=True)
+
+    def reads_groups(self, zonemap: ZoneMap) -> bool:
+        """Whether zonemap's blocks are this column's row groups, readable with read_groups.
+
+        Stored zone maps (sidecars, legacy JSON) may use any block size and
+        sit over text files, which have no row groups.
+        """
+        return zonemap.row_groups and zonemap.block_size == self.columnformat.GROUP_ROWS
+
+    def read_group(self, group: int) -> np.ndarray:
+        """Values of one row group, decoding only that chunk when unloaded."""
+        if self._loaded:
+            block_size = self.columnformat.GROUP_ROWS
+            return self.data[group * block_size:(group + 1) * block_size]
+        values = self.columnformat.read_group(self.name, group)
+        self.dtype = self.columnformat.dtypes.get(self.name, self.dtype)
+        return self.to_array(values)
+
+    def read_groups(self, groups):
+        """Values of each of groups in order; an unloaded column maps its file once for all of them."""
+        if self._loaded:
+            block_size = self.columnformat.GROUP_ROWS
+            for group in groups:
+                yield self.data[group * block_size:(group + 1) * block_size]
+            return
+        for values in self.columnformat.read_groups(self.name, groups):
+            self.dtype = self.columnformat.dtypes.get(self.name, self.dtype)
+            yield self.to_array(values)
+
+    def run_length(self) -> bool:
+        """Whether the column is stored run-length encoded (see sorted_bound)."""
+        return self.schema is not None and self.schema.get("encoding") == "rle"
+
+    def sorted_bound(self, threshold, side: str) -> int | None:
+        """Row where threshold falls in a sorted column (np.searchsorted side), from its runs.
+
+        An unloaded run-length column bisects its run values and returns the
+        start row of the run found, without expanding rows. None when the
+        column is loaded, not run-length or holds dictionary codes.
+        """
+        if self._loaded or self.dictionary is not None:
+            return None
+        raw = self._source()
+        if not isinstance(raw, RunLengthColumn):
+            return None
+        try:
+            return raw.bisect_left(threshold) if side == "left" else raw.bisect_right(threshold)
+        except TypeError:
+            return None
+
     def write(self, df: pd.DataFrame, metadata: dict) -> None:
         """Write this column as a .col file using ColumnFormat."""
         self.columnformat.write(df, metadata)
     
+    def can_stream(self) -> bool:
+        """Whether the engine can ingest a CSV in chunks (write_stream); only column files can."""
+        return self.columnformat.STREAMS
+
+    def can_append(self) -> bool:
+        """Whether the engine can append rows in place (append_rows); only column files can."""
+        return self.columnformat.APPENDS
+
+    def write_stream(self, csv_path: str, metadata: dict, memory_mb: float = None) -> None:
+        """Write the database from a CSV in chunks, within a memory budget."""
+        self.columnformat.write_stream(csv_path, metadata, memory_mb)
+
+    def append_rows(self, df: pd.DataFrame, metadata: dict) -> None:
+        """Append new rows to the stored columns and indexes in place."""
+        self.columnformat.append_rows(df, metadata)
+
     def write_units(self, units: Dict[str, StorageModel]) -> None:
         """Write this column as a .col file using ColumnFormat."""
         self.columnformat.write_units(units)
@@ -38,4 +237,12 @@ class Column(StorageModel):
         """Read this column from a .col file using ColumnFormat."""
         return self.columnformat.read()
 
+    def list_columns(self) -> list[str]:
+        """Names of the stored columns, without reading them."""
+        return self.columnformat.list_columns()
+
+    def read_dictionary(self, col_name: str) -> list | None:
+        """Read the dictionary sidecar of an encoded column, if any."""
+        return self.columnformat.read_dictionary(col_name)
+
 
@@ -1,10 +1,19 @@
 import os
 import json
+from typing import Dict
+
+import pandas as pd
 
 from model.StorageModel import StorageModel
 from utils.csv_loader import CSVLoader
+from utils.helpers import Helpers
+from utils.index_store import IndexStore
 from utils.metadata import MetaLoader
 from model.ColumnModel import Column
+from model.ParquetModel import ParquetColumn
+from model.RowModel import PaxRow, Row
+from model.TableModel import Table
+from optimization.ColumnStats import ColumnStats
 
 
 class DatabaseModel:
@@ -14,6 +23,9 @@ class DatabaseModel:
          
     _ENGINE_MAP = {
         "column" : Column,
+        "parquet" : ParquetColumn,
+        "row" : Row,
+        "pax" : PaxRow,
     }
 
 
@@ -22,49 +34,119 @@ class DatabaseModel:
         self.path = os.path.join(self.BASE_DIR, name)
         self.engine: StorageModel = engine(db_path=self.path) if engine is not None else None
 
-    def create_database(self, csv_path: str) -> None:
-        try:
-            if self.engine is None:
-                raise ValueError("No storage engine provided for database creation.")
-
-            loader = CSVLoader(csv_path)
-            df = loader.load_data()
-            os.makedirs(self.path, exist_ok=True)
-
-            metadata = {
-                "name": self.name,
-                "path": self.path,
-                "engine": self.engine.format_name(),
-            }
+    def create_database(self, csv_path: str, memory_mb: float = None) -> None:
+        """Build the database from a CSV.
 
-            self.engine.write(df, metadata)
+        With memory_mb the CSV is streamed in chunks and sorted externally
+        within that budget (column engine only); otherwise it is loaded whole.
+        Errors are raised for the caller to report.
+        """
+        if self.engine is None:
+            raise ValueError("No storage engine provided for database creation.")
+        if memory_mb and not self.engine.can_stream():
+            raise ValueError(f"The {self.engine.format_name()} engine does not support streaming ingest")
+
+        timings = {}
+        os.makedirs(self.path, exist_ok=True)
+        metadata = {
+            "name": self.name,
+            "path": self.path,
+            "engine": self.engine.format_name(),
+        }
+
+        if memory_mb:
+            with Helpers.timed(timings, "stream"):
+                self.engine.write_stream(csv_path, metadata, memory_mb)
+                MetaLoader.save(self.path, metadata)
+        else:
+            with Helpers.timed(timings, "load csv"):
+                loader = CSVLoader(csv_path)
+                # Copy so the engine's derived columns never touch the cached frame
+                df = loader.load_data().copy()
+            with Helpers.timed(timings, "write"):
+                self.engine.write(df, metadata)
+                MetaLoader.save(self.path, metadata)
+        with Helpers.timed(timings, "analyze"):
+            self.analyze()
+        print(f"[DatabaseModel] Created database '{self.name}' at '{self.path}' "
+              f"({Helpers.format_timings(timings)})")
+
+    def append_csv(self, csv_path: str) -> None:
+        """Append the rows of a CSV to the database without rebuilding it.
+
+        Errors are raised for the caller to report.
+        """
+        engine = self.engine or self.get_engine()
+        if engine is None:
+            raise ValueError(f"Database '{self.name}' has no storage engine.")
+        if not engine.can_append():
+            raise ValueError(f"The {engine.format_name()} engine does not support appending rows")
+
+        timings = {}
+        with Helpers.timed(timings, "load csv"):
+            # Text, so values are converted by the stored schema, not re-inferred
+            df = pd.read_csv(csv_path, dtype=str)
+        metadata = MetaLoader.load(self.path)
+        with Helpers.timed(timings, "append"):
+            engine.append_rows(df, metadata)
             MetaLoader.save(self.path, metadata)
-            print(f"[DatabaseModel] Created database '{self.name}' at '{self.path}'")
-        except Exception as e:
-            print(f"Error creating database '{self.name}': {e}")
-
+        # The new rows are merged into current statistics; others are rebuilt
+        if not metadata.get("stats"):
+            with Helpers.timed(timings, "analyze"):
+                self.analyze()
+        print(f"[DatabaseModel] Appended {len(df)} rows to '{self.name}' ({Helpers.format_timings(timings)})")
+
+    def can_append(self) -> bool:
+        """Whether rows can be appended to this database (column engine only)."""
+        return self.get_engine().can_append()
+
+    def analyze(self) -> Dict[str, ColumnStats]:
+        """Compute the statistics of every column and store them in the stats sidecar.
+
+        Dictionary-encoded columns are counted over their codes. The stats
+        record the row count they were taken at, so rows inserted later
+        make them stale rather than wrong.
+        """
+        table = Table(self.get_engine(), name=self.name).load()
+        stats = {}
+        for col_name in table.storage_units:
+            unit = table.get_unit(col_name)
+            stats[col_name] = ColumnStats.build(unit.scan(), getattr(unit, "dictionary", None))
+        meta = MetaLoader.load(self.path)
+        meta["stats"] = MetaLoader.save_stats(self.path, {col: s.to_dict() for col, s in stats.items()})
+        MetaLoader.save(self.path, meta)
+        return stats
+
+    def migrate_indexes(self) -> bool:
+        """Move indexes stored inline in db.meta.json (older databases) into sidecar files,
+        and rewrite bitmap sidecars of an older layout.
+
+        Returns True when the database was migrated.
+        """
+        meta = MetaLoader.load(self.path)
+        if not meta.get("bitmap_indexes") and not meta.get("zonemaps") and not IndexStore.outdated_bitmaps(self.path, meta):
+            return False
+        meta = IndexStore.migrate(self.path)
+        print(f"[DatabaseModel] Migrated indexes of '{self.name}' to sidecar files: {sorted(meta.get('indexes', {}))}")
+        return True
 
     def get_engine(self) -> StorageModel:
         """
         Resolve the correct StorageModel engine from saved metadata.
         """
-        try:
-            if self.engine is not None:
-                return self.engine
-
-            meta = MetaLoader.load(self.path)
-            fmt = meta.get("engine")
-
-            if fmt not in self._ENGINE_MAP:
-                raise ValueError(
-                    f"Unknown engine '{fmt}'. "
-                    f"Registered engines: {list(self._ENGINE_MAP.keys())}"
-                )
-            self.engine = self._ENGINE_MAP[fmt](db_path=self.path)
+        if self.engine is not None:
             return self.engine
-        except Exception as e:
-            print(f"Error resolving engine for database '{self.name}': {e}")
-            raise
+
+        meta = MetaLoader.load(self.path)
+        fmt = meta.get("engine")
+
+        if fmt not in self._ENGINE_MAP:
+            raise ValueError(
+                f"Unknown engine '{fmt}' for database '{self.name}'. "
+                f"Registered engines: {list(self._ENGINE_MAP.keys())}"
+            )
+        self.engine = self._ENGINE_MAP[fmt](db_path=self.path)
+        return self.engine
         
     def get_path(self) -> str:
         return self.path
@@ -89,9 +171,23 @@ class DatabaseModel:
         if not name or not name.strip():
             raise ValueError("Database name cannot be empty.")
 
+    @staticmethod
+    def validate_memory_budget(value: str) -> float | None:
+        """Memory budget in MB for streaming ingest; blank means load the CSV whole."""
+        value = (value or "").strip()
+        if not value:
+            return None
+        try:
+            budget = float(value)
+        except ValueError:
+            raise ValueError(f"'{value}' is not a number of megabytes.")
+        if budget <= 0:
+            raise ValueError("Memory budget must be positive.")
+        return budget
+
     @staticmethod
     def validate_orientation_choice(choice: str) -> str:
         choice = choice.strip().lower()
-        if choice not in {"1", "2"}:
-            raise ValueError("Choice must be '1' or '2'.")
+        if choice not in {"1", "2", "3", "4"}:
+            raise ValueError("Choice must be '1', '2', '3' or '4'.")
         return choice
\ No newline at end of file
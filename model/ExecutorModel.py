@@ -0,0 +1,281 @@
+# model/ExecutorModel.py
+
+import time
+from typing import List
+
+import numpy as np
+
+from model.QueryModel import Query
+from model.TableModel import Table
+from utils.query_parser import QueryParser, SelectItem, Statement
+
+
+class Operator:
+    """A node of a statement's plan: estimated rows, and actual rows and time once run.
+
+    notes are access-path details reported while running (see Query.TRACE).
+    """
+
+    def __init__(self, name: str, detail: str = "", estimate: float = None):
+        self.name = name
+        self.detail = detail
+        self.estimate = estimate
+        self.actual: int | None = None
+        self.seconds: float | None = None
+        self.notes: List[str] = []
+
+    def finish(self, actual: int, start: float) -> None:
+        self.actual = actual
+        self.seconds = time.perf_counter() - start
+
+
+class Result:
+    """Output of a statement: column names, rows (tuples) and the plan, innermost operator first."""
+
+    def __init__(self, columns: List[str], rows: List[tuple], plan: List[Operator], analyzed: bool):
+        self.columns = columns
+        self.rows = rows
+        self.plan = plan
+        self.analyzed = analyzed
+        self.planning_seconds = 0.0
+        self.seconds = 0.0
+
+    def explain(self) -> List[str]:
+        """EXPLAIN lines, outermost operator first; with ANALYZE, actual rows and times."""
+        lines = []
+        for depth, op in enumerate(reversed(self.plan)):
+            indent = "  " * depth
+            figures = [] if op.estimate is None else [f"est {op.estimate:,.0f} rows"]
+            if self.analyzed and op.actual is not None:
+                figures.append(f"actual {op.actual:,} rows")
+            if self.analyzed and op.seconds is not None:
+                figures.append(f"{op.seconds * 1000:.2f} ms")
+            head = f"{op.name} {op.detail}".rstrip()
+            lines.append(f"{indent}{head}" + (f"  ({', '.join(figures)})" if figures else ""))
+            lines.extend(f"{indent}  → {note}" for note in op.notes)
+        lines.append(f"Planning: {self.planning_seconds * 1000:.2f} ms")
+        if self.analyzed:
+            lines.append(f"Execution: {self.seconds * 1000:.2f} ms")
+        return lines
+
+
+class Executor:
+    """Runs query language statements (see QueryParser) on a Table through Query.
+
+    The WHERE comparisons become Query predicates, so the Planner orders
+    them and picks their access paths. Grouping, sorting and LIMIT then
+    work on the selected positions, and output columns are gathered last,
+    for the rows that are returned only.
+    """
+
+    def __init__(self, table: Table):
+        self.table = table
+
+    def run(self, statement) -> Result:
+        """Run a statement (text or parsed); EXPLAIN returns the plan without running it."""
+        if isinstance(statement, str):
+            statement = QueryParser.parse(statement)
+        self._check(statement)
+        start = time.perf_counter()
+        query = Query(self.table)
+        self._where(query, statement)
+        plan = self._plan(query, statement)
+        planning = time.perf_counter() - start
+
+        if statement.explain and not statement.analyze:
+            result = Result([], [], plan, analyzed=False)
+        else:
+            start = time.perf_counter()
+            columns, rows = self._execute(query, statement, plan)
+            result = Result(columns, rows, plan, analyzed=True)
+            result.seconds = time.perf_counter() - start
+        result.planning_seconds = planning
+        return result
+
+    # -- planning ------------------------------------------------------------
+
+    def _check(self, statement: Statement) -> None:
+        known = set(self.table.storage_units)
+        names = [c.column for c in statement.where] + statement.group_by
+        names += [item.column for item in statement.items if item.column != "*"]
+        unknown = [name for name in names if name not in known]
+        if unknown:
+            raise ValueError(f"Unknown column(s) {unknown}; columns are {sorted(known)}")
+        if statement.star() and (statement.group_by or statement.aggregates()):
+            raise ValueError("SELECT * cannot be combined with aggregates or GROUP BY")
+        if statement.group_by:
+            loose = [item.name for item in statement.items if not item.func and item.column not in statement.group_by]
+            if loose:
+                raise ValueError(f"Column(s) {loose} must appear in GROUP BY or inside an aggregate")
+        outputs = {item.name for item in self._items(statement)} | {item.column for item in statement.items}
+        if statement.group_by or statement.aggregates():
+            outputs |= set(statement.group_by)
+        else:
+            outputs |= known
+        unknown = [o.key for o in statement.order_by if o.key not in outputs]
+        if unknown:
+            raise ValueError(f"Cannot ORDER BY {unknown}: not a column or select item")
+
+    def _items(self, statement: Statement):
+        if statement.star():
+            return [SelectItem(col) for col in self.table.storage_units]
+        return statement.items
+
+    @staticmethod
+    def _where(query: Query, statement: Statement) -> None:
+        for c in statement.where:
+            operands = c.operands
+            if c.op == "=":
+                query.where_eq(c.column, operands[0])
+            elif c.op == "IN":
+                query.where_in(c.column, operands)
+            elif c.op == "BETWEEN":
+                query.where_between(c.column, operands[0], operands[1])
+            elif c.op == ">=":
+                query.where_gte(c.column, operands[0])
+            elif c.op == "<=":
+                query.where_lte(c.column, operands[0])
+            elif c.op == ">":
+                query.where_gt(c.column, operands[0])
+            elif c.op == "<":
+                query.where_lt(c.column, operands[0])
+            else:
+                query.where_ne(c.column, operands[0])
+
+    def _groups_estimate(self, columns: List[str], rows: float) -> float:
+        """Distinct key combinations among rows, from the column statistics."""
+        groups = 1.0
+        for col in columns:
+            stats = self.table.column_stats(col)
+            groups *= stats.distinct if stats is not None else rows
+        return max(1.0, min(groups, rows)) if rows else 0.0
+
+    def _plan(self, query: Query, statement: Statement) -> List[Operator]:
+        """Operators of the statement, innermost first, with estimated rows."""
+        rows = float(self.table.num_rows())
+        plan = [Operator("Scan", f"{self.table.name or 'table'} ({rows:,.0f} rows)", rows)]
+        for step in query.plan():
+            plan.append(Operator("Filter", f"{step.predicate} via {step.path} (cost {step.cost:,.0f})", step.rows))
+            rows = step.rows
+        aggregates = statement.aggregates()
+        if statement.group_by:
+            rows = self._groups_estimate(statement.group_by, rows)
+            funcs = ", ".join(item.name for item in aggregates)
+            plan.append(Operator("GroupAggregate", f"by {', '.join(statement.group_by)}: {funcs}".rstrip(": "), rows))
+        elif aggregates:
+            rows = 1.0
+            plan.append(Operator("Aggregate", ", ".join(item.name for item in aggregates), rows))
+        if statement.order_by:
+            keys = ", ".join(f"{o.key} {'DESC' if o.descending else 'ASC'}" for o in statement.order_by)
+            plan.append(Operator("Sort", keys, rows))
+        if statement.limit is not None:
+            rows = min(rows, statement.limit)
+            plan.append(Operator("Limit", str(statement.limit), rows))
+        plan.append(Operator("Project", ", ".join(item.name for item in self._items(statement)), rows))
+        return plan
+
+    # -- execution -----------------------------------------------------------
+
+    def _execute(self, query: Query, statement: Statement, plan: List[Operator]):
+        ops = {op.name: op for op in plan}
+        positions = query.select()
+        plan[0].actual = self.table.num_rows()
+        # The Filter operators are the planned steps, in order
+        for op, step in zip(plan[1:], query.executed):
+            op.actual, op.seconds, op.notes = step.actual, step.seconds, step.notes
+
+        items = self._items(statement)
+        if statement.group_by or statement.aggregates():
+            if statement.group_by:
+                start = time.perf_counter()
+                table = self._group(query, statement)
+                ops["GroupAggregate"].finish(len(next(iter(table.values()))), start)
+                ops["GroupAggregate"].notes.append(query.grouping.describe())
+            else:
+                start = time.perf_counter()
+                table = {item.name: [self._aggregate(query, item)] for item in statement.aggregates()}
+                ops["Aggregate"].finish(1, start)
+            order = np.arange(len(next(iter(table.values()))))
+            if statement.order_by:
+                start = time.perf_counter()
+                order = self._order([self._output(table, items, o.key) for o in statement.order_by], statement)
+                ops["Sort"].finish(len(order), start)
+            if statement.limit is not None:
+                start = time.perf_counter()
+                order = order[:statement.limit]
+                ops["Limit"].finish(len(order), start)
+            start = time.perf_counter()
+            columns = [item.name for item in items]
+            order = order.tolist()
+            outputs = [[column[i] for i in order] for column in (self._output(table, items, item.name) for item in items)]
+        else:
+            if statement.order_by:
+                start = time.perf_counter()
+                keys = [self._sort_key(query, items, o.key, positions) for o in statement.order_by]
+                positions = positions[self._order(keys, statement)]
+                ops["Sort"].finish(len(positions), start)
+            if statement.limit is not None:
+                start = time.perf_counter()
+                positions = positions[:statement.limit]
+                ops["Limit"].finish(len(positions), start)
+            # Late materialization: only the returned rows are read and decoded
+            start = time.perf_counter()
+            columns = [item.name for item in items]
+            outputs = [query.gather(item.column, positions).tolist() for item in items]
+        rows = list(zip(*outputs)) if outputs else []
+        ops["Project"].finish(len(rows), start)
+        return columns, rows
+
+    @staticmethod
+    def _aggregate(query: Query, item):
+        if item.func == "count":
+            return query.count() if item.column == "*" else len(query.values(item.column))
+        return query.aggregate(item.column, item.func)
+
+    @staticmethod
+    def _group(query: Query, statement: Statement) -> dict:
+        """Grouped aggregates as {output name: list}, every aggregate in one pass (see Query.group_by)."""
+        aggregates = statement.aggregates()
+        batch = query.group_by(statement.group_by, [(item.func, item.column) for item in aggregates])
+        table = {col: batch[col].tolist() for col in statement.group_by}
+        for item in aggregates:
+            table[item.name] = batch[f"{item.func}({item.column})"].tolist()
+        return table
+
+    @staticmethod
+    def _output(table: dict, items, name: str) -> list:
+        """A grouped result column by output name, alias or underlying column."""
+        if name in table:
+            return table[name]
+        for item in items:
+            if name in (item.column, f"{item.func}({item.column})") and item.name in table:
+                return table[item.name]
+        raise ValueError(f"Cannot ORDER BY '{name}'")
+
+    @staticmethod
+    def _sort_key(query: Query, items, name: str, positions: np.ndarray) -> np.ndarray:
+        column = next((item.column for item in items if item.alias == name), name)
+        return query.gather(column, positions)
+
+    @staticmethod
+    def _ranks(values) -> tuple:
+        """(sorted distinct values, rank of each value); None / NaN rank last."""
+        values = np.asarray(values)
+        if values.dtype == object:
+            present = np.not_equal(values, None) & np.equal(values, values)
+            uniques, inverse = np.unique(values[present], return_inverse=True)
+            ranks = np.full(len(values), len(uniques), dtype=np.int64)
+            ranks[present] = inverse
+            if not present.all():
+                uniques = np.append(uniques, None)
+            return uniques, ranks
+        uniques, inverse = np.unique(values, return_inverse=True)
+        return uniques, inverse.astype(np.int64)
+
+    def _order(self, keys: List, statement: Statement) -> np.ndarray:
+        """Row order by the ORDER BY keys (first key most significant); ties keep their order."""
+        ranked = []
+        for values, item in zip(keys, statement.order_by):
+            _, ranks = self._ranks(values)
+            ranked.append(-ranks if item.descending else ranks)
+        return np.lexsort(ranked[::-1])
@@ -0,0 +1,16 @@
+# model/ParquetModel.py
+
+from model.ColumnModel import Column
+from utils.parquet_format import ParquetFormat
+
+
+class ParquetColumn(Column):
+    """A column of a Parquet-backed table.
+
+    Behaves like Column (lazy loading, take, zone maps, row-group reads) but
+    delegates file I/O to ParquetFormat instead of per-column .col files.
+    """
+
+    def __init__(self, dtype: type = str, db_path: str = None, name: str = None):
+        super().__init__(dtype=dtype, db_path=db_path, name=name)
+        self.columnformat = ParquetFormat(db_path)
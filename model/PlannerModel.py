@@ -0,0 +1,344 @@
+# model/PlannerModel.py
+
+import bisect
+from typing import List
+
+import numpy as np
+
+from optimization.BitmapIndex import CHUNK_ROWS
+from optimization.Selection import ProjectedSelection, RangeSelection, Selection
+
+
+class Predicate:
+    """One conjunct of a query: a column compared with constants.
+
+    op is eq / in / gte / lte / between / where. Comparisons keep their
+    bounds as [low, high] (None is open; eq has low == high), eq and in
+    their values, and where a Python callable over single values. label
+    is how the predicate was written (e.g. with decoded dictionary values).
+    """
+
+    def __init__(self, column: str, op: str, low=None, high=None, values=None, func=None, label: str = None):
+        self.column = column
+        self.op = op
+        self.low = low
+        self.high = high
+        self.values = values
+        self.func = func
+        self.label = label
+
+    @staticmethod
+    def eq(column: str, value, label: str = None) -> "Predicate":
+        return Predicate(column, "eq", low=value, high=value, values=[value], label=label)
+
+    @staticmethod
+    def isin(column: str, values, label: str = None) -> "Predicate":
+        return Predicate(column, "in", values=list(values), label=label)
+
+    def ranged(self) -> bool:
+        """True for comparisons that are a single interval [low, high]."""
+        return self.op in ("eq", "gte", "lte", "between") and not (self.op == "eq" and self.low is None)
+
+    def zone_test(self, block) -> bool:
+        """False when no value of a row group with this min/max can match."""
+        if self.op == "in":
+            try:
+                ordered = sorted(set(self.values))
+            except TypeError:
+                return True
+            k = bisect.bisect_left(ordered, block["min"])
+            return k < len(ordered) and ordered[k] <= block["max"]
+        if self.op == "where":
+            return True
+        return (self.low is None or block["max"] >= self.low) and (self.high is None or block["min"] <= self.high)
+
+    def __str__(self) -> str:
+        if self.label is not None:
+            return self.label
+        if self.op == "eq":
+            return f"{self.column} = {self.low!r}"
+        if self.op == "in":
+            return f"{self.column} IN {sorted(self.values, key=str)}"
+        if self.op == "gte":
+            return f"{self.column} >= {self.low!r}"
+        if self.op == "lte":
+            return f"{self.column} <= {self.high!r}"
+        if self.op == "between":
+            return f"{self.column} BETWEEN {self.low!r} AND {self.high!r}"
+        return f"{self.column} matches {getattr(self.func, '__name__', 'predicate')}"
+
+
+class Step:
+    """A predicate with its chosen access path, estimated cost and output rows.
+
+    Once run, actual holds the rows left and seconds the time taken; notes
+    are the access-path details reported while running.
+    """
+
+    def __init__(self, predicate: Predicate, path: str, cost: float, rows: float):
+        self.predicate = predicate
+        self.path = path
+        self.cost = cost
+        self.rows = rows
+        self.actual: int | None = None
+        self.seconds: float | None = None
+        self.notes: List[str] = []
+
+    def __str__(self) -> str:
+        return f"{self.predicate} via {self.path} (cost {self.cost:,.0f}, ~{self.rows:,.0f} rows)"
+
+
+class Planner:
+    """Orders the conjunctive predicates of a query and picks an access path for each.
+
+    Every applicable path of a predicate is costed against the selection it
+    would run on; costs are in rows a vectorized scan compares in the same
+    time. Selectivities (fractions of the table) come from bitmap counts,
+    binary searches of sorted data, column statistics (see ColumnStats) or
+    zone maps; System R defaults otherwise. Predicates are taken greedily
+    by cost per fraction of rows removed, so a cheap selective index lookup
+    runs before a scan, and the estimated row count carries to the next
+    choice.
+
+    Paths:
+        projection    binary searches in a projection sorted by the column
+        bitmap        OR of the value bitmaps, intersected with the selection
+        bisect        bounds of a column the table is sorted by
+        sorted_index  a range of a SortedIndex, gathered into row order
+        bsi           bitmap operations over a BitSlicedIndex
+        zonemap       scan of the row groups whose min/max can match
+        scan          scan of every selected row
+    """
+
+    # A bitmap operation over one 64K-row chunk
+    INDEX_CHUNK_COST = 10000
+    # Each row a sorted index returns (gather + reorder)
+    SORTED_INDEX_ROW_COST = 8
+    # One binary search
+    SEARCH_COST = 64
+    # Reading one row of a column that is not in memory
+    READ_ROW_COST = 1
+    # Evaluating a Python callable on one value
+    PYTHON_ROW_COST = 100
+    DEFAULT_SELECTIVITY = {"eq": 0.1, "in": 0.1, "gte": 1 / 3, "lte": 1 / 3, "between": 1 / 4, "where": 1 / 3}
+
+    def __init__(self, query):
+        self.query = query
+        self.table = query.table
+        self.rows = self.table.num_rows()
+        self.chunks = max(1, -(-self.rows // CHUNK_ROWS))
+        self._selectivity = {}
+
+    # -- selectivity ---------------------------------------------------------
+
+    def selectivity(self, predicate: Predicate) -> float:
+        """Estimated fraction of the table's rows that pass predicate."""
+        key = id(predicate)
+        if key not in self._selectivity:
+            try:
+                estimate = self._estimate(predicate)
+            except (TypeError, ValueError):
+                estimate = None
+            if estimate is None:
+                estimate = self.DEFAULT_SELECTIVITY[predicate.op]
+                if predicate.op == "in":
+                    estimate = min(1.0, estimate * len(predicate.values))
+            self._selectivity[key] = min(1.0, max(0.0, estimate))
+        return self._selectivity[key]
+
+    def _estimate(self, p: Predicate) -> float | None:
+        if not self.rows:
+            return 0.0
+        if p.op in ("eq", "in") and not p.values:
+            return 0.0
+        column = p.column
+        if p.op in ("eq", "in"):
+            bitmaps = self.query._bitmaps(column, p.values)
+            if bitmaps is not None:
+                return sum(b.count() for b in bitmaps) / self.rows
+        if p.ranged():
+            if column in self.table.sorted_columns and self.query._in_memory(column):
+                col_data = self.query._column(column)
+                lo = 0 if p.low is None else np.searchsorted(col_data, p.low, side="left")
+                hi = len(col_data) if p.high is None else np.searchsorted(col_data, p.high, side="right")
+                return max(0, int(hi) - int(lo)) / self.rows
+            if column in self.table.sorted_columns and self.query._run_length(column):
+                lo = 0 if p.low is None else self.query._run_bound(column, p.low, "left")
+                hi = self.rows if p.high is None else self.query._run_bound(column, p.high, "right")
+                if lo is not None and hi is not None:
+                    return max(0, hi - lo) / self.rows
+            index = self._sorted_index(column)
+            if index is not None:
+                lo, hi = index.bounds(p.low, p.high)
+                return (hi - lo) / self.rows
+        dictionary = self.query._dictionaries.get(column)
+        stats = self.table.column_stats(column)
+        if stats is not None and p.op != "where":
+            return self._stats_estimate(stats, p, dictionary)
+        if dictionary and p.op == "in":
+            return len(p.values) / len(dictionary)
+        zonemap = self.table.zonemaps.get(column)
+        if zonemap is not None and p.op != "where":
+            return self._zone_estimate(zonemap, p)
+        return None
+
+    @staticmethod
+    def _stats_estimate(stats, p: Predicate, dictionary: list = None) -> float:
+        """Matching fraction from the column's MCVs and histogram (values of dictionary columns are codes)."""
+        def decode(value):
+            if dictionary is None or value is None:
+                return value
+            return dictionary[value] if 0 <= value < len(dictionary) else None
+
+        if p.op in ("eq", "in"):
+            return stats.isin([decode(v) for v in p.values])
+        return stats.range(decode(p.low), decode(p.high))
+
+    def _zone_estimate(self, zonemap, p: Predicate) -> float | None:
+        """Matching fraction from row-group min/max, assuming values spread evenly in each group."""
+        blocks = [blk for blk in zonemap.blocks if blk.get("min") is not None and blk.get("max") is not None]
+        if not blocks:
+            return None
+        mins = np.array([blk["min"] for blk in blocks], dtype=np.float64)
+        maxs = np.array([blk["max"] for blk in blocks], dtype=np.float64)
+        sizes = np.array([blk["end"] - blk["start"] for blk in blocks], dtype=np.float64)
+        width = maxs - mins
+        if p.op in ("eq", "in"):
+            # Each value inside a group's range takes an even share of its distinct values
+            share = np.zeros(len(blocks))
+            for value in p.values:
+                inside = (mins <= value) & (value <= maxs)
+                share += np.where(inside, np.where(width > 0, 1 / np.maximum(width + 1, 1), 1.0), 0.0)
+            fraction = np.minimum(share, 1.0)
+        else:
+            low = -np.inf if p.low is None else float(p.low)
+            high = np.inf if p.high is None else float(p.high)
+            overlap = np.minimum(maxs, high) - np.maximum(mins, low)
+            fraction = np.where(
+                width > 0, np.clip(overlap / np.where(width > 0, width, 1), 0, 1),
+                ((low <= mins) & (mins <= high)).astype(float),
+            )
+        return float((fraction * sizes).sum() / self.rows)
+
+    def _zone_fraction(self, p: Predicate) -> float | None:
+        """Fraction of the rows in row groups that can match, or None without a zone map."""
+        zonemap = self.table.zonemaps.get(p.column)
+        if zonemap is None or not zonemap.blocks:
+            return None
+        kept = zonemap.matching_blocks(p.zone_test)
+        return sum(zonemap.blocks[i]["end"] - zonemap.blocks[i]["start"] for i in kept) / max(1, self.rows)
+
+    # -- access paths --------------------------------------------------------
+
+    def _sorted_index(self, column: str):
+        index = getattr(self.table, "sorted_indexes", {}).get(column)
+        return index if index is not None and index.rows == self.rows else None
+
+    def _bit_sliced_index(self, column: str):
+        index = getattr(self.table, "range_indexes", {}).get(column)
+        return index if index is not None and index.rows == self.rows else None
+
+    def _projection_cost(self, p: Predicate, state) -> float | None:
+        """Cost of refining the projection state with p, or None when it does not apply."""
+        if state is None or p.op == "where" or (p.op != "in" and not p.ranged()):
+            return None
+        if state == "fresh":
+            if p.column in self.table.sorted_columns:
+                return None
+            projection = self.table.projection_for(p.column)
+            if projection is None:
+                return None
+            depth, ranges = 0, 1
+        else:
+            projection, depth, ranges = state
+        try:
+            if not projection.can_refine(ProjectedSelection(projection, [], [], depth), p.column):
+                return None
+        except ValueError:
+            # An outdated projection
+            return None
+        probes = len(p.values) if p.op in ("eq", "in") else 2
+        return ranges * max(1, probes) * self.SEARCH_COST
+
+    def _next_state(self, state, p: Predicate, path: str):
+        """Projection state after p runs on path: None once the selection leaves the projection."""
+        if path != "projection":
+            return None
+        if state == "fresh":
+            projection, depth, ranges = self.table.projection_for(p.column), 0, 1
+        else:
+            projection, depth, ranges = state
+        if projection.sort_key.index(p.column) == depth and p.op in ("eq", "in"):
+            return projection, depth + 1, ranges * max(1, len(p.values))
+        return projection, depth, ranges
+
+    def paths(self, p: Predicate, n: float, state) -> List[tuple]:
+        """(path, cost) of every access path that can evaluate p on n selected rows."""
+        column = p.column
+        in_memory = self.query._in_memory(column)
+        load = 0 if in_memory else self.rows * self.READ_ROW_COST
+        # Intersecting an index result with a selection that is not every row
+        probe = n if n < self.rows else 0
+        options = []
+
+        projection_cost = self._projection_cost(p, state)
+        if projection_cost is not None:
+            options.append(("projection", projection_cost))
+        if isinstance(state, tuple):
+            # Any other path first maps the projection's rows back to table rows
+            probe += n * self.SORTED_INDEX_ROW_COST
+            load += n * self.SORTED_INDEX_ROW_COST
+
+        if p.op in ("eq", "in") and p.values and self.query._bitmaps(column, p.values) is not None:
+            options.append(("bitmap", len(p.values) * self.chunks * self.INDEX_CHUNK_COST + probe))
+
+        if p.ranged():
+            if column in self.table.sorted_columns:
+                # A run-length column is searched on its runs, never loaded
+                bisect_load = 0 if self.query._run_length(column) else load
+                options.append(("bisect", 2 * self.SEARCH_COST + bisect_load))
+            index = self._sorted_index(column)
+            if index is not None:
+                matches = self.selectivity(p) * self.rows
+                options.append(("sorted_index", matches * self.SORTED_INDEX_ROW_COST + probe))
+            bsi = self._bit_sliced_index(column)
+            if bsi is not None:
+                options.append(("bsi", len(bsi.slices) * self.chunks * self.INDEX_CHUNK_COST + probe))
+
+        row_cost = self.PYTHON_ROW_COST if p.op == "where" else 1
+        kept = self._zone_fraction(p) if p.op != "where" else None
+        if kept is not None and kept < 1:
+            options.append(("zonemap", n * kept * row_cost + load * kept))
+        else:
+            options.append(("scan", n * row_cost + load))
+        return options
+
+    # -- planning ------------------------------------------------------------
+
+    def plan(self, predicates: List[Predicate], selection: Selection) -> List[Step]:
+        """Steps evaluating every predicate, cheapest first."""
+        n = float(len(selection))
+        if isinstance(selection, ProjectedSelection):
+            state = (selection.projection, selection.depth, len(selection.starts))
+        elif isinstance(selection, RangeSelection) and len(selection) == self.rows:
+            state = "fresh"
+        else:
+            state = None
+
+        remaining = list(predicates)
+        steps = []
+        while remaining:
+            best = None
+            for p in remaining:
+                path, cost = min(self.paths(p, n, state), key=lambda option: option[1])
+                # Cost per fraction of the rows removed; filters that keep
+                # everything go last
+                rank = cost / max(1 - self.selectivity(p), 1e-9)
+                if best is None or rank < best[0]:
+                    best = (rank, p, path, cost)
+            _, p, path, cost = best
+            n *= self.selectivity(p)
+            steps.append(Step(p, path, cost, n))
+            state = self._next_state(state, p, path)
+            remaining.remove(p)
+        return steps
@@ -1,344 +1,620 @@
 # model/QueryModel.py
 
-import bisect
+import operator
+import time
+from typing import Dict, Iterator, List
+
+import numpy as np
+
 from optimization.BitmapIndex import BitmapIndex
+from optimization.GroupAggregate import GroupAggregate
+from optimization.Selection import BitmapSelection, ProjectedSelection, RangeSelection, Selection
+from model.PlannerModel import Planner, Predicate, Step
 from model.TableModel import Table
 
 class Query:
+    """Filters and aggregates over a Table with vectorized NumPy kernels.
+
+    The selected rows are a Selection: a row range, a sorted position array
+    or a bitmap, whichever the last predicate produced. Each where_* queues
+    a Predicate; when rows are needed (count, select, fetch, aggregate,
+    clone) the Planner orders the queued predicates and picks an access
+    path for each, and each step intersects its result with the selection.
+
+    Executed steps are kept in executed with their actual row counts and
+    times (see EXPLAIN ANALYZE); access-path details are printed as they
+    happen only with TRACE.
+    """
+
+    # Print access-path details (e.g. row groups skipped) while filtering
+    TRACE = False
+    # Rows per batch of fetch_iter
+    FETCH_BATCH_ROWS = 65536
+
     def __init__(self, table: Table):
         self.table = table
 
-        # Cache all columns once
-        self._column_cache = {
-            name: unit.scan()
-            for name, unit in table.storage_units.items()
-        }
-
-        # Initialize all row indexes
-        first_column = next(iter(self._column_cache.values()))
-        self._selected_indexes = list(range(len(first_column)))
-        # Lazy bitmap-backed selection (BitmapIndex) when available
-        self._bitmap_selection: BitmapIndex | None = None
+        # Columns are scanned on first use only; the cache is shared by clones
+        # so each touched column is read from disk once per query family.
+        self._column_cache = {}
+
+        # Dictionary-encoded columns hold integer codes; values are decoded
+        # only when rows are materialized.
+        self._dictionaries = table.dictionaries()
+        # Dictionaries as object arrays, for decoding codes with one gather
+        self._decoders: Dict[str, np.ndarray] = {}
+
+        # Initially every row
+        self._selection: Selection = Selection.all(table.num_rows())
+        # Predicates not evaluated yet (see _run)
+        self._pending: List[Predicate] = []
+        # Steps run so far, and details of the running one
+        self.executed: List[Step] = []
+        self._notes: List[str] = []
+        # Aggregation of the last group_by
+        self.grouping: GroupAggregate | None = None
 
     def clone(self) -> "Query":
-        """Create a lightweight copy for reuse."""
+        """Create a lightweight copy for reuse.
+
+        Selections are immutable, so the clone shares this query's selection
+        until one of the two filters further. Pending predicates run first.
+        """
+        self._run()
         new_q = Query.__new__(Query)
         new_q.table = self.table
         new_q._column_cache = self._column_cache
-        new_q._selected_indexes = self._selected_indexes.copy()
-        new_q._bitmap_selection = self._bitmap_selection
+        new_q._dictionaries = self._dictionaries
+        new_q._decoders = self._decoders
+        new_q._selection = self._selection
+        new_q._pending = []
+        new_q.executed = []
+        new_q._notes = []
+        new_q.grouping = None
         return new_q
 
-    def select(self, indexes=None):
+    def _column(self, name: str) -> np.ndarray:
+        """Scanned data of a column, loading it on first access."""
+        col_data = self._column_cache.get(name)
+        if col_data is None:
+            col_data = np.asarray(self.table.get_unit(name).scan())
+            self._column_cache[name] = col_data
+        return col_data
+
+    def _in_memory(self, column: str) -> bool:
+        if column in self._column_cache:
+            return True
+        unit = self.table.get_unit(column)
+        return getattr(unit, "loaded", lambda: True)()
+
+    def select(self, indexes=None) -> np.ndarray:
+        """Selected row positions, after restricting them to indexes if given."""
+        self._run()
         if indexes is not None:
-            # explicit select overrides any bitmap selection
-            self._bitmap_selection = None
-            self._selected_indexes = [
-                i for i in indexes if i in self._selected_indexes
-            ]
-            return self._selected_indexes
-
-        # materialize bitmap selection if present
-        if self._bitmap_selection is not None:
-            self._selected_indexes = self._bitmap_selection.get_positions()
-            self._bitmap_selection = None
-        return self._selected_indexes
+            wanted = np.unique(np.asarray(indexes, dtype=np.int64))
+            self._selection = self._selection.intersect(Selection.of(wanted, self._selection.rows))
+        return self._selection.positions()
+
+    def count(self) -> int:
+        """Number of selected rows, without materializing their positions."""
+        self._run()
+        return len(self._selection)
+
+    @staticmethod
+    def _compare(values: np.ndarray, op, operand) -> np.ndarray:
+        """Boolean mask of op(value, operand) over an array; nulls never match.
+
+        Numeric arrays compare in one ufunc call (NaN compares False); object
+        arrays (strings, integers with None) compare their non-null entries.
+        """
+        if values.dtype != object:
+            return np.asarray(op(values, operand), dtype=bool)
+        mask = np.zeros(len(values), dtype=bool)
+        present = np.not_equal(values, None)
+        mask[present] = np.asarray(op(values[present], operand), dtype=bool)
+        return mask
+
+    @staticmethod
+    def _isin(values: np.ndarray, value_set: set) -> np.ndarray:
+        """Boolean mask of membership in value_set."""
+        if values.dtype != object:
+            return np.isin(values, list(value_set))
+        return np.fromiter((v in value_set for v in values), dtype=bool, count=len(values))
+
+    def _codes_where(self, column: str, predicate) -> set:
+        """Dictionary codes whose decoded value satisfies predicate."""
+        return {
+            code for code, value in enumerate(self._dictionaries[column])
+            if value is not None and predicate(value)
+        }
 
-    def where(self, column: str, predicate) -> "Query":
-        col_data = self._column_cache[column]
+    def _encode(self, column: str, values) -> set:
+        """Translate values of a dictionary-encoded column into their codes."""
+        unit = self.table.storage_units[column]
+        codes = (unit.encode(v) for v in values)
+        return {code for code in codes if code is not None}
+
+    def _filter(self, column: str, kernel, zone_predicate=None) -> "Query":
+        """Keep the selected rows whose column values pass kernel (array -> mask).
+
+        With a zone map, row groups that hold no selected rows, or whose
+        min/max fail zone_predicate, are skipped. When the zone map's blocks
+        are the column file's row groups and the column is not loaded yet,
+        only the surviving row groups are decoded.
+        """
+        selection = self._selection
+        if not len(selection):
+            return self
+        zonemap = getattr(self.table, "zonemaps", {}).get(column)
+        unit = self.table.get_unit(column)
+        col_data = self._column_cache.get(column)
+        by_group = zonemap is not None and hasattr(unit, "reads_groups") and unit.reads_groups(zonemap)
+        if col_data is None and not by_group:
+            col_data = self._column(column)
+
+        if zonemap is None:
+            selected = selection.positions()
+            self._selection = Selection.of(selected[kernel(col_data[selected])], selection.rows)
+            return self
+
+        candidates = (
+            zonemap.matching_blocks(zone_predicate) if zone_predicate is not None
+            else range(len(zonemap.blocks))
+        )
+        if len(candidates) < len(zonemap.blocks):
+            self._trace(f"using zonemap for {column}: {len(candidates)}/{len(zonemap.blocks)} row groups")
+        blocks = []
+        for block_no in candidates:
+            block = zonemap.blocks[block_no]
+            # The selection is kept in row order, so a block's rows are a slice
+            lo, hi = selection.bounds(block["start"], block["end"])
+            if lo < hi:
+                blocks.append((block_no, selection.positions()[lo:hi]))
+        if col_data is not None:
+            chunks = (col_data[rows] for _, rows in blocks)
+        else:
+            # The surviving row groups, decoded from one read of the column file
+            groups = unit.read_groups([block_no for block_no, _ in blocks])
+            chunks = (
+                np.asarray(values)[rows - zonemap.blocks[block_no]["start"]]
+                for values, (block_no, rows) in zip(groups, blocks)
+            )
+        # Chunks lead the zip so the row group reader runs to its end and closes the file
+        parts = [rows[kernel(values)] for values, (_, rows) in zip(chunks, blocks)]
+
+        positions = np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
+        self._selection = Selection.of(positions, selection.rows)
+        return self
 
-        self._selected_indexes = [
-            i for i in self._selected_indexes
-            if predicate(col_data[i])
-        ]
+    def _restrict(self, bitmap: BitmapIndex) -> "Query":
+        """Intersect the selection with a bitmap of matching rows."""
+        return self._intersect(BitmapSelection(bitmap))
+
+    def _projected(self, column: str, op: str, low=None, high=None, values=None) -> bool:
+        """Apply a predicate as row ranges of a projection, when one is sorted by column there.
+
+        A fresh query starts on the projection sorted first by column
+        (unless the table itself is sorted by it); later predicates refine
+        the ranges while they follow the projection's sort key. Returns
+        False, leaving the query unchanged, when no projection applies.
+        """
+        selection = self._selection
+        try:
+            if isinstance(selection, ProjectedSelection):
+                projection = selection.projection
+                if not projection.can_refine(selection, column):
+                    return False
+            elif (isinstance(selection, RangeSelection) and len(selection) == selection.rows
+                  and column not in self.table.sorted_columns):
+                projection = self.table.projection_for(column)
+                if projection is None:
+                    return False
+                selection = projection.all()
+                if not projection.can_refine(selection, column):
+                    return False
+            else:
+                return False
+            refined = projection.refine(selection, column, low, high, values)
+        except (TypeError, ValueError) as e:
+            # Values that do not compare with the keys, or an outdated projection
+            print(f"Warning: Projection not used for where_{op} on '{column}': {e}")
+            return False
+        self._trace(f"using projection {projection.name} for where_{op} on column {column}")
+        self._selection = refined
+        return True
+
+    def _intersect(self, selection: Selection) -> "Query":
+        self._selection = self._selection.intersect(selection)
         return self
 
+    def where(self, column: str, predicate) -> "Query":
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._codes_where(column, predicate),
+                                        f"{column} matches {getattr(predicate, '__name__', 'predicate')}")
+        return self._add(Predicate(column, "where", func=predicate))
+
     def where_eq(self, column: str, value) -> "Query":
-        col_data = self._column_cache[column]
-        # Try bitmap-backed lookup first
-        bm_map = getattr(self.table, "bitmap_indexes", {})
-        col_bms = bm_map.get(column)
-        if col_bms is not None:
-            # find metadata key for the requested value (metadata keys are strings)
-            value_key = None
-            if str(value) in col_bms:
-                value_key = str(value)
-            elif value in col_bms:
-                value_key = value
-
-            b = self.table.get_bitmap(column, value_key) if value_key is not None else None
-            if b is not None and getattr(b, "length", None) == len(col_data):
-                print("using bitmap for where_eq on column", column)
-                # Lazy bitmap intersection: adopt or AND without materializing
-                if len(self._selected_indexes) == len(col_data) and self._bitmap_selection is None:
-                    # no prior restrictions, adopt bitmap directly
-                    self._bitmap_selection = b
-                    return self
-
-                if self._bitmap_selection is not None:
-                    # intersect with existing bitmap selection
-                    self._bitmap_selection = self._bitmap_selection.and_(b)
-                    return self
-
-                # Convert current selection to bitmap and intersect
-                bits = 0
-                for i in self._selected_indexes:
-                    bits |= (1 << i)
-                cur_b = BitmapIndex(bits, len(col_data))
-                self._bitmap_selection = cur_b.and_(b)
-                return self
-
-        # Fallback to linear scan
-        self._selected_indexes = [
-            i for i in self._selected_indexes
-            if col_data[i] == value
-        ]
-        return self
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._encode(column, [value]), f"{column} = {value!r}")
+        return self._add(Predicate.eq(column, value))
 
     def where_in(self, column: str, values) -> "Query":
-        col_data = self._column_cache[column]
-        # Try bitmap-backed lookup first
-        bm_map = getattr(self.table, "bitmap_indexes", {})
-        col_bms = bm_map.get(column)
-        if col_bms is not None:
-            # combine bitmaps for the requested values
-            combined = None
-            valid = True
-            for v in values:
-                # find matching metadata key
-                v_key = str(v) if str(v) in col_bms else (v if v in col_bms else None)
-                if v_key is None:
-                    # missing bitmap for this value — skip
-                    continue
-                b = self.table.get_bitmap(column, v_key)
-                if b is not None:
-                    combined = b if combined is None else combined.or_(b)
-                else:
-                    continue
-
-            if combined is not None and getattr(combined, "length", None) == len(col_data):
-                print("using bitmap for where_in on column", column)
-                # Lazy bitmap intersection similar to where_eq
-                if len(self._selected_indexes) == len(col_data) and self._bitmap_selection is None:
-                    self._bitmap_selection = combined
-                    return self
-
-                if self._bitmap_selection is not None:
-                    self._bitmap_selection = self._bitmap_selection.and_(combined)
-                    return self
-
-                bits = 0
-                for i in self._selected_indexes:
-                    bits |= (1 << i)
-                cur_b = BitmapIndex(bits, len(col_data))
-                self._bitmap_selection = cur_b.and_(combined)
-                return self
-
-        # Fallback to linear scan
-        value_set = set(values)
-        self._selected_indexes = [
-            i for i in self._selected_indexes
-            if col_data[i] in value_set
-        ]
-        return self
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._encode(column, values), f"{column} IN {sorted(values, key=str)}")
+        return self._where_in_codes(column, values)
+
+    def _where_in_codes(self, column: str, values, label: str = None) -> "Query":
+        """where_in on the stored representation (codes for encoded columns)."""
+        return self._add(Predicate.isin(column, set(values), label))
 
     def where_gte(self, column: str, threshold) -> "Query":
-        col_data = self._column_cache[column]
-        # Materialize any lazy bitmap-backed selection so we operate on the
-        # actual filtered index set rather than the implicit full-range.
-        if self._bitmap_selection is not None:
-            self._selected_indexes = self._bitmap_selection.get_positions()
-            self._bitmap_selection = None
-
-        # HYBRID APPROACH: ZoneMap → Binary Search
-        # Use zonemap to find qualifying block, then binary search within block
-        if column in getattr(self.table, "zonemaps", {}) and column in self.table.sorted_columns:
-            try:
-                zm = self.table.zonemaps[column]
-                # Step 1: Find first block with max >= threshold
-                for block in zm.blocks:
-                    try:
-                        if block["max"] >= threshold:
-                            block_start = block["start"]
-                            block_end = block["end"]
-                            
-                            # Step 2: Binary search within this block only
-                            try:
-                                local_idx = bisect.bisect_left(col_data, threshold, lo=block_start, hi=block_end)
-                                # adjust to be relative to the block
-                                local_idx = local_idx - block_start
-                            except TypeError:
-                                slice_strs = [str(x) for x in col_data[block_start:block_end]]
-                                local_idx = bisect.bisect_left(slice_strs, str(threshold))
-                            
-                            start_idx = block_start + local_idx
-                            print(f"using zonemap+bisect for where_gte on {column}")
-                            
-                            if len(self._selected_indexes) == len(col_data):
-                                self._selected_indexes = list(range(start_idx, len(col_data)))
-                            else:
-                                self._selected_indexes = [i for i in self._selected_indexes if i >= start_idx]
-                            return self
-                    except Exception:
-                        continue
-            except Exception:
-                pass
-        
-        # Fallback: binary search on full column (if sorted but no zonemap)
-        if column in self.table.sorted_columns:
-            try:
-                start_idx = bisect.bisect_left(col_data, threshold)
-            except TypeError:
-                start_idx = bisect.bisect_left([str(x) for x in col_data], str(threshold))
-            except Exception:
-                start_idx = None
-
-            if start_idx is not None:
-                print("using binary search for where_gte on column", column)
-                if len(self._selected_indexes) == len(col_data):
-                    self._selected_indexes = list(range(start_idx, len(col_data)))
-                else:
-                    self._selected_indexes = [i for i in self._selected_indexes if i >= start_idx]
-                return self
-
-        # Fallback: zonemap only (if not sorted)
-        if column in getattr(self.table, "zonemaps", {}):
-            try:
-                zm = self.table.zonemaps[column]
-                start_idx = zm.find_start(threshold, col_data)
-                print("using zonemap for where_gte on column", column)
-                if len(self._selected_indexes) == len(col_data):
-                    self._selected_indexes = list(range(start_idx, len(col_data)))
-                else:
-                    self._selected_indexes = [i for i in self._selected_indexes if i >= start_idx]
-                return self
-            except Exception:
-                pass
-
-        # Final fallback: linear scan
-        self._selected_indexes = [
-            i for i in self._selected_indexes
-            if col_data[i] >= threshold
-        ]
-        return self
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._codes_where(column, lambda v: v >= threshold),
+                                        f"{column} >= {threshold!r}")
+        return self._add(Predicate(column, "gte", low=threshold))
 
     def where_lte(self, column: str, threshold) -> "Query":
-        col_data = self._column_cache[column]
-        # Materialize any lazy bitmap-backed selection first
-        if self._bitmap_selection is not None:
-            self._selected_indexes = self._bitmap_selection.get_positions()
-            self._bitmap_selection = None
-        # HYBRID APPROACH: ZoneMap -> Binary Search to find end index
-        if column in getattr(self.table, "zonemaps", {}) and column in self.table.sorted_columns:
-            try:
-                zm = self.table.zonemaps[column]
-                last_block = None
-                for block in zm.blocks:
-                    try:
-                        if block["min"] > threshold:
-                            break
-                        last_block = block
-                    except Exception:
-                        continue
-
-                if last_block is not None:
-                    block_start = last_block["start"]
-                    block_end = last_block["end"]
-                    try:
-                        local_idx = bisect.bisect_right(col_data, threshold, lo=block_start, hi=block_end)
-                        # local_idx from bisect is absolute index; convert to offset within block
-                        local_idx = local_idx - block_start
-                    except TypeError:
-                        slice_strs = [str(x) for x in col_data[block_start:block_end]]
-                        local_idx = bisect.bisect_right(slice_strs, str(threshold))
-
-                    end_idx = block_start + local_idx
-                    print(f"using zonemap+bisect for where_lte on {column}")
-                    if len(self._selected_indexes) == len(col_data):
-                        self._selected_indexes = list(range(end_idx))
-                    else:
-                        self._selected_indexes = [i for i in self._selected_indexes if i < end_idx]
-                    return self
-            except Exception:
-                pass
-
-        # Fallback: binary search on full column (if sorted)
-        if column in self.table.sorted_columns:
-            try:
-                end_idx = bisect.bisect_right(col_data, threshold)
-            except TypeError:
-                end_idx = bisect.bisect_right([str(x) for x in col_data], str(threshold))
-            except Exception:
-                end_idx = None
-
-            if end_idx is not None:
-                print("using binary search for where_lte on column", column)
-                if len(self._selected_indexes) == len(col_data):
-                    self._selected_indexes = list(range(end_idx))
-                else:
-                    self._selected_indexes = [i for i in self._selected_indexes if i < end_idx]
-                return self
-
-        # Fallback: zonemap only (if not sorted) - find first block with min > threshold
-        if column in getattr(self.table, "zonemaps", {}):
-            try:
-                zm = self.table.zonemaps[column]
-                end_idx = None
-                for block in zm.blocks:
-                    try:
-                        if block["min"] > threshold:
-                            end_idx = block["start"]
-                            break
-                    except Exception:
-                        continue
-                if end_idx is None:
-                    end_idx = len(col_data)
-
-                print(f"using zonemap for where_lte on {column}")
-                if len(self._selected_indexes) == len(col_data):
-                    self._selected_indexes = list(range(end_idx))
-                else:
-                    self._selected_indexes = [i for i in self._selected_indexes if i < end_idx]
-                return self
-            except Exception:
-                pass
-
-        # Otherwise filter the current selection in-place
-        self._selected_indexes = [
-            i for i in self._selected_indexes
-            if col_data[i] <= threshold
-        ]
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._codes_where(column, lambda v: v <= threshold),
+                                        f"{column} <= {threshold!r}")
+        return self._add(Predicate(column, "lte", high=threshold))
+
+    @staticmethod
+    def _below(threshold) -> float | None:
+        """Largest float under a numeric threshold (so < becomes <=), or None for other values."""
+        if isinstance(threshold, (int, float, np.number)) and not isinstance(threshold, bool):
+            return float(np.nextafter(float(threshold), -np.inf))
+        return None
+
+    def where_lt(self, column: str, threshold) -> "Query":
+        label = f"{column} < {threshold!r}"
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._codes_where(column, lambda v: v < threshold), label)
+        bound = self._below(threshold)
+        if bound is None:
+            return self._add(Predicate(column, "where", func=lambda v: v is not None and v < threshold, label=label))
+        return self._add(Predicate(column, "lte", high=bound, label=label))
+
+    def where_gt(self, column: str, threshold) -> "Query":
+        label = f"{column} > {threshold!r}"
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._codes_where(column, lambda v: v > threshold), label)
+        bound = self._below(threshold)
+        if bound is None:
+            return self._add(Predicate(column, "where", func=lambda v: v is not None and v > threshold, label=label))
+        # Smallest float above the threshold
+        return self._add(Predicate(column, "gte", low=-self._below(-threshold), label=label))
+
+    def where_ne(self, column: str, value) -> "Query":
+        """Keep non-null rows whose value differs from value."""
+        label = f"{column} != {value!r}"
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._codes_where(column, lambda v: v != value), label)
+        return self._add(Predicate(column, "where", func=lambda v: v is not None and v == v and v != value, label=label))
+
+    def where_between(self, column: str, low, high) -> "Query":
+        """Keep rows with low <= value <= high."""
+        if column in self._dictionaries:
+            return self._where_in_codes(column, self._codes_where(column, lambda v: low <= v <= high),
+                                        f"{column} BETWEEN {low!r} AND {high!r}")
+        return self._add(Predicate(column, "between", low=low, high=high))
+
+    def _add(self, predicate: Predicate) -> "Query":
+        """Queue a predicate; pending predicates run together, in planned order, when rows are needed."""
+        self._pending.append(predicate)
         return self
 
-    def fetch(self) -> list[dict]:
-        column_cache = self._column_cache
+    def plan(self) -> List[Step]:
+        """Planned steps of the pending predicates, without running them."""
+        return Planner(self).plan(self._pending, self._selection)
+
+    def _run(self) -> None:
+        """Evaluate the pending predicates in the order and through the paths the planner picked."""
+        if not self._pending:
+            return
+        steps = self.plan()
+        if [step.predicate for step in steps] != self._pending and self.TRACE:
+            print("[Planner] Predicate order:", " → ".join(str(step.predicate) for step in steps))
+        self._pending = []
+        for step in steps:
+            self._notes = step.notes
+            start = time.perf_counter()
+            if len(self._selection):
+                getattr(self, f"_via_{step.path}")(step.predicate)
+            step.seconds = time.perf_counter() - start
+            step.actual = len(self._selection)
+            self.executed.append(step)
+        self._notes = []
+
+    def _trace(self, message: str) -> None:
+        """Record an access-path detail on the running step (printed with TRACE)."""
+        self._notes.append(message)
+        if self.TRACE:
+            print(message)
+
+    # -- access paths (see Planner) -----------------------------------------
+
+    def _bitmaps(self, column: str, values) -> List[BitmapIndex] | None:
+        """Bitmaps of every value of a column, or None unless each value has one."""
+        col_bms = getattr(self.table, "bitmap_indexes", {}).get(column)
+        if col_bms is None:
+            return None
+        bitmaps = []
+        for v in values:
+            # find matching metadata key (metadata keys are strings)
+            v_key = str(v) if str(v) in col_bms else (v if v in col_bms else None)
+            b = self.table.get_bitmap(column, v_key) if v_key is not None else None
+            if b is None or getattr(b, "length", None) != self.table.num_rows():
+                return None
+            bitmaps.append(b)
+        return bitmaps
+
+    def _via_bitmap(self, predicate: Predicate) -> None:
+        # The bitmaps alone answer the predicate; the column is not read
+        bitmaps = self._bitmaps(predicate.column, predicate.values)
+        combined = bitmaps[0]
+        for b in bitmaps[1:]:
+            combined = combined.or_(b)
+        self._trace(f"using bitmap for where_{predicate.op} on column {predicate.column}")
+        self._restrict(combined)
+
+    def _via_projection(self, predicate: Predicate) -> None:
+        values = predicate.values if predicate.op in ("eq", "in") else None
+        if not self._projected(predicate.column, predicate.op, predicate.low, predicate.high, values):
+            self._via_scan(predicate)
+
+    def _via_bisect(self, predicate: Predicate) -> None:
+        # HYBRID APPROACH: ZoneMap → Binary Search on a sorted column; the
+        # selection is sorted too, so it is cut at the bounds without a scan.
+        start_idx = 0 if predicate.low is None else self._sorted_bound(predicate.column, predicate.low, "left")
+        end_idx = self._selection.rows if predicate.high is None else self._sorted_bound(predicate.column, predicate.high, "right")
+        self._selection = self._selection.restrict(start_idx, end_idx)
+
+    def _via_sorted_index(self, predicate: Predicate) -> None:
+        index = self.table.sorted_indexes[predicate.column]
+        lo, hi = index.bounds(predicate.low, predicate.high)
+        self._trace(f"using sorted index for where_{predicate.op} on column {predicate.column}")
+        self._intersect(Selection.of(index.positions(lo, hi), self._selection.rows))
+
+    def _via_bsi(self, predicate: Predicate) -> None:
+        index = self.table.range_indexes[predicate.column]
+        low, high = predicate.low, predicate.high
+        self._trace(f"using bit-sliced index for where_{predicate.op} on column {predicate.column}")
+        if predicate.op == "eq":
+            self._restrict(index.eq(low))
+        elif high is None:
+            self._restrict(index.gte(low))
+        elif low is None:
+            self._restrict(index.lte(high))
+        else:
+            self._restrict(index.between(low, high))
+
+    def _via_scan(self, predicate: Predicate) -> None:
+        """Vectorized scan, skipping row groups whose min/max cannot match."""
+        op, low, high = predicate.op, predicate.low, predicate.high
+        if op == "where":
+            func = predicate.func
+
+            # Arbitrary Python predicates are evaluated value by value
+            def kernel(values: np.ndarray) -> np.ndarray:
+                return np.fromiter((bool(func(v)) for v in values.tolist()), dtype=bool, count=len(values))
+
+            self._filter(predicate.column, kernel)
+            return
+        if op == "in":
+            value_set = set(predicate.values)
+
+            def kernel(values: np.ndarray) -> np.ndarray:
+                return self._isin(values, value_set)
+        elif op == "eq":
+            def kernel(values: np.ndarray) -> np.ndarray:
+                return self._compare(values, operator.eq, low)
+        else:
+            def kernel(values: np.ndarray) -> np.ndarray:
+                mask = np.ones(len(values), dtype=bool) if low is None else self._compare(values, operator.ge, low)
+                return mask if high is None else mask & self._compare(values, operator.le, high)
+        self._filter(predicate.column, kernel, predicate.zone_test)
+
+    _via_zonemap = _via_scan
+
+    @staticmethod
+    def _reaches(value, threshold) -> bool:
+        """value >= threshold, False when they do not compare (e.g. a None bound)."""
+        try:
+            return value >= threshold
+        except TypeError:
+            return False
+
+    def _run_length(self, column: str) -> bool:
+        """True when a sorted-bound search on column runs on its runs (not yet in memory)."""
+        if self._in_memory(column):
+            return False
+        return getattr(self.table.get_unit(column), "run_length", lambda: False)()
+
+    def _run_bound(self, column: str, threshold, side: str) -> int | None:
+        """Bound of threshold in a sorted column from its runs (see Column.sorted_bound), or None."""
+        if column in self._column_cache:
+            return None
+        sorted_bound = getattr(self.table.get_unit(column), "sorted_bound", None)
+        return None if sorted_bound is None else sorted_bound(threshold, side)
+
+    def _sorted_bound(self, column: str, threshold, side: str) -> int | None:
+        """Row where threshold falls in a sorted column (np.searchsorted side), or None.
 
-        return [
-            {col: column_cache[col][i] for col in column_cache}
-            for i in self._selected_indexes
-        ]
+        A run-length column not yet in memory is searched on its runs. Otherwise
+        a zone map narrows the search to the row group holding the boundary;
+        without one the whole column is binary searched.
+        """
+        if column not in self.table.sorted_columns:
+            return None
+        op = "where_gte" if side == "left" else "where_lte"
+        bound = self._run_bound(column, threshold, side)
+        if bound is not None:
+            self._trace(f"using run-length bisect for {op} on {column}")
+            return bound
+        col_data = self._column(column)
+
+        block = None
+        zm = getattr(self.table, "zonemaps", {}).get(column)
+        if zm is not None:
+            if side == "left":
+                # First block whose max reaches the threshold
+                block = next((blk for blk in zm.blocks if self._reaches(blk["max"], threshold)), None)
+            else:
+                # Last block whose min does not exceed the threshold
+                for blk in zm.blocks:
+                    if self._reaches(threshold, blk["min"]):
+                        block = blk
+                    elif blk["min"] is not None:
+                        break
+
+        if block is not None:
+            lo, hi = block["start"], block["end"]
+            self._trace(f"using zonemap+bisect for {op} on {column}")
+        else:
+            lo, hi = 0, len(col_data)
+            self._trace(f"using binary search for {op} on column {column}")
+
+        window = col_data[lo:hi]
+        try:
+            return lo + int(np.searchsorted(window, threshold, side=side))
+        except TypeError:
+            return lo + int(np.searchsorted(window.astype(str), str(threshold), side=side))
+
+    def gather(self, column: str, positions: np.ndarray, decode: bool = True) -> np.ndarray:
+        """Values of column at positions, dictionary codes decoded unless decode is False.
+
+        A column already scanned by a predicate is indexed in memory; any
+        other is read only at the positions.
+        """
+        if column in self._column_cache:
+            values = self._column_cache[column][positions]
+        else:
+            values = self.table.get_unit(column).gather(positions)
+        if decode and column in self._dictionaries:
+            values = self.decode(column, values)
+        return values
+
+    def decode(self, column: str, codes: np.ndarray) -> np.ndarray:
+        """Values of a dictionary-encoded column's codes, with one gather from the dictionary."""
+        decoder = self._decoders.get(column)
+        if decoder is None or len(decoder) != len(self._dictionaries[column]):
+            decoder = np.asarray(self._dictionaries[column], dtype=object)
+            self._decoders[column] = decoder
+        return decoder[codes.astype(np.int64)]
+
+    def _fetch_columns(self, columns) -> List[str]:
+        if columns is None:
+            return list(self.table.storage_units)
+        unknown = [col for col in columns if col not in self.table.storage_units]
+        if unknown:
+            raise KeyError(f"Fields {unknown} not in table schema.")
+        return list(columns)
+
+    @staticmethod
+    def to_dicts(batch: Dict[str, np.ndarray]) -> list[dict]:
+        """Rows of a columnar batch as dicts of Python values."""
+        names = list(batch)
+        return [dict(zip(names, row)) for row in zip(*(values.tolist() for values in batch.values()))]
+
+    def fetch(self, columns: List[str] = None, as_dicts: bool = False):
+        """Selected rows of columns (default every column) as one batch {column: array}.
+
+        Only the selected rows of the requested columns are read, and
+        dictionary codes are decoded for those rows only. With as_dicts the
+        rows are returned as a list of dicts instead.
+        """
+        selected = self.select()
+        batch = {col: self.gather(col, selected) for col in self._fetch_columns(columns)}
+        return self.to_dicts(batch) if as_dicts else batch
+
+    def fetch_iter(self, batch_size: int = FETCH_BATCH_ROWS, columns: List[str] = None,
+                   as_dicts: bool = False) -> Iterator:
+        """fetch in batches of at most batch_size rows, read as they are consumed."""
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        names = self._fetch_columns(columns)
+        selected = self.select()
+        for start in range(0, len(selected), batch_size):
+            positions = selected[start:start + batch_size]
+            batch = {col: self.gather(col, positions) for col in names}
+            yield self.to_dicts(batch) if as_dicts else batch
+
+    @staticmethod
+    def _present(values: np.ndarray) -> np.ndarray:
+        """Values without nulls (NaN in float arrays, None in object arrays)."""
+        if values.dtype.kind == "f":
+            return values[~np.isnan(values)]
+        if values.dtype == object:
+            return values[np.not_equal(values, None)]
+        return values
+
+    def group_by(self, columns: List[str], aggregates: List[tuple]) -> Dict[str, np.ndarray]:
+        """Aggregates of the selected rows per distinct combination of columns, in one pass.
+
+        aggregates are (func, column) pairs with func count / min / max /
+        sum / avg, and column "*" for count(*). Keys are grouped on their
+        stored representation (dictionary codes stay codes) and decoded
+        once per group. Returns a columnar batch ordered by key: the key
+        columns, then "func(column)" for each aggregate (None for a group
+        without values).
+        """
+        names = self._fetch_columns(columns)
+        if not names:
+            raise ValueError("group_by needs at least one column")
+        for func, column in aggregates:
+            if func not in GroupAggregate.FUNCS:
+                raise ValueError(f"Invalid aggregation function '{func}'")
+            if column != "*":
+                self._fetch_columns([column])
+        selected = self.select()
+        grouping = GroupAggregate(
+            [self.gather(col, selected, decode=False) for col in names],
+            [len(self._dictionaries[col]) if col in self._dictionaries else None for col in names],
+        )
+        self.grouping = grouping
+        if self.TRACE:
+            print(f"[Query] group_by {', '.join(names)}: {grouping.describe()}")
+        groups, keys = grouping.keys()
+
+        batch = {}
+        for col, values in zip(names, keys):
+            batch[col] = self.decode(col, values) if col in self._dictionaries else values
+        gathered = {}
+        for func, column in aggregates:
+            if column == "*":
+                batch[f"{func}(*)"] = grouping.aggregate("count", groups=groups)
+                continue
+            if column not in gathered:
+                gathered[column] = self.gather(column, selected)
+            batch[f"{func}({column})"] = grouping.aggregate(func, gathered[column], groups)
+        return batch
+
+    def values(self, column: str) -> np.ndarray:
+        """Non-null selected values of column, decoded."""
+        values = self._column(column)[self.select()]
+        if column in self._dictionaries:
+            values = self.decode(column, values)
+        return self._present(values)
 
     def aggregate(self, column: str, func: str):
-        if not self._selected_indexes:
+        """min / max / sum / avg of the non-null selected values, or count of selected rows."""
+        if not self.count():
+            return None
+        if func == "count":
+            return self.count()
+        if func not in ("max", "min", "sum", "avg"):
+            raise ValueError(f"Invalid aggregation function '{func}'")
+        values = self.values(column)
+        if not len(values):
             return None
 
-        col_data = self._column_cache[column]
-
-        # Use generators to avoid materializing entire list in memory
         if func == "max":
-            return max((col_data[i] for i in self._selected_indexes), default=None)
+            result = values.max()
         elif func == "min":
-            return min((col_data[i] for i in self._selected_indexes), default=None)
+            result = values.min()
         elif func == "sum":
-            return sum(col_data[i] for i in self._selected_indexes)
-        elif func == "avg":
-            total = 0
-            count = 0
-            for i in self._selected_indexes:
-                total += col_data[i]
-                count += 1
-            return total / count if count > 0 else None
-        elif func == "count":
-            return len(self._selected_indexes)
+            result = values.sum()
         else:
-            raise ValueError(f"Invalid aggregation function '{func}'")
\ No newline at end of file
+            result = values.sum() / len(values)
+        return result.item() if isinstance(result, np.generic) else result
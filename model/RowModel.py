@@ -0,0 +1,24 @@
+# model/RowModel.py
+
+from model.ColumnModel import Column
+from utils.row_format import PaxFormat, RowFormat
+
+
+class Row(Column):
+    """A column view over a row-oriented record file.
+
+    Values are read out of the fixed-width records on first access, so the
+    same Query operations run against the row engine as against Column.
+    """
+
+    def __init__(self, dtype: type = str, db_path: str = None, name: str = None):
+        super().__init__(dtype=dtype, db_path=db_path, name=name)
+        self.columnformat = RowFormat(db_path)
+
+
+class PaxRow(Column):
+    """A column view over a PAX record file (records grouped into column-wise pages)."""
+
+    def __init__(self, dtype: type = str, db_path: str = None, name: str = None):
+        super().__init__(dtype=dtype, db_path=db_path, name=name)
+        self.columnformat = PaxFormat(db_path)
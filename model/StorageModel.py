@@ -2,6 +2,8 @@
 
 from abc import ABC, abstractmethod
 
+import numpy as np
+
 class StorageModel(ABC):
     """Abstract base for a single storage unit (Column or Row)."""
 
@@ -13,3 +15,12 @@ class StorageModel(ABC):
     def scan(self) -> list:
         """Return all stored values."""
         pass
+
+    def take(self, positions) -> list:
+        """Return the stored values at the given row positions."""
+        data = self.scan()
+        return [data[i] for i in positions]
+
+    def gather(self, positions):
+        """Stored values at the given row positions, as an array."""
+        return np.asarray(self.scan())[np.asarray(positions, dtype=np.int64)]
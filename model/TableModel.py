@@ -1,11 +1,20 @@
 # model/TableModel.py
 
+import os
 from typing import Dict, List
+
+import numpy as np
+
 from model.StorageModel import StorageModel
 from model.UnitModel import UnitModel
+from utils.column_format import ColumnFormat
+from utils.index_store import BitmapFile, IndexStore, LazyIndexes
 from utils.metadata import MetaLoader
-from utils.helpers import Helpers
+from utils.prefetcher import Prefetcher
+from utils.schema import SchemaError
 from optimization.BitmapIndex import BitmapIndex
+from optimization.ColumnStats import ColumnStats
+from optimization.Projection import Projection
 from optimization.ZoneMap import ZoneMap
 
 
@@ -20,9 +29,23 @@ class Table:
         self.name = name
         self.storage_units: Dict[str, StorageModel] = {}
         self.sorted_columns: List = []
-        self.zonemaps: Dict[str, ZoneMap] = {}
-        self.bitmap_indexes: Dict[str, Dict[str, str]] = {}
+        # Indexes are opened on first use: zone maps per column, bitmaps as
+        # {column: {value key: BitmapIndex | base64 string}} mappings.
+        self.zonemaps: LazyIndexes = LazyIndexes()
+        self.bitmap_indexes: Dict[str, Dict[str, object]] = {}
+        # Bit-sliced range indexes (BitSlicedIndex) of numeric columns
+        self.range_indexes: LazyIndexes = LazyIndexes()
+        # Sort permutations (SortedIndex) of numeric columns
+        self.sorted_indexes: LazyIndexes = LazyIndexes()
+        # Copies of key columns in other sort orders, by name
+        self.projections: Dict[str, Projection] = {}
+        # Column statistics (ColumnStats), read from the stats sidecar on first use
+        self._stats: Dict[str, ColumnStats] | None = None
+        self._stats_path: str | None = None
         self._bitmap_cache: Dict[str, Dict[str, BitmapIndex]] = {}
+        self.row_count: int | None = None
+        # Columns being loaded in the background (see prefetch)
+        self.prefetcher = Prefetcher()
 
     def add_unit(self, name: str, unit: StorageModel) -> None:
         self.storage_units[name] = unit
@@ -30,36 +53,82 @@ class Table:
     def get_unit(self, name: str) -> StorageModel:
         if name not in self.storage_units:
             raise KeyError(f"Storage unit '{name}' not found.")
+        # A unit being prefetched is handed out once its load has finished
+        self.prefetcher.wait(name)
         return self.storage_units[name]
 
+    def prefetch(self, columns: List[str]) -> List[str]:
+        """Start loading columns in the background, in the order a query will filter on them.
+
+        A query can run its first predicate as soon as that column is ready
+        while later ones are still loading. Columns with a bitmap index are
+        skipped: their predicates are answered from the bitmaps. Returns the
+        columns started.
+        """
+        jobs = {
+            name: self.storage_units[name].scan
+            for name in columns
+            if name in self.storage_units and name not in self.bitmap_indexes
+        }
+        started = self.prefetcher.start(jobs)
+        if started:
+            print(f"[Table] Prefetching {started} on {self.prefetcher.workers} threads")
+        return started
+
     def create_unit(self, name: str, dtype: type = str) -> None:
         self.storage_units[name] = UnitModel.create(name, dtype)
 
-    def get_rows(self, indexes: list) -> list[dict]:
-        """Efficient row retrieval using cached column scans."""
-        column_cache = {
-            name: unit.scan()
+    def get_rows(self, indexes: list, columns: List[str] = None) -> list[dict]:
+        """Rows at indexes as dicts of columns (default every column).
+
+        Only the requested positions of each column are read, and only
+        their dictionary codes are decoded.
+        """
+        positions = np.asarray(indexes, dtype=np.int64)
+        column_values = {}
+        for name in (columns if columns is not None else self.storage_units):
+            unit = self.get_unit(name)
+            values = unit.gather(positions)
+            if getattr(unit, "dictionary", None) is not None:
+                values = np.asarray(unit.dictionary, dtype=object)[values.astype(np.int64)]
+            column_values[name] = values.tolist()
+        names = list(column_values)
+        return [dict(zip(names, row)) for row in zip(*column_values.values())]
+
+    def num_rows(self) -> int:
+        """Row count from metadata, or the length of the first column."""
+        if self.row_count is not None:
+            return self.row_count
+        if not self.storage_units:
+            return 0
+        return len(self.get_unit(next(iter(self.storage_units))).scan())
+
+    def dictionaries(self) -> Dict[str, list]:
+        """Value dictionaries of the dictionary-encoded columns."""
+        return {
+            name: unit.dictionary
             for name, unit in self.storage_units.items()
+            if getattr(unit, "dictionary", None) is not None
         }
 
-        return [
-            {col: column_cache[col][i] for col in column_cache}
-            for i in indexes
-        ]
-
     def insert(self, row: dict) -> None:
         for field, value in row.items():
             if field not in self.storage_units:
                 raise KeyError(f"Field '{field}' not in table schema.")
-            self.storage_units[field].append(value)
+            self.get_unit(field).append(value)
+        if self.row_count is not None:
+            self.row_count += 1
+        # Footer statistics and range indexes no longer cover the appended row
+        self.zonemaps.clear()
+        self.range_indexes.clear()
+        self.sorted_indexes.clear()
+        self.projections.clear()
 
     def save(self) -> None:
         self.engine.write_units(self.storage_units)
 
     def load(self) -> "Table":
         try:
-            column_data: Dict[str, list] = self.engine.read()
-
             meta = {}
             db_path = getattr(self.engine, "db_path", None)
             if db_path:
@@ -70,39 +139,116 @@ class Table:
                 except Exception:
                     meta = {}
 
-            sorted_columns = meta.get("sorted_columns", [])
-
-            for col_name, raw_values in column_data.items():
-                dtype = Helpers._infer_dtype(raw_values)
-                unit = UnitModel.create(col_name, dtype)
-                unit.data = [Helpers._safe_cast(v, dtype) for v in raw_values]
-                self.storage_units[col_name] = unit
-                self.sorted_columns =  sorted_columns
+            self.sorted_columns = meta.get("sorted_columns", [])
+            self.row_count = meta.get("rows")
 
-            bitmap_meta = meta.get("bitmap_indexes", {})
-            for col, value_map in bitmap_meta.items():
-                self.bitmap_indexes[col] = {}
-                self._bitmap_cache[col] = {}
-                for val, b64 in value_map.items():
-                    try:
+            # Columns are registered unloaded; each .col file is read the
+            # first time a query touches it (projection pushdown).
+            schema = meta.get("schema")
+            stored_columns = self.engine.list_columns()
+            if schema is not None:
+                missing = [col for col in schema if col not in stored_columns]
+                if missing:
+                    raise SchemaError(f"Columns in schema but not stored: {missing}")
 
-                        self.bitmap_indexes[col][val] = b64
-                    except Exception:
-                        continue
+            read_dictionary = getattr(self.engine, "read_dictionary", None)
+            orientation = self.engine.format_name()
+            for col_name in stored_columns:
+                unit = UnitModel.create(col_name, orientation=orientation, db_path=db_path)
+                if schema is not None:
+                    if col_name not in schema:
+                        raise SchemaError(f"Column '{col_name}' is stored but missing from the schema")
+                    unit.schema = schema[col_name]
+                    if unit.schema.get("dictionary"):
+                        unit.dictionary = read_dictionary(col_name)
+                        if unit.dictionary is None:
+                            raise SchemaError(f"Dictionary for column '{col_name}' is missing")
+                elif read_dictionary is not None:
+                    unit.dictionary = read_dictionary(col_name)
+                self.storage_units[col_name] = unit
 
-            zonemap_meta = meta.get("zonemaps", {})
-            for col, zm_d in zonemap_meta.items():
-                try:
-                    self.zonemaps[col] = ZoneMap.from_dict(zm_d)
-                except Exception:
-                    continue
+            self._register_indexes(meta, db_path)
+            self._register_projections(meta, db_path)
+            if meta.get("stats"):
+                self._stats_path = os.path.join(db_path, meta["stats"])
 
             return self
 
+        except SchemaError:
+            raise
         except Exception as e:
             print(f"Error loading table from '{self.engine.db_path}': {e}")
             return self
 
+    def _register_indexes(self, meta: dict, db_path: str) -> None:
+        """Register the table's indexes without reading them.
+
+        Sidecar files listed in the "indexes" manifest are mapped on first
+        use; databases written before the manifest keep base64 bitmaps and
+        JSON zone maps inline in db.meta.json, which are still honoured.
+        Footer statistics take precedence over a stored zone map.
+        """
+        # Binary columns carry per-row-group min/max/null counts in their
+        # footer, giving every numeric column a zone map for free; the footer
+        # is read the first time a predicate asks for it.
+        for col_name, unit in self.storage_units.items():
+            zonemap_of = getattr(unit, "zonemap", None)
+            if zonemap_of is not None:
+                self.zonemaps.register(col_name, zonemap_of)
+
+        for col, files in meta.get("indexes", {}).items():
+            if "bitmap" in files:
+                self.bitmap_indexes[col] = BitmapFile(os.path.join(db_path, files["bitmap"]))
+                self._bitmap_cache[col] = {}
+            if "zonemap" in files:
+                path = os.path.join(db_path, files["zonemap"])
+                self.zonemaps.register(col, lambda path=path: IndexStore.read_zonemap(path))
+            if "bsi" in files:
+                path = os.path.join(db_path, files["bsi"])
+                self.range_indexes.register(col, lambda path=path: IndexStore.read_range_index(path))
+            if "sorted" in files:
+                path = os.path.join(db_path, files["sorted"])
+                self.sorted_indexes.register(col, lambda path=path: IndexStore.read_sorted_index(path))
+
+        for col, value_map in meta.get("bitmap_indexes", {}).items():
+            self.bitmap_indexes[col] = dict(value_map)
+            self._bitmap_cache[col] = {}
+
+        for col, zm_d in meta.get("zonemaps", {}).items():
+            self.zonemaps.register(col, lambda zm_d=zm_d: ZoneMap.from_dict(zm_d))
+
+    def _register_projections(self, meta: dict, db_path: str) -> None:
+        """Register the projections listed in the metadata; their files are mapped on first use."""
+        for name, entry in meta.get("projections", {}).items():
+            files = ColumnFormat(os.path.join(db_path, entry["path"]))
+            self.projections[name] = Projection(
+                name, entry["sort_key"], entry["rows"],
+                lambda col, files=files: ColumnFormat._as_array(files.read_column(col)),
+            )
+
+    def column_stats(self, column: str) -> ColumnStats | None:
+        """Statistics of a column from the last analyze, or None when there are none or they are outdated."""
+        if self._stats is None:
+            self._stats = {}
+            if self._stats_path is not None:
+                try:
+                    db_path, file_name = os.path.split(self._stats_path)
+                    self._stats = {
+                        col: ColumnStats.from_dict(d) for col, d in MetaLoader.load_stats(db_path, file_name).items()
+                    }
+                except Exception as e:
+                    print(f"Warning: Could not read column statistics: {e}")
+        stats = self._stats.get(column)
+        return stats if stats is not None and stats.rows == self.num_rows() else None
+
+    def projection_for(self, column: str) -> Projection | None:
+        """Projection sorted first by column, preferring the longest sort key."""
+        candidates = [
+            p for p in self.projections.values()
+            if p.sort_key[0] == column and p.rows == self.num_rows()
+        ]
+        return max(candidates, key=lambda p: len(p.sort_key), default=None)
+
     def get_bitmap(self, column: str, value) -> BitmapIndex | None:
         """Get decoded BitmapIndex for a column value (cached in-memory).
         
@@ -124,10 +270,10 @@ class Table:
         if value not in self.bitmap_indexes[column]:
             return None
         
-        # Decode from base64
+        # Sidecar entries are already BitmapIndex; legacy ones are base64
         try:
-            b64 = self.bitmap_indexes[column][value]
-            bitmap = BitmapIndex.from_base64(b64)
+            entry = self.bitmap_indexes[column][value]
+            bitmap = entry if isinstance(entry, BitmapIndex) else BitmapIndex.from_base64(entry)
             # Cache it
             if column not in self._bitmap_cache:
                 self._bitmap_cache[column] = {}
@@ -1,4 +1,6 @@
 from model.ColumnModel import Column
+from model.ParquetModel import ParquetColumn
+from model.RowModel import PaxRow, Row
 from model.StorageModel import StorageModel
 
 
@@ -6,14 +8,17 @@ class UnitModel:
     """Factory for creating StorageModel units based on orientation."""
 
     _REGISTRY = {
-        "column": Column
+        "column": Column,
+        "parquet": ParquetColumn,
+        "row": Row,
+        "pax": PaxRow,
     }
 
     @classmethod
-    def create(cls, name: str, dtype: type = str, orientation: str = "column") -> StorageModel:
+    def create(cls, name: str, dtype: type = str, orientation: str = "column", db_path: str = None) -> StorageModel:
         if orientation not in cls._REGISTRY:
             raise ValueError(
                 f"Unknown orientation '{orientation}'. "
                 f"Supported: {list(cls._REGISTRY.keys())}"
             )
-        return cls._REGISTRY[orientation](name, dtype)
+        return cls._REGISTRY[orientation](dtype=dtype, db_path=db_path, name=name)
@@ -0,0 +1,214 @@
+import math
+from typing import List
+
+import numpy as np
+
+from optimization.BitmapIndex import BitmapIndex
+
+
+class BitSlicedIndex:
+    """Bit-sliced index over the values of a numeric column.
+
+    Each non-null row's value is stored as a code, its key minus base:
+    integers are their own key, decimals a fixed-point integer (value *
+    10**decimals) and other floats their order-preserving IEEE-754 bit
+    pattern, so every float stays exact. Slice i is the bitmap of rows
+    whose code has bit i set, and exists the bitmap of non-null rows. A
+    comparison with a constant is a code comparison, evaluated from the
+    top slice down with two or three bitmap operations per slice however
+    many rows match. A code depends on its own row's value only, so
+    appended rows add their bits without changing those of other rows.
+    """
+
+    # Most decimal places tried for a fixed-point encoding of floats
+    MAX_DECIMALS = 4
+    # decimals of the IEEE-754 bit pattern encoding
+    FLOAT_BITS = -1
+
+    def __init__(self, slices: List[BitmapIndex], exists: BitmapIndex, base: int, decimals: int):
+        self.slices = slices
+        self.exists = exists
+        # Key of code 0, and the key encoding (see _keys)
+        self.base = int(base)
+        self.decimals = int(decimals)
+
+    @property
+    def rows(self) -> int:
+        return self.exists.length
+
+    @property
+    def max_code(self) -> int:
+        return (1 << len(self.slices)) - 1
+
+    @staticmethod
+    def _numeric(values) -> np.ndarray | None:
+        """values as a numeric array (None is NaN); None for non-numeric data."""
+        values = np.asarray(values)
+        if values.dtype == object:
+            try:
+                values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            except (TypeError, ValueError):
+                return None
+        return values if values.dtype.kind in "iuf" else None
+
+    @classmethod
+    def _keys(cls, values: np.ndarray, decimals: int) -> np.ndarray | None:
+        """int64 keys of non-null values, in value order; None when a value does not fit decimals."""
+        if values.dtype.kind in "iu" and decimals != cls.FLOAT_BITS:
+            return values.astype(np.int64) * 10 ** decimals
+        values = values.astype(np.float64)
+        if decimals == cls.FLOAT_BITS:
+            # + 0.0 turns -0.0 into 0.0; negative patterns are flipped to sort below positive ones
+            bits = (values + 0.0).view(np.int64)
+            return bits ^ ((bits >> 63) & np.int64(0x7FFFFFFFFFFFFFFF))
+        scale = 10 ** decimals
+        scaled = np.round(values * scale)
+        if not (np.abs(scaled) < 2 ** 53).all() or not np.array_equal(scaled / scale, values):
+            return None
+        return scaled.astype(np.int64)
+
+    @classmethod
+    def _slices(cls, positions: np.ndarray, codes: np.ndarray, count: int, rows: int) -> List[BitmapIndex]:
+        return [BitmapIndex.from_positions(positions[(codes >> bit) & 1 == 1], rows) for bit in range(count)]
+
+    @staticmethod
+    def build(values) -> "BitSlicedIndex | None":
+        """Index of a numeric column (NaN / None are null); None for non-numeric data."""
+        values = BitSlicedIndex._numeric(values)
+        if values is None:
+            return None
+        present = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(len(values), dtype=bool)
+        positions = np.flatnonzero(present)
+        values = values[present]
+        decimals, keys = 0, None
+        if values.dtype.kind == "f":
+            for decimals in range(BitSlicedIndex.MAX_DECIMALS + 1):
+                keys = BitSlicedIndex._keys(values, decimals)
+                if keys is not None:
+                    break
+            else:
+                decimals = BitSlicedIndex.FLOAT_BITS
+        if keys is None:
+            keys = BitSlicedIndex._keys(values, decimals)
+        base = int(keys.min()) if len(keys) else 0
+        codes = (keys - base).astype(np.uint64)
+        count = max(1, int(codes.max()).bit_length()) if len(codes) else 1
+        rows = len(present)
+        return BitSlicedIndex(BitSlicedIndex._slices(positions, codes, count, rows),
+                              BitmapIndex.from_positions(positions, rows), base, decimals)
+
+    def append(self, start: int, values, rows: int) -> "BitSlicedIndex | None":
+        """The index with rows from start on replaced by values, now rows long.
+
+        Only the bits of those rows are written; slices are added when a
+        code needs more bits. None when a value is below base or needs more
+        decimals than the index has (build a new index then).
+        """
+        values = self._numeric(values)
+        if values is None:
+            return None
+        present = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(len(values), dtype=bool)
+        positions = np.flatnonzero(present) + start
+        keys = self._keys(values[present], self.decimals)
+        if keys is None or (len(keys) and int(keys.min()) < self.base):
+            return None
+        codes = (keys - self.base).astype(np.uint64)
+        count = max(len(self.slices), int(codes.max()).bit_length() if len(codes) else 0)
+        slices = [
+            (self.slices[bit] if bit < len(self.slices) else BitmapIndex(self.rows)).replace_tail(
+                start, positions[(codes >> np.uint64(bit)) & np.uint64(1) == 1], rows)
+            for bit in range(count)
+        ]
+        return BitSlicedIndex(slices, self.exists.replace_tail(start, positions, rows), self.base, self.decimals)
+
+    def _code_ge(self, threshold) -> int | None:
+        """Smallest code whose value is >= threshold (may be out of range); None for NaN."""
+        threshold = float(threshold)
+        if threshold != threshold:
+            return None
+        if threshold in (np.inf, -np.inf):
+            return self.max_code + 1 if threshold > 0 else 0
+        if self.decimals == self.FLOAT_BITS:
+            return int(self._keys(np.array([threshold]), self.FLOAT_BITS)[0]) - self.base
+        scale = 10 ** self.decimals
+        key = math.ceil(threshold * scale)
+        # The product can round either way; settle on the exact boundary
+        while (key - 1) / scale >= threshold:
+            key -= 1
+        while key / scale < threshold:
+            key += 1
+        return key - self.base
+
+    def _code_le(self, threshold) -> int | None:
+        """Largest code whose value is <= threshold (may be out of range); None for NaN."""
+        threshold = float(threshold)
+        if threshold != threshold:
+            return None
+        if self.decimals == self.FLOAT_BITS and threshold not in (np.inf, -np.inf):
+            return int(self._keys(np.array([threshold]), self.FLOAT_BITS)[0]) - self.base
+        code = self._code_ge(threshold)
+        return code if 0 <= code <= self.max_code and self._value(code) == threshold else code - 1
+
+    def _value(self, code: int) -> float:
+        """Value of a fixed-point code."""
+        return (code + self.base) / 10 ** self.decimals
+
+    def _empty(self) -> BitmapIndex:
+        return BitmapIndex(self.rows)
+
+    def _rows_ge(self, code: int) -> BitmapIndex:
+        """Rows whose code is >= code."""
+        if code <= 0:
+            return self.exists
+        if code > self.max_code:
+            return self._empty()
+        greater, equal = self._empty(), self.exists
+        for bit in range(len(self.slices) - 1, -1, -1):
+            if (code >> bit) & 1:
+                equal = equal.and_(self.slices[bit])
+            else:
+                greater = greater.or_(equal.and_(self.slices[bit]))
+                equal = equal.andnot(self.slices[bit])
+        return greater.or_(equal)
+
+    def _rows_le(self, code: int) -> BitmapIndex:
+        """Rows whose code is <= code."""
+        if code < 0:
+            return self._empty()
+        if code >= self.max_code:
+            return self.exists
+        less, equal = self._empty(), self.exists
+        for bit in range(len(self.slices) - 1, -1, -1):
+            if (code >> bit) & 1:
+                less = less.or_(equal.andnot(self.slices[bit]))
+                equal = equal.and_(self.slices[bit])
+            else:
+                equal = equal.andnot(self.slices[bit])
+        return less.or_(equal)
+
+    def _rows_eq(self, code: int) -> BitmapIndex:
+        equal = self.exists
+        for bit in range(len(self.slices) - 1, -1, -1):
+            if (code >> bit) & 1:
+                equal = equal.and_(self.slices[bit])
+            else:
+                equal = equal.andnot(self.slices[bit])
+        return equal
+
+    def gte(self, threshold) -> BitmapIndex:
+        code = self._code_ge(threshold)
+        return self._empty() if code is None else self._rows_ge(code)
+
+    def lte(self, threshold) -> BitmapIndex:
+        code = self._code_le(threshold)
+        return self._empty() if code is None else self._rows_le(code)
+
+    def between(self, low, high) -> BitmapIndex:
+        """Rows with low <= value <= high."""
+        return self.gte(low).and_(self.lte(high))
+
+    def eq(self, value) -> BitmapIndex:
+        code = self._code_ge(value)
+        if code is None or code != self._code_le(value) or not 0 <= code <= self.max_code:
+            return self._empty()
+        return self._rows_eq(code)
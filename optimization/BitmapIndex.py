@@ -1,59 +1,428 @@
 import gzip
 import base64
-from typing import List
+import struct
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+CHUNK_BITS = 16
+CHUNK_ROWS = 1 << CHUNK_BITS
+# Largest array container; past it a bitset (8 KB) is never bigger
+ARRAY_MAX = 4096
+BITSET_WORDS = CHUNK_ROWS // 64
+
+
+class ArrayContainer:
+    """Sorted uint16 row offsets of a sparse chunk (2 bytes per row)."""
+
+    KIND = 1
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+
+    def cardinality(self) -> int:
+        return len(self.values)
+
+    def lows(self) -> np.ndarray:
+        return self.values
+
+    def words(self) -> np.ndarray:
+        mask = np.zeros(CHUNK_ROWS, dtype=bool)
+        mask[self.values] = True
+        return np.packbits(mask, bitorder="little").view("<u8")
+
+    def contains(self, lows: np.ndarray) -> np.ndarray:
+        idx = np.searchsorted(self.values, lows)
+        idx[idx == len(self.values)] = 0
+        return self.values[idx] == lows if len(self.values) else np.zeros(len(lows), dtype=bool)
+
+    def payload(self) -> Tuple[int, bytes]:
+        return len(self.values), self.values.astype("<u2").tobytes()
+
+
+class BitsetContainer:
+    """Dense chunk: 1024 64-bit words, bit i of the chunk = row offset i."""
+
+    KIND = 2
+
+    def __init__(self, words: np.ndarray):
+        self.bits = words
+
+    def cardinality(self) -> int:
+        return int(np.bitwise_count(self.bits).sum())
+
+    def lows(self) -> np.ndarray:
+        bits = np.unpackbits(self.bits.view(np.uint8), bitorder="little")
+        return np.flatnonzero(bits).astype(np.uint16)
+
+    def words(self) -> np.ndarray:
+        return self.bits
+
+    def contains(self, lows: np.ndarray) -> np.ndarray:
+        lows = lows.astype(np.uint64)
+        return ((self.bits[lows >> np.uint64(6)] >> (lows & np.uint64(63))) & np.uint64(1)).astype(bool)
+
+    def payload(self) -> Tuple[int, bytes]:
+        return BITSET_WORDS, self.bits.astype("<u8").tobytes()
+
+
+class RunContainer:
+    """Chunk of long row runs: (start, length - 1) uint16 pairs (4 bytes per run)."""
+
+    KIND = 3
+
+    def __init__(self, starts: np.ndarray, lasts: np.ndarray):
+        self.starts = starts
+        self.lasts = lasts
+
+    def cardinality(self) -> int:
+        return int((self.lasts.astype(np.int64) - self.starts + 1).sum())
+
+    def is_full(self) -> bool:
+        return len(self.starts) == 1 and self.starts[0] == 0 and self.lasts[0] == CHUNK_ROWS - 1
+
+    def lows(self) -> np.ndarray:
+        starts = self.starts.astype(np.int64)
+        lengths = self.lasts.astype(np.int64) - starts + 1
+        # Each output row = its run's start + its offset within the run
+        offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+        return (np.repeat(starts, lengths) + offsets).astype(np.uint16)
+
+    def words(self) -> np.ndarray:
+        mask = np.zeros(CHUNK_ROWS, dtype=bool)
+        if len(self.starts) <= 64:
+            for start, last in zip(self.starts.tolist(), self.lasts.tolist()):
+                mask[start:last + 1] = True
+        else:
+            mask[self.lows()] = True
+        return np.packbits(mask, bitorder="little").view("<u8")
+
+    def contains(self, lows: np.ndarray) -> np.ndarray:
+        run = np.searchsorted(self.starts, lows, side="right") - 1
+        inside = run >= 0
+        inside[inside] = lows[inside] <= self.lasts[run[inside]]
+        return inside
+
+    def payload(self) -> Tuple[int, bytes]:
+        pairs = np.empty((len(self.starts), 2), dtype="<u2")
+        pairs[:, 0] = self.starts
+        pairs[:, 1] = self.lasts - self.starts
+        return len(self.starts), pairs.tobytes()
+
+
+def _container(lows: np.ndarray, words: np.ndarray = None):
+    """Smallest container holding the sorted row offsets lows (None when empty)."""
+    card = len(lows)
+    if not card:
+        return None
+    breaks = np.flatnonzero(np.diff(lows.astype(np.int32)) != 1)
+    runs = len(breaks) + 1
+    sizes = {ArrayContainer: 2 * card if card <= ARRAY_MAX else None, RunContainer: 4 * runs, BitsetContainer: 8 * BITSET_WORDS}
+    best = min((kind for kind, size in sizes.items() if size is not None), key=sizes.get)
+    if best is ArrayContainer:
+        return ArrayContainer(lows.astype(np.uint16))
+    if best is RunContainer:
+        starts = lows[np.concatenate(([0], breaks + 1))]
+        lasts = lows[np.concatenate((breaks, [card - 1]))]
+        return RunContainer(starts.astype(np.uint16), lasts.astype(np.uint16))
+    if words is None:
+        mask = np.zeros(CHUNK_ROWS, dtype=bool)
+        mask[lows] = True
+        words = np.packbits(mask, bitorder="little").view("<u8")
+    return BitsetContainer(words)
+
+
+def _from_words(words: np.ndarray):
+    """Container for the result of a word-wise operation.
+
+    Dense results stay bitsets; as in roaring, runs are only looked for
+    when a bitmap is built from positions.
+    """
+    card = int(np.bitwise_count(words).sum())
+    if not card:
+        return None
+    if card > ARRAY_MAX:
+        return BitsetContainer(words)
+    bits = np.unpackbits(words.view(np.uint8), bitorder="little")
+    return ArrayContainer(np.flatnonzero(bits).astype(np.uint16))
+
+
+def _runs(c) -> Tuple[np.ndarray, np.ndarray]:
+    """(starts, lasts) of a run or array container as int32 arrays."""
+    if isinstance(c, RunContainer):
+        return c.starts.astype(np.int32), c.lasts.astype(np.int32)
+    lows = c.lows().astype(np.int32)
+    return lows, lows
+
+
+def _from_runs(starts: np.ndarray, lasts: np.ndarray):
+    """Smallest container for sorted, non-adjacent runs."""
+    run = RunContainer(starts.astype(np.uint16), lasts.astype(np.uint16))
+    card = run.cardinality()
+    if 4 * len(starts) <= min(8 * BITSET_WORDS, 2 * card if card <= ARRAY_MAX else 8 * BITSET_WORDS):
+        return run
+    return _container(run.lows())
+
+
+def _full(c) -> bool:
+    return isinstance(c, RunContainer) and c.is_full()
+
+
+def _dense(c) -> bool:
+    """Whether word-wise operations beat probing row offsets for c."""
+    return isinstance(c, BitsetContainer) or c.cardinality() > ARRAY_MAX
+
+
+def _and(a, b):
+    if _full(a):
+        return b
+    if _full(b):
+        return a
+    if _dense(a) and _dense(b):
+        return _from_words(a.words() & b.words())
+    # Probe the sparse side's rows in the other container
+    if _dense(a):
+        a, b = b, a
+    lows = a.lows()
+    return _container(lows[b.contains(lows)])
+
+
+def _or(a, b):
+    if _full(a) or _full(b):
+        return a if _full(a) else b
+    if isinstance(a, BitsetContainer) or isinstance(b, BitsetContainer):
+        return _from_words(a.words() | b.words())
+    # Merge the two sets of runs (an array is runs of one row)
+    starts_a, lasts_a = _runs(a)
+    starts_b, lasts_b = _runs(b)
+    starts = np.concatenate((starts_a, starts_b))
+    order = np.argsort(starts, kind="stable")
+    starts = starts[order]
+    lasts = np.maximum.accumulate(np.concatenate((lasts_a, lasts_b))[order])
+    first = np.flatnonzero(np.concatenate(([True], starts[1:] > lasts[:-1] + 1)))
+    last = np.concatenate((first[1:] - 1, [len(starts) - 1]))
+    return _from_runs(starts[first], lasts[last])
+
+
+def _andnot(a, b):
+    if _full(b):
+        return None
+    if _dense(a):
+        return _from_words(a.words() & ~b.words())
+    lows = a.lows()
+    return _container(lows[~b.contains(lows)])
 
 
 class BitmapIndex:
-    """Lightweight bitmap index using Python int for bit operations.
+    """Compressed bitmap of row positions, split into 64K-row chunks (roaring layout).
 
-    Bits are stored so that bit i (LSB=0) corresponds to row index i.
+    Each non-empty chunk is one container, whichever is smallest for it:
+    an array of row offsets (sparse), a 64K-bit bitset (dense) or a list of
+    runs (long stretches of consecutive rows). AND / OR / ANDNOT work chunk
+    by chunk without expanding to rows, and count() sums container
+    cardinalities.
     """
 
-    def __init__(self, bits: int, length: int):
-        self.bits = int(bits)
+    # Serialized form: header, one descriptor per container, then payloads
+    HEADER = struct.Struct("<QI")
+    DESCRIPTOR = struct.Struct("<HBxI")
+
+    def __init__(self, length: int, containers: Dict[int, object] = None):
         self.length = int(length)
+        # chunk number -> container, in chunk order
+        self.containers = dict(sorted(containers.items())) if containers else {}
+
+    @staticmethod
+    def _chunks(positions: np.ndarray) -> Dict[int, object]:
+        """Containers of sorted, distinct row positions."""
+        containers = {}
+        if not len(positions):
+            return containers
+        keys = positions >> CHUNK_BITS
+        bounds = np.flatnonzero(np.diff(keys)) + 1
+        for part in np.split(positions, bounds):
+            key = int(part[0]) >> CHUNK_BITS
+            containers[key] = _container((part - (key << CHUNK_BITS)).astype(np.uint16))
+        return containers
+
+    @staticmethod
+    def from_positions(positions, length: int) -> "BitmapIndex":
+        return BitmapIndex(length, BitmapIndex._chunks(np.asarray(positions, dtype=np.int64)))
 
     @staticmethod
     def from_values(values: List, target) -> "BitmapIndex":
-        bits = 0
-        for i, v in enumerate(values):
-            if v == target:
-                bits |= (1 << i)
-        return BitmapIndex(bits, len(values))
+        return BitmapIndex.from_mask(np.asarray(values, dtype=object) == target)
+
+    @staticmethod
+    def from_mask(mask: np.ndarray) -> "BitmapIndex":
+        """Bitmap of the True positions of a boolean array."""
+        return BitmapIndex.from_positions(np.flatnonzero(mask), len(mask))
+
+    @staticmethod
+    def from_bits(bits: int, length: int) -> "BitmapIndex":
+        """Bitmap from a Python int whose bit i is row i (the pre-chunked layout)."""
+        packed = np.frombuffer(int(bits).to_bytes((length + 7) // 8, "little"), dtype=np.uint8)
+        return BitmapIndex.from_mask(np.unpackbits(packed, count=length, bitorder="little").view(bool))
+
+    @staticmethod
+    def from_range(start: int, stop: int, length: int) -> "BitmapIndex":
+        """Bitmap with rows [start, stop) set (run containers)."""
+        start, stop = max(0, start), min(stop, length)
+        containers = {}
+        for key in range(start >> CHUNK_BITS, ((stop - 1) >> CHUNK_BITS) + 1 if stop > start else 0):
+            base = key << CHUNK_BITS
+            lo, hi = max(start, base) - base, min(stop, base + CHUNK_ROWS) - base
+            containers[key] = RunContainer(np.array([lo], dtype=np.uint16), np.array([hi - 1], dtype=np.uint16))
+        return BitmapIndex(length, containers)
+
+    @staticmethod
+    def group_positions(values) -> Iterator[Tuple[object, np.ndarray]]:
+        """(value, sorted row positions) per distinct non-null value, in order of first appearance.
+
+        One factorize and one stable sort of the codes, however many values.
+        """
+        codes, uniques = pd.factorize(pd.Series(values))
+        order = np.argsort(codes, kind="stable")
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        # Nulls (code -1) sort first and are skipped
+        start = len(codes) - int(counts.sum())
+        for k, value in enumerate(uniques):
+            stop = start + int(counts[k])
+            yield (value.item() if hasattr(value, "item") else value), order[start:stop]
+            start = stop
+
+    @staticmethod
+    def build_all(values) -> Dict[object, "BitmapIndex"]:
+        """One bitmap per distinct non-null value, from a single pass over values."""
+        return {
+            value: BitmapIndex.from_positions(positions, len(values))
+            for value, positions in BitmapIndex.group_positions(values)
+        }
+
+    def replace_tail(self, start: int, positions, length: int) -> "BitmapIndex":
+        """This bitmap with rows from start on replaced by positions (sorted, >= start), now length rows.
+
+        Chunks before start's chunk are shared, not decoded.
+        """
+        key = start >> CHUNK_BITS
+        containers = {k: c for k, c in self.containers.items() if k < key}
+        parts = [np.asarray(positions, dtype=np.int64)]
+        if key in self.containers:
+            head = self.containers[key].lows().astype(np.int64) + (key << CHUNK_BITS)
+            parts.insert(0, head[head < start])
+        containers.update(BitmapIndex._chunks(np.concatenate(parts)))
+        return BitmapIndex(length, containers)
+
+    def count(self) -> int:
+        """Number of set rows, summed over containers."""
+        return sum(c.cardinality() for c in self.containers.values())
+
+    def positions(self) -> np.ndarray:
+        """Set rows as a sorted int64 array."""
+        parts = [c.lows().astype(np.int64) + (key << CHUNK_BITS) for key, c in self.containers.items()]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=np.int64)
 
     def get_positions(self) -> List[int]:
-        # Efficiently iterate over set bits only (skip zeros)
-        positions: List[int] = []
-        bits = self.bits
-        while bits:
-            lsb = bits & -bits
-            idx = lsb.bit_length() - 1
-            positions.append(idx)
-            bits &= bits - 1
-        return positions
+        return self.positions().tolist()
 
-    def and_(self, other: "BitmapIndex") -> "BitmapIndex":
+    def to_mask(self) -> np.ndarray:
+        """Boolean array of length rows, True where the row is set."""
+        mask = np.zeros(self.length, dtype=bool)
+        for key, c in self.containers.items():
+            base = key << CHUNK_BITS
+            if isinstance(c, BitsetContainer):
+                chunk = np.unpackbits(c.bits.view(np.uint8), bitorder="little").view(bool)
+                mask[base:base + CHUNK_ROWS] = chunk[:len(mask[base:base + CHUNK_ROWS])]
+            else:
+                mask[c.lows().astype(np.int64) + base] = True
+        return mask
+
+    def contains(self, positions: np.ndarray) -> np.ndarray:
+        """Boolean array: whether each of the sorted positions is set."""
+        positions = np.asarray(positions, dtype=np.int64)
+        found = np.zeros(len(positions), dtype=bool)
+        for key, c in self.containers.items():
+            base = key << CHUNK_BITS
+            lo, hi = np.searchsorted(positions, [base, base + CHUNK_ROWS])
+            if lo < hi:
+                found[lo:hi] = c.contains((positions[lo:hi] - base).astype(np.uint16))
+        return found
+
+    def _combine(self, other: "BitmapIndex", op, keep_left: bool, keep_right: bool) -> "BitmapIndex":
         if self.length != other.length:
             raise ValueError("Bitmap lengths differ")
-        return BitmapIndex(self.bits & other.bits, self.length)
+        containers = {}
+        for key in self.containers.keys() | other.containers.keys():
+            a, b = self.containers.get(key), other.containers.get(key)
+            if a is not None and b is not None:
+                c = op(a, b)
+            else:
+                c = a if (a is not None and keep_left) else (b if (b is not None and keep_right) else None)
+            if c is not None:
+                containers[key] = c
+        return BitmapIndex(self.length, containers)
+
+    def and_(self, other: "BitmapIndex") -> "BitmapIndex":
+        return self._combine(other, _and, False, False)
 
     def or_(self, other: "BitmapIndex") -> "BitmapIndex":
-        if self.length != other.length:
-            raise ValueError("Bitmap lengths differ")
-        return BitmapIndex(self.bits | other.bits, self.length)
+        return self._combine(other, _or, True, True)
+
+    def andnot(self, other: "BitmapIndex") -> "BitmapIndex":
+        """Rows set here and not in other."""
+        return self._combine(other, _andnot, True, False)
 
     def not_(self) -> "BitmapIndex":
-        mask = (1 << self.length) - 1
-        return BitmapIndex((~self.bits) & mask, self.length)
+        return BitmapIndex.from_range(0, self.length, self.length).andnot(self)
+
+    def to_bytes(self) -> bytes:
+        """Compact serialization: header, container descriptors, payloads (little-endian)."""
+        descriptors, payloads = [], []
+        for key, c in self.containers.items():
+            n, payload = c.payload()
+            descriptors.append(self.DESCRIPTOR.pack(key, c.KIND, n))
+            payloads.append(payload)
+        return self.HEADER.pack(self.length, len(self.containers)) + b"".join(descriptors) + b"".join(payloads)
+
+    @staticmethod
+    def from_bytes(data) -> "BitmapIndex":
+        """Bitmap from to_bytes(); containers are views over data (no copy)."""
+        length, count = BitmapIndex.HEADER.unpack_from(data, 0)
+        pos = BitmapIndex.HEADER.size
+        offset = pos + count * BitmapIndex.DESCRIPTOR.size
+        containers = {}
+        for _ in range(count):
+            key, kind, n = BitmapIndex.DESCRIPTOR.unpack_from(data, pos)
+            pos += BitmapIndex.DESCRIPTOR.size
+            if kind == ArrayContainer.KIND:
+                containers[key] = ArrayContainer(np.frombuffer(data, dtype="<u2", count=n, offset=offset))
+                offset += 2 * n
+            elif kind == BitsetContainer.KIND:
+                containers[key] = BitsetContainer(np.frombuffer(data, dtype="<u8", count=n, offset=offset))
+                offset += 8 * n
+            elif kind == RunContainer.KIND:
+                pairs = np.frombuffer(data, dtype="<u2", count=2 * n, offset=offset).reshape(n, 2)
+                containers[key] = RunContainer(pairs[:, 0], (pairs[:, 0] + pairs[:, 1]).astype(np.uint16))
+                offset += 4 * n
+            else:
+                raise ValueError(f"Unknown bitmap container type {kind}")
+        return BitmapIndex(length, containers)
+
+    def to_bits(self) -> int:
+        """The bitmap as a Python int whose bit i is row i (the pre-chunked layout)."""
+        return int.from_bytes(np.packbits(self.to_mask(), bitorder="little").tobytes(), "little")
 
     def to_base64(self) -> str:
-        # Serialize as 8-byte length prefix + big-endian bits bytes, then gzip+base64
+        # Legacy inline format: 8-byte length prefix + big-endian bits bytes, then gzip+base64
+        bits = self.to_bits()
         length_bytes = int(self.length).to_bytes(8, "big")
-        if self.bits == 0:
+        if bits == 0:
             bits_bytes = b"\x00"
         else:
-            byte_len = (self.bits.bit_length() + 7) // 8
-            bits_bytes = self.bits.to_bytes(byte_len, "big")
+            byte_len = (bits.bit_length() + 7) // 8
+            bits_bytes = bits.to_bytes(byte_len, "big")
 
         payload = length_bytes + bits_bytes
         compressed = gzip.compress(payload)
@@ -71,4 +440,55 @@ class BitmapIndex:
             bits = 0
         else:
             bits = int.from_bytes(bits_bytes, "big")
-        return BitmapIndex(bits, length)
+        return BitmapIndex.from_bits(bits, length)
+
+
+class BitmapBuilder:
+    """Build one BitmapIndex per distinct value from values appended in batches.
+
+    Each batch is grouped by value in one pass; positions are kept per value
+    only until their 64K-row chunk is complete, then sealed into a
+    container, so memory holds one open chunk per value. Gives up
+    (finish() returns None) once more than max_values distinct values are
+    seen.
+    """
+
+    def __init__(self, max_values: int):
+        self.max_values = max_values
+        self.length = 0
+        self._containers: Dict[object, Dict[int, object]] = {}
+        self._pending: Dict[object, np.ndarray] = {}
+        self._overflow = False
+
+    def append(self, values) -> None:
+        if self._overflow:
+            return
+        for key, positions in BitmapIndex.group_positions(np.asarray(values)):
+            if key not in self._pending:
+                if len(self._pending) >= self.max_values:
+                    self._overflow = True
+                    self._containers.clear()
+                    self._pending.clear()
+                    return
+                self._containers[key] = {}
+                self._pending[key] = np.empty(0, dtype=np.int64)
+            self._pending[key] = np.concatenate([self._pending[key], positions + self.length])
+        self.length += len(values)
+
+        # Rows before the current chunk will not change any more
+        sealed = (self.length >> CHUNK_BITS) << CHUNK_BITS
+        for key, pending in self._pending.items():
+            cut = int(np.searchsorted(pending, sealed))
+            if cut:
+                self._containers[key].update(BitmapIndex._chunks(pending[:cut]))
+                self._pending[key] = pending[cut:]
+
+    def finish(self) -> Dict[object, BitmapIndex] | None:
+        """Bitmaps of every value seen, or None if there were too many values."""
+        if self._overflow:
+            return None
+        bitmaps = {}
+        for key, containers in self._containers.items():
+            containers.update(BitmapIndex._chunks(self._pending[key]))
+            bitmaps[key] = BitmapIndex(self.length, containers)
+        return bitmaps
@@ -0,0 +1,240 @@
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+
+class ColumnStats:
+    """Distribution summary of one column, for selectivity estimates and reports.
+
+    Holds the row, null and distinct counts, min/max, the most common
+    values with their counts, and an equi-depth histogram of the remaining
+    values: bucket i spans histogram[i]..histogram[i + 1] and holds about
+    histogram_rows / buckets rows.
+    """
+
+    # Most common values kept per column; a column with no more distinct
+    # values than this is described exactly
+    MCV_COUNT = 32
+    HISTOGRAM_BUCKETS = 32
+
+    def __init__(self, rows: int, nulls: int, distinct: int, min_value=None, max_value=None,
+                 mcv: List[list] = None, histogram: list = None, histogram_rows: int = 0):
+        self.rows = rows
+        self.nulls = nulls
+        self.distinct = distinct
+        self.min = min_value
+        self.max = max_value
+        self.mcv = mcv or []
+        self.histogram = histogram or []
+        self.histogram_rows = histogram_rows
+        self._mcv_counts = {value: count for value, count in self.mcv}
+
+    @staticmethod
+    def _python(value):
+        return value.item() if isinstance(value, np.generic) else value
+
+    @staticmethod
+    def _tally(values, dictionary: list = None):
+        """(rows, sorted distinct present values, their counts) of a column's values."""
+        values = np.asarray(values)
+        rows = len(values)
+        if dictionary is not None:
+            codes = values.astype(np.int64)
+            counts = np.bincount(codes[codes >= 0], minlength=len(dictionary))
+            keep = [code for code in np.flatnonzero(counts).tolist() if dictionary[code] is not None]
+            distinct = np.array([dictionary[code] for code in keep], dtype=object)
+            counts = counts[keep]
+            try:
+                order = sorted(range(len(distinct)), key=lambda i: distinct[i])
+                distinct, counts = distinct[order], counts[order]
+            except TypeError:
+                pass
+        else:
+            if values.dtype.kind == "f":
+                present = values[~np.isnan(values)]
+            elif values.dtype == object:
+                present = values[np.not_equal(values, None)]
+            else:
+                present = values
+            if present.dtype == object:
+                # Hash the values, then sort only the distinct ones
+                tally = pd.Series(present).value_counts(sort=False)
+                try:
+                    tally = tally.sort_index()
+                except TypeError:
+                    # Mixed types do not sort; compare them as text
+                    tally = tally.groupby(tally.index.astype(str)).sum().sort_index()
+                distinct, counts = tally.index.to_numpy(dtype=object), tally.to_numpy()
+            else:
+                distinct, counts = np.unique(present, return_counts=True)
+        return rows, distinct, counts
+
+    @staticmethod
+    def _sorted(values: list, counts: list):
+        """values and counts as arrays ordered by value (as text when the types do not compare)."""
+        values = np.array(values + [None], dtype=object)[:-1]
+        try:
+            order = sorted(range(len(values)), key=lambda i: values[i])
+        except TypeError:
+            order = sorted(range(len(values)), key=lambda i: str(values[i]))
+        return values[order], np.asarray(counts, dtype=float)[order]
+
+    @staticmethod
+    def _histogram(values: np.ndarray, counts: np.ndarray):
+        """Equi-depth bucket bounds over sorted values with their counts, and the rows they hold."""
+        cumulative = np.cumsum(counts)
+        rows = cumulative[-1]
+        # Bucket bounds at evenly spaced ranks of the rows
+        ranks = np.linspace(0, rows - 1, ColumnStats.HISTOGRAM_BUCKETS + 1)
+        bounds = values[np.minimum(np.searchsorted(cumulative, ranks, side="right"), len(values) - 1)]
+        return [ColumnStats._python(v) for v in bounds], int(round(rows))
+
+    @staticmethod
+    def build(values, dictionary: list = None) -> "ColumnStats":
+        """Statistics of a column's values; with a dictionary, values are its codes."""
+        return ColumnStats._from_tally(*ColumnStats._tally(values, dictionary))
+
+    @staticmethod
+    def _from_tally(rows: int, distinct: np.ndarray, counts: np.ndarray) -> "ColumnStats":
+        """Statistics of rows values whose present ones are distinct (sorted) with counts."""
+        present_rows = int(counts.sum())
+        stats = ColumnStats(rows, rows - present_rows, len(distinct))
+        if not len(distinct):
+            return stats
+        stats.min = ColumnStats._python(distinct[0])
+        stats.max = ColumnStats._python(distinct[-1])
+
+        # Most common values: all of them for low-cardinality columns,
+        # otherwise those clearly more frequent than average
+        if len(distinct) <= ColumnStats.MCV_COUNT:
+            common = np.arange(len(distinct))
+        else:
+            top = np.argsort(-counts, kind="stable")[:ColumnStats.MCV_COUNT]
+            common = top[counts[top] > present_rows / len(distinct) * 1.25]
+        stats.mcv = [[ColumnStats._python(distinct[i]), int(counts[i])] for i in common]
+        stats._mcv_counts = {value: count for value, count in stats.mcv}
+
+        rest = np.ones(len(distinct), dtype=bool)
+        rest[common] = False
+        if rest.any():
+            stats.histogram, stats.histogram_rows = ColumnStats._histogram(distinct[rest], counts[rest])
+        return stats
+
+    def append(self, values, dictionary: list = None) -> "ColumnStats":
+        """Statistics of the column after values are added to it, without rescanning it.
+
+        When the stored rows are described exactly (every value is in the
+        MCV list) the result is what build() gives for the whole column.
+        Otherwise row, null and MCV counts and min/max stay exact; the
+        histogram is re-cut from its old bounds, each standing for an equal
+        share of its rows, and the new values; and a new value counts as
+        distinct only if it is outside the old min/max.
+        """
+        rows, new_values, new_counts = ColumnStats._tally(values, dictionary)
+        new_values = [ColumnStats._python(v) for v in new_values]
+        new_counts = new_counts.tolist()
+        if not self.histogram_rows:
+            counts = dict(self._mcv_counts)
+            for value, count in zip(new_values, new_counts):
+                counts[value] = counts.get(value, 0) + count
+            distinct, counts = ColumnStats._sorted(list(counts), list(counts.values()))
+            return ColumnStats._from_tally(self.rows + rows, distinct, counts.astype(np.int64))
+
+        counts = dict(self._mcv_counts)
+        fresh = 0
+        for value, count in zip(new_values, new_counts):
+            if value not in counts and not self._within(value):
+                fresh += 1
+            counts[value] = counts.get(value, 0) + count
+        present_rows = self.rows - self.nulls + sum(new_counts)
+        stats = ColumnStats(self.rows + rows, self.nulls + rows - sum(new_counts), self.distinct + fresh)
+        ends = [v for v in (self.min, self.max) if v is not None] + new_values[:1] + new_values[-1:]
+        ordered, _ = ColumnStats._sorted(ends, [0] * len(ends))
+        stats.min, stats.max = ColumnStats._python(ordered[0]), ColumnStats._python(ordered[-1])
+
+        top = sorted(counts, key=lambda v: -counts[v])[:ColumnStats.MCV_COUNT]
+        common = [v for v in top if counts[v] > present_rows / stats.distinct * 1.25]
+        stats.mcv = [[value, int(counts[value])] for value in common]
+        stats._mcv_counts = {value: count for value, count in stats.mcv}
+
+        rest = [v for v in counts if v not in stats._mcv_counts]
+        share = self.histogram_rows / len(self.histogram)
+        points, weights = ColumnStats._sorted(
+            rest + list(self.histogram), [counts[v] for v in rest] + [share] * len(self.histogram)
+        )
+        stats.histogram, stats.histogram_rows = ColumnStats._histogram(points, weights)
+        return stats
+
+    def _within(self, value) -> bool:
+        """Whether value lies within the stored min/max."""
+        try:
+            return self.min is not None and self.min <= value <= self.max
+        except TypeError:
+            return False
+
+    def to_dict(self) -> Dict:
+        return {
+            "rows": self.rows, "nulls": self.nulls, "distinct": self.distinct,
+            "min": self.min, "max": self.max, "mcv": self.mcv,
+            "histogram": self.histogram, "histogram_rows": self.histogram_rows,
+        }
+
+    @staticmethod
+    def from_dict(d: Dict) -> "ColumnStats":
+        return ColumnStats(
+            d["rows"], d["nulls"], d["distinct"], d.get("min"), d.get("max"),
+            [list(entry) for entry in d.get("mcv", [])], d.get("histogram", []), d.get("histogram_rows", 0),
+        )
+
+    # -- estimates (fractions of all rows) ----------------------------------
+
+    def _histogram_fraction(self, low, high) -> float:
+        """Fraction of the histogram's rows within [low, high] (None is open)."""
+        bounds = self.histogram
+        if len(bounds) < 2:
+            return 0.0
+        buckets = len(bounds) - 1
+        covered = 0.0
+        for i in range(buckets):
+            lo, hi = bounds[i], bounds[i + 1]
+            if (high is not None and lo > high) or (low is not None and hi < low):
+                continue
+            start = lo if low is None or low < lo else low
+            stop = hi if high is None or high > hi else high
+            if hi == lo:
+                covered += 1.0
+            elif isinstance(lo, (int, float)) and isinstance(hi, (int, float)):
+                covered += max(0.0, min(1.0, (stop - start) / (hi - lo)))
+            else:
+                # Text bounds do not interpolate; count half a partial bucket
+                covered += 1.0 if (start == lo and stop == hi) else 0.5
+        return covered / buckets
+
+    def eq(self, value) -> float:
+        if not self.rows:
+            return 0.0
+        if value in self._mcv_counts:
+            return self._mcv_counts[value] / self.rows
+        others = self.distinct - len(self.mcv)
+        if others <= 0 or not self.histogram:
+            return 0.0
+        try:
+            if value < self.histogram[0] or value > self.histogram[-1]:
+                return 0.0
+        except TypeError:
+            return 0.0
+        return self.histogram_rows / others / self.rows
+
+    def isin(self, values) -> float:
+        return min(1.0, sum(self.eq(v) for v in set(values)))
+
+    def range(self, low=None, high=None) -> float:
+        """Fraction of rows with low <= value <= high."""
+        if not self.rows:
+            return 0.0
+        common = sum(
+            count for value, count in self.mcv
+            if (low is None or value >= low) and (high is None or value <= high)
+        )
+        return min(1.0, (common + self._histogram_fraction(low, high) * self.histogram_rows) / self.rows)
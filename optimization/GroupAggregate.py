@@ -0,0 +1,193 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class GroupAggregate:
+    """Grouped aggregation over encoded key columns.
+
+    Each key column becomes dense codes in [0, cardinality): dictionary
+    codes as stored, small integer ranges by offset from their minimum,
+    anything else by hashing (pd.factorize). Nulls share one extra code.
+    The codes combine into one group id per row (mixed radix, first key
+    most significant). When the key space is small, the group id indexes
+    the aggregate arrays directly; otherwise the ids are hashed to dense
+    group numbers first. Every aggregate is then one vectorized reduction
+    over the same group numbers (bincount / ufunc.at), so all of them are
+    computed in a single pass over the rows.
+    """
+
+    FUNCS = ("count", "min", "max", "sum", "avg")
+    # Largest key space aggregated by direct indexing (one slot per key combination)
+    DIRECT_MAX_GROUPS = 1 << 20
+
+    def __init__(self, keys: List[np.ndarray], domains: List[int | None] = None):
+        """keys are the key columns' values; domains the dictionary size of each coded key (None otherwise)."""
+        if not keys:
+            raise ValueError("GroupAggregate needs at least one key column")
+        self.rows = len(keys[0])
+        domains = domains or [None] * len(keys)
+        encoded = [self._encode(np.asarray(values), domain) for values, domain in zip(keys, domains)]
+        codes = [c for c, _ in encoded]
+        self.labels = [labels for _, labels in encoded]
+        self.cardinalities = [len(labels) for labels in self.labels]
+
+        key_space = 1
+        for cardinality in self.cardinalities:
+            key_space *= cardinality
+        self.direct = key_space <= min(self.DIRECT_MAX_GROUPS, max(4 * self.rows, 4096))
+        if self.direct:
+            self.ids = self._combine(codes, self.cardinalities)
+            self.size = key_space
+        else:
+            self.ids, self.size = self._hash(codes, self.cardinalities)
+            self._codes = codes
+        self.counts = np.bincount(self.ids, minlength=self.size)
+
+    # -- keys ----------------------------------------------------------------
+
+    @classmethod
+    def _encode(cls, values: np.ndarray, domain: int | None) -> Tuple[np.ndarray, np.ndarray]:
+        """(dense codes, label of each code); a null label is last, when there are nulls."""
+        if domain is not None:
+            codes = values.astype(np.int64)
+            labels = np.arange(domain, dtype=np.int64)
+            null = codes < 0
+            if null.any():
+                codes = np.where(null, domain, codes)
+                labels = np.append(labels, -1)
+            return codes, labels
+        if values.dtype.kind in "iu" and len(values):
+            low, high = int(values.min()), int(values.max())
+            if high - low < cls.DIRECT_MAX_GROUPS:
+                return values.astype(np.int64) - low, np.arange(low, high + 1, dtype=np.int64)
+        try:
+            codes, uniques = pd.factorize(values, sort=True)
+        except TypeError:
+            # Mixed types do not sort; groups keep their first-seen order
+            codes, uniques = pd.factorize(values)
+        labels = np.asarray(uniques)
+        codes = codes.astype(np.int64)
+        null = codes < 0
+        if null.any():
+            codes[null] = len(labels)
+            if labels.dtype.kind == "f":
+                labels = np.append(labels, np.nan)
+            else:
+                labels = np.append(labels.astype(object), None)
+        return codes, labels
+
+    @staticmethod
+    def _combine(codes: List[np.ndarray], cardinalities: List[int]) -> np.ndarray:
+        ids = np.zeros(len(codes[0]), dtype=np.int64)
+        for c, cardinality in zip(codes, cardinalities):
+            ids = ids * cardinality + c
+        return ids
+
+    @staticmethod
+    def _hash(codes: List[np.ndarray], cardinalities: List[int]) -> Tuple[np.ndarray, int]:
+        """Dense group numbers by hashing the combined ids (re-densified when they would overflow)."""
+        ids = np.zeros(len(codes[0]), dtype=np.int64)
+        size = 1
+        for c, cardinality in zip(codes, cardinalities):
+            if size * cardinality >= 1 << 62:
+                ids, uniques = pd.factorize(ids)
+                size = len(uniques)
+            ids = ids * cardinality + c
+            size *= cardinality
+        ids, uniques = pd.factorize(ids)
+        return ids.astype(np.int64), len(uniques)
+
+    def describe(self) -> str:
+        if self.direct:
+            return f"direct index over {self.size:,} key slots"
+        return f"hash table of {self.size:,} groups"
+
+    def groups(self) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """(group numbers in key order, the code of each key column for each group)."""
+        if self.direct:
+            groups = np.flatnonzero(self.counts)
+            return groups, list(np.unravel_index(groups, self.cardinalities))
+        # The first row of each group carries its key codes
+        first = np.full(self.size, self.rows, dtype=np.int64)
+        np.minimum.at(first, self.ids, np.arange(self.rows, dtype=np.int64))
+        codes = [c[first] for c in self._codes]
+        order = np.lexsort(codes[::-1])
+        return order, [c[order] for c in codes]
+
+    def keys(self) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """(group numbers in key order, the key values of each group per key column)."""
+        groups, codes = self.groups()
+        return groups, [labels[c] for labels, c in zip(self.labels, codes)]
+
+    # -- aggregates ----------------------------------------------------------
+
+    @staticmethod
+    def _present(values: np.ndarray) -> np.ndarray:
+        if values.dtype.kind == "f":
+            return ~np.isnan(values)
+        if values.dtype == object:
+            return np.not_equal(values, None) & np.equal(values, values)
+        return np.ones(len(values), dtype=bool)
+
+    def aggregate(self, func: str, values: np.ndarray = None, groups: np.ndarray = None) -> np.ndarray:
+        """func of the non-null values per group (values None: rows per group), for groups (default every slot).
+
+        A group without values gets None.
+        """
+        if func not in self.FUNCS:
+            raise ValueError(f"Invalid aggregation function '{func}'")
+        if groups is None:
+            groups = np.arange(self.size)
+        if values is None:
+            return self.counts[groups]
+        values = np.asarray(values)
+        present = self._present(values)
+        ids, values = self.ids[present], values[present]
+        counts = np.bincount(ids, minlength=self.size)[groups]
+        if func == "count":
+            return counts
+
+        if values.dtype == object:
+            result = self._aggregate_objects(func, ids, values)
+        elif func in ("sum", "avg"):
+            if values.dtype.kind == "f":
+                result = np.bincount(ids, weights=values, minlength=self.size)
+            else:
+                # Integer sums stay exact
+                result = np.zeros(self.size, dtype=np.int64)
+                np.add.at(result, ids, values)
+        else:
+            if values.dtype.kind == "f":
+                start = np.inf if func == "min" else -np.inf
+            else:
+                info = np.iinfo(values.dtype)
+                start = info.max if func == "min" else info.min
+            result = np.full(self.size, start, dtype=values.dtype)
+            (np.minimum if func == "min" else np.maximum).at(result, ids, values)
+
+        result = result[groups]
+        if func == "avg" and values.dtype != object:
+            result = result / np.maximum(counts, 1)
+        empty = counts == 0
+        if empty.any():
+            result = result.astype(object)
+            result[empty] = None
+        return result
+
+    def _aggregate_objects(self, func: str, ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Aggregates of Python values (e.g. strings), one group at a time after a sort."""
+        result = np.empty(self.size, dtype=object)
+        order = np.argsort(ids, kind="stable")
+        ids, values = ids[order], values[order]
+        bounds = np.flatnonzero(np.diff(ids)) + 1
+        for group, chunk in zip(ids[np.r_[0, bounds]] if len(ids) else [], np.split(values, bounds)):
+            if func == "min":
+                result[group] = min(chunk)
+            elif func == "max":
+                result[group] = max(chunk)
+            else:
+                total = sum(chunk)
+                result[group] = total if func == "sum" else total / len(chunk)
+        return result
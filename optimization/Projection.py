@@ -0,0 +1,133 @@
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from optimization.Selection import ProjectedSelection
+
+
+class Projection:
+    """A copy of some columns of a table stored in another sort order.
+
+    The rows are sorted by sort_key (e.g. town, then month_num) and carry
+    row_id, their position in the table. Predicates on a leading run of the
+    sort key select contiguous row ranges of the projection, found by binary
+    search, which map back to table rows through row_id.
+
+    Columns are read through loader(name) on first use.
+    """
+
+    ROW_ID = "row_id"
+
+    def __init__(self, name: str, sort_key: List[str], rows: int, loader: Callable):
+        self.name = name
+        self.sort_key = list(sort_key)
+        self.rows = int(rows)
+        self._loader = loader
+        self._columns: Dict[str, np.ndarray] = {}
+
+    def column(self, name: str) -> np.ndarray:
+        if name not in self._columns:
+            values = np.asarray(self._loader(name))
+            if len(values) != self.rows:
+                raise ValueError(f"Projection '{self.name}' has {len(values)} rows of '{name}', expected {self.rows}")
+            self._columns[name] = values
+        return self._columns[name]
+
+    def row_ids(self) -> np.ndarray:
+        return self.column(self.ROW_ID)
+
+    @staticmethod
+    def order(keys: List[np.ndarray]) -> np.ndarray:
+        """Row order of a projection sorted by keys (first key most significant); ties keep row order."""
+        return np.lexsort(keys[::-1])
+
+    @staticmethod
+    def insertion_points(sorted_keys: List[np.ndarray], keys: List[np.ndarray]) -> np.ndarray:
+        """Where each row of keys (sorted) goes in sorted_keys to keep them sorted, after equal rows.
+
+        Each distinct key tuple is located by narrowing binary searches,
+        one key at a time.
+        """
+        count = len(keys[0]) if keys else 0
+        points = np.empty(count, dtype=np.int64)
+        if not count:
+            return points
+        changes = np.zeros(count, dtype=bool)
+        changes[0] = True
+        for key in keys:
+            # NaN != NaN, but NaNs sort together
+            changes[1:] |= (key[1:] != key[:-1]) & ~((key[1:] != key[1:]) & (key[:-1] != key[:-1]))
+        starts = np.flatnonzero(changes)
+        stops = np.append(starts[1:], count)
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            lo, hi = 0, len(sorted_keys[0])
+            for level, (column, key) in enumerate(zip(sorted_keys, keys)):
+                window = column[lo:hi]
+                value = key[start]
+                if level == len(keys) - 1:
+                    lo = hi = lo + int(np.searchsorted(window, value, side="right"))
+                else:
+                    lo, hi = lo + int(np.searchsorted(window, value, side="left")), lo + int(np.searchsorted(window, value, side="right"))
+            points[start:stop] = lo
+        return points
+
+    def all(self) -> ProjectedSelection:
+        return ProjectedSelection(self, [0], [self.rows], 0)
+
+    def can_refine(self, selection: ProjectedSelection, column: str) -> bool:
+        """True when a predicate on column keeps selection a set of ranges."""
+        if column not in self.sort_key or self.sort_key.index(column) > selection.depth:
+            return False
+        # Only numeric keys (and dictionary codes) are stored sorted
+        return self.column(column).dtype.kind in "iuf"
+
+    def refine(self, selection: ProjectedSelection, column: str, low=None, high=None, values=None) -> ProjectedSelection:
+        """Ranges of selection whose column value is in values, or within [low, high] (None is open).
+
+        A key that is constant within the ranges keeps or drops whole
+        ranges. The next key is sorted within each range: values split a
+        range into one range per value, and a further key becomes usable;
+        bounds narrow it.
+        """
+        keys = self.column(column)
+        level = self.sort_key.index(column)
+        starts, stops = selection.starts, selection.stops
+        if values is not None:
+            # NaN / None never match
+            values = np.sort(np.asarray([v for v in values if v is not None and v == v]))
+
+        if level < selection.depth:
+            heads = keys[starts]
+            if values is not None:
+                keep = np.isin(heads, values)
+            else:
+                keep = np.ones(len(heads), dtype=bool)
+                if low is not None:
+                    keep &= heads >= low
+                if high is not None:
+                    keep &= heads <= high
+            return ProjectedSelection(self, starts[keep], stops[keep], selection.depth)
+
+        new_starts, new_stops = [], []
+        for start, stop in zip(starts.tolist(), stops.tolist()):
+            window = keys[start:stop]
+            if values is not None:
+                new_starts.append(start + np.searchsorted(window, values, side="left"))
+                new_stops.append(start + np.searchsorted(window, values, side="right"))
+                continue
+            lo = 0 if low is None else np.searchsorted(window, low, side="left")
+            if high is not None:
+                hi = np.searchsorted(window, high, side="right")
+            elif keys.dtype.kind == "f":
+                # NaN sorts last and matches no bound
+                hi = np.searchsorted(window, np.inf, side="right")
+            else:
+                hi = len(window)
+            new_starts.append(np.asarray([start + lo]))
+            new_stops.append(np.asarray([start + hi]))
+
+        new_starts = np.concatenate(new_starts) if new_starts else np.empty(0, dtype=np.int64)
+        new_stops = np.concatenate(new_stops) if new_stops else np.empty(0, dtype=np.int64)
+        keep = new_stops > new_starts
+        depth = selection.depth + 1 if values is not None else selection.depth
+        return ProjectedSelection(self, new_starts[keep], new_stops[keep], depth)
@@ -0,0 +1,241 @@
+from typing import Tuple
+
+import numpy as np
+
+from optimization.BitmapIndex import BitmapIndex
+
+
+class Selection:
+    """An immutable set of selected row positions out of rows.
+
+    Three representations, picked by how the selection was produced:
+        RangeSelection   contiguous rows [start, stop), e.g. a bound on a sorted column
+        ArraySelection   sorted int64 positions, e.g. the output of a scan
+        BitmapSelection  a BitmapIndex, e.g. an equality predicate answered by an index
+    ProjectedSelection is an ArraySelection kept as row ranges of a
+    projection (a copy of the table in another sort order).
+
+    Operations return new selections and never modify their operands, so
+    cloned queries can share one selection until either of them filters.
+    """
+
+    # Dispatch order for binary operations: the cheaper representation first
+    RANK = 0
+
+    def __init__(self, rows: int):
+        self.rows = int(rows)
+        self._positions: np.ndarray | None = None
+
+    @staticmethod
+    def all(rows: int) -> "Selection":
+        return RangeSelection(0, rows, rows)
+
+    @staticmethod
+    def of(positions, rows: int) -> "Selection":
+        """Selection of sorted, distinct positions; contiguous runs become a range."""
+        positions = np.asarray(positions, dtype=np.int64)
+        if not len(positions):
+            return RangeSelection(0, 0, rows)
+        first, last = int(positions[0]), int(positions[-1])
+        if last - first + 1 == len(positions):
+            return RangeSelection(first, last + 1, rows)
+        return ArraySelection(positions, rows)
+
+    @property
+    def kind(self) -> str:
+        return type(self).__name__.replace("Selection", "").lower()
+
+    def __len__(self) -> int:
+        raise NotImplementedError
+
+    def _materialize(self) -> np.ndarray:
+        raise NotImplementedError
+
+    def positions(self) -> np.ndarray:
+        """Selected positions as a sorted read-only int64 array (built once)."""
+        if self._positions is None:
+            positions = self._materialize()
+            positions.flags.writeable = False
+            self._positions = positions
+        return self._positions
+
+    def mask(self) -> np.ndarray:
+        """Boolean array of length rows, True at selected positions."""
+        mask = np.zeros(self.rows, dtype=bool)
+        mask[self.positions()] = True
+        return mask
+
+    def restrict(self, start: int, stop: int) -> "Selection":
+        """Selected positions within [start, stop)."""
+        raise NotImplementedError
+
+    def bounds(self, start: int, stop: int) -> Tuple[int, int]:
+        """Slice of positions() holding the positions within [start, stop)."""
+        lo, hi = np.searchsorted(self.positions(), [start, stop])
+        return int(lo), int(hi)
+
+    def intersect(self, other: "Selection") -> "Selection":
+        if self.rows != other.rows:
+            raise ValueError("Selections over different row counts")
+        a, b = (self, other) if self.RANK <= other.RANK else (other, self)
+        if isinstance(a, RangeSelection):
+            # range ∩ anything: clip the other to the range
+            return b.restrict(a.start, a.stop)
+        if isinstance(b, ArraySelection):
+            return Selection.of(ArraySelection.intersect_arrays(a.positions(), b.positions()), self.rows)
+        if isinstance(a, ArraySelection):
+            # array ∩ bitmap: probe the bitmap at each position
+            positions = a.positions()
+            return Selection.of(positions[b.bitmap.contains(positions)], self.rows)
+        return BitmapSelection(a.bitmap.and_(b.bitmap))
+
+    def union(self, other: "Selection") -> "Selection":
+        if self.rows != other.rows:
+            raise ValueError("Selections over different row counts")
+        a, b = (self, other) if self.RANK <= other.RANK else (other, self)
+        if not len(a):
+            return b
+        if not len(b):
+            return a
+        if isinstance(a, RangeSelection) and isinstance(b, RangeSelection):
+            if a.start <= b.stop and b.start <= a.stop:
+                return RangeSelection(min(a.start, b.start), max(a.stop, b.stop), self.rows)
+        if isinstance(a, BitmapSelection) and isinstance(b, BitmapSelection):
+            return BitmapSelection(a.bitmap.or_(b.bitmap))
+        return Selection.of(np.union1d(a.positions(), b.positions()), self.rows)
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({len(self)} of {self.rows} rows)"
+
+
+class RangeSelection(Selection):
+    """Rows [start, stop); every operation on it is O(1) or a single slice."""
+
+    RANK = 0
+
+    def __init__(self, start: int, stop: int, rows: int):
+        super().__init__(rows)
+        self.start = max(0, int(start))
+        self.stop = max(self.start, min(int(stop), self.rows))
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def _materialize(self) -> np.ndarray:
+        return np.arange(self.start, self.stop, dtype=np.int64)
+
+    def restrict(self, start: int, stop: int) -> Selection:
+        if start <= self.start and stop >= self.stop:
+            return self
+        return RangeSelection(max(self.start, start), min(self.stop, stop), self.rows)
+
+    def bounds(self, start: int, stop: int) -> Tuple[int, int]:
+        lo = min(max(start, self.start), self.stop) - self.start
+        hi = min(max(stop, self.start), self.stop) - self.start
+        return lo, max(lo, hi)
+
+    def mask(self) -> np.ndarray:
+        mask = np.zeros(self.rows, dtype=bool)
+        mask[self.start:self.stop] = True
+        return mask
+
+
+class ArraySelection(Selection):
+    """Sorted distinct positions."""
+
+    RANK = 1
+    # Past this size ratio, each position of the smaller array is binary
+    # searched in the larger one instead of merging the two.
+    GALLOP_RATIO = 16
+
+    def __init__(self, positions: np.ndarray, rows: int):
+        super().__init__(rows)
+        positions = np.asarray(positions, dtype=np.int64)
+        positions.flags.writeable = False
+        self._positions = positions
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def _materialize(self) -> np.ndarray:
+        return self._positions
+
+    def restrict(self, start: int, stop: int) -> Selection:
+        lo, hi = self.bounds(start, stop)
+        if lo == 0 and hi == len(self):
+            return self
+        return Selection.of(self.positions()[lo:hi], self.rows)
+
+    @staticmethod
+    def intersect_arrays(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Positions in both sorted arrays.
+
+        Arrays of similar size are merged; when one is much smaller its
+        positions are searched in the larger (galloping), costing
+        O(m log n) rather than O(m + n).
+        """
+        small, large = (a, b) if len(a) <= len(b) else (b, a)
+        if not len(small):
+            return small
+        if len(large) < len(small) * ArraySelection.GALLOP_RATIO:
+            return np.intersect1d(small, large, assume_unique=True)
+        # Only the part of the larger array that overlaps the smaller one is searched
+        lo, hi = np.searchsorted(large, [small[0], small[-1]], side="left")
+        window = large[lo:hi + 1]
+        found = np.searchsorted(window, small)
+        found[found == len(window)] = 0
+        return small[window[found] == small] if len(window) else window
+
+
+class ProjectedSelection(ArraySelection):
+    """Rows of a projection in ranges [starts[i], stops[i]) of its sort order.
+
+    Within each range the first depth sort keys are constant, so the next
+    key is sorted and a predicate on it is one binary search per range
+    (Projection.refine). The table positions, the projection's row ids of
+    the ranges in row order, are built only when an operation needs them.
+    """
+
+    def __init__(self, projection, starts: np.ndarray, stops: np.ndarray, depth: int):
+        Selection.__init__(self, projection.rows)
+        self.projection = projection
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.stops = np.asarray(stops, dtype=np.int64)
+        self.depth = depth
+
+    def __len__(self) -> int:
+        return int((self.stops - self.starts).sum())
+
+    def _materialize(self) -> np.ndarray:
+        row_ids = self.projection.row_ids()
+        if not len(self.starts):
+            return np.empty(0, dtype=np.int64)
+        parts = [row_ids[start:stop] for start, stop in zip(self.starts.tolist(), self.stops.tolist())]
+        return np.sort(np.concatenate(parts).astype(np.int64))
+
+
+class BitmapSelection(Selection):
+    """Rows set in a BitmapIndex; positions are decoded only when needed, count() never expands it."""
+
+    RANK = 2
+
+    def __init__(self, bitmap: BitmapIndex):
+        super().__init__(bitmap.length)
+        self.bitmap = bitmap
+        self._count: int | None = None
+
+    def __len__(self) -> int:
+        if self._count is None:
+            self._count = self.bitmap.count()
+        return self._count
+
+    def mask(self) -> np.ndarray:
+        return self.bitmap.to_mask()
+
+    def _materialize(self) -> np.ndarray:
+        return self.bitmap.positions()
+
+    def restrict(self, start: int, stop: int) -> Selection:
+        if start <= 0 and stop >= self.rows:
+            return self
+        return BitmapSelection(self.bitmap.and_(BitmapIndex.from_range(start, stop, self.rows)))
@@ -0,0 +1,87 @@
+from typing import Tuple
+
+import numpy as np
+
+
+class SortedIndex:
+    """Sort permutation of a numeric column.
+
+    values holds the column's non-null values in ascending order and
+    permutation the row of each, so the rows whose value lies in a range
+    are permutation[lo:hi], with lo and hi found by two binary searches.
+    The bounds give the exact number of matches before any row is touched.
+    """
+
+    # Past this fraction of the rows, matches are put back in row order
+    # through a boolean mask instead of being sorted
+    MASK_FRACTION = 1 / 16
+
+    def __init__(self, values: np.ndarray, permutation: np.ndarray, rows: int):
+        self.values = values
+        self.permutation = permutation
+        self.rows = int(rows)
+
+    @staticmethod
+    def build(values) -> "SortedIndex | None":
+        """Index of a numeric column (NaN / None are left out); None for non-numeric data."""
+        values = np.asarray(values)
+        if values.dtype == object:
+            try:
+                values = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+            except (TypeError, ValueError):
+                return None
+        if values.dtype.kind not in "iuf":
+            return None
+        permutation = np.argsort(values, kind="stable")
+        if values.dtype.kind == "f":
+            # NaN sorts last
+            permutation = permutation[:len(values) - int(np.isnan(values).sum())]
+        dtype = np.uint32 if len(values) < 2 ** 32 else np.int64
+        return SortedIndex(values[permutation], permutation.astype(dtype), len(values))
+
+    def append(self, start: int, values, rows: int) -> "SortedIndex | None":
+        """The index with rows from start on replaced by values, now rows long.
+
+        Only the new values are sorted; they are merged into the kept
+        entries by binary search, after equal values of earlier rows.
+        None for non-numeric values.
+        """
+        tail = SortedIndex.build(values)
+        if tail is None:
+            return None
+        keep = self.permutation < start
+        kept_values = self.values[keep]
+        dtype = np.result_type(kept_values.dtype, tail.values.dtype)
+        at = np.searchsorted(kept_values, tail.values, side="right")
+        merged = np.insert(kept_values.astype(dtype), at, tail.values.astype(dtype))
+        width = np.uint32 if rows < 2 ** 32 else np.int64
+        permutation = np.insert(self.permutation[keep].astype(width), at, (tail.permutation.astype(np.int64) + start).astype(width))
+        return SortedIndex(merged, permutation, rows)
+
+    def bounds(self, low=None, high=None) -> Tuple[int, int]:
+        """Slice [lo, hi) of values with low <= value <= high; a None bound is open."""
+        lo = 0 if low is None else int(np.searchsorted(self.values, low, side="left"))
+        hi = len(self.values) if high is None else int(np.searchsorted(self.values, high, side="right"))
+        return lo, max(lo, hi)
+
+    def positions(self, lo: int, hi: int) -> np.ndarray:
+        """Rows of values[lo:hi], in row order."""
+        rows = self.permutation[lo:hi]
+        if len(rows) > self.rows * self.MASK_FRACTION:
+            mask = np.zeros(self.rows, dtype=bool)
+            mask[rows] = True
+            return np.flatnonzero(mask)
+        return np.sort(rows.astype(np.int64))
+
+    def between(self, low, high) -> np.ndarray:
+        """Rows with low <= value <= high."""
+        return self.positions(*self.bounds(low, high))
+
+    def gte(self, threshold) -> np.ndarray:
+        return self.between(threshold, None)
+
+    def lte(self, threshold) -> np.ndarray:
+        return self.between(None, threshold)
+
+    def eq(self, value) -> np.ndarray:
+        return self.between(value, value)
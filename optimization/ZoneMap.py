@@ -6,11 +6,14 @@ class ZoneMap:
     """Simple zonemap index: fixed-size blocks storing min/max and start/end indexes.
 
     Values are expected to be in the same order as the underlying column (row order).
+    row_groups is True when the blocks are the row groups of the column's
+    file (footer statistics), so a block can be decoded on its own.
     """
 
-    def __init__(self, blocks: List[Dict[str, Any]], block_size: int):
+    def __init__(self, blocks: List[Dict[str, Any]], block_size: int, row_groups: bool = False):
         self.blocks = blocks
         self.block_size = int(block_size)
+        self.row_groups = row_groups
 
     @staticmethod
     def build(values: List, block_size: int = 512) -> "ZoneMap":
@@ -45,9 +48,29 @@ class ZoneMap:
     def from_dict(d: Dict) -> "ZoneMap":
         return ZoneMap(d.get("blocks", []), d.get("block_size", 512))
 
+    def matching_blocks(self, predicate) -> List[int]:
+        """Indexes of blocks whose min/max may satisfy predicate(block).
+
+        Blocks with no non-null values (min/max None) never match; a block the
+        predicate cannot evaluate is kept, since skipping it could drop rows.
+        """
+        matches = []
+        for i, blk in enumerate(self.blocks):
+            if blk.get("min") is None or blk.get("max") is None:
+                continue
+            try:
+                if not predicate(blk):
+                    continue
+            except Exception:
+                pass
+            matches.append(i)
+        return matches
+
     def find_start(self, threshold, col_values: List) -> int:
         """Find the first index with value >= threshold using the zonemap to skip blocks.
 
+        Only valid when col_values is sorted.
+
         Returns an index between 0 and len(col_values).
         """
         # Find first block whose max >= threshold
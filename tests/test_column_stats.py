@@ -0,0 +1,38 @@
+import unittest
+
+import numpy as np
+
+from optimization.ColumnStats import ColumnStats
+
+ROWS = 20000
+
+
+class ColumnStatsAppendTest(unittest.TestCase):
+    """Statistics merged with ColumnStats.append against a build over all rows."""
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.towns = ["BEDOK", "YISHUN", "TAMPINES", "WOODLANDS"]
+        self.codes = rng.integers(0, len(self.towns), ROWS)
+        self.prices = np.round(rng.lognormal(13, 0.4, ROWS), -3)
+        self.prices[::97] = np.nan
+
+    def test_exact_column_matches_build(self):
+        cut = ROWS * 9 // 10
+        towns = self.towns + ["PUNGGOL"]
+        codes = self.codes.copy()
+        codes[cut::50] = len(self.towns)
+        merged = ColumnStats.build(codes[:cut], towns).append(codes[cut:], towns)
+        self.assertEqual(merged.to_dict(), ColumnStats.build(codes, towns).to_dict())
+
+    def test_histogram_column_stays_close(self):
+        cut = ROWS * 9 // 10
+        full = ColumnStats.build(self.prices)
+        merged = ColumnStats.from_dict(ColumnStats.build(self.prices[:cut]).to_dict()).append(self.prices[cut:])
+        self.assertEqual((merged.rows, merged.nulls, merged.min, merged.max), (full.rows, full.nulls, full.min, full.max))
+        for low, high in [(None, 400000), (500000, 700000), (800000, None)]:
+            self.assertAlmostEqual(merged.range(low, high), full.range(low, high), delta=0.02)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import contextlib
+import io
+import unittest
+
+import pandas as pd
+
+from utils.column_format import ColumnFormat
+
+ROWS = 5000
+
+
+class DictionaryEncodingTest(unittest.TestCase):
+    """Which string columns get a dictionary, at ingest and in streaming plans."""
+
+    def setUp(self):
+        self.fmt = ColumnFormat()
+        self.df = pd.DataFrame({
+            "town": [["BEDOK", "YISHUN", "TAMPINES"][i % 3] for i in range(ROWS)],
+            "address": [f"BLK {i} STREET" for i in range(ROWS)],
+        })
+
+    def test_near_unique_column_stays_plain(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            df, dictionaries = self.fmt.dictionary_encode(self.df.copy())
+        self.assertEqual(dictionaries["town"], ["BEDOK", "TAMPINES", "YISHUN"])
+        self.assertNotIn("address", dictionaries)
+        self.assertEqual(df["address"].tolist(), self.df["address"].tolist())
+
+    def test_streaming_plan(self):
+        profile = {}
+        for col in self.df.columns:
+            profile[col] = {"numeric": True, "integer": True, "nullable": False,
+                            "min": None, "max": None, "distinct": set(), "rows": 0}
+            self.fmt._profile_chunk(profile[col], self.df[col])
+        plans = self.fmt._column_plans(profile)
+        self.assertEqual(plans["town"]["dictionary"], ["BEDOK", "TAMPINES", "YISHUN"])
+        self.assertIsNone(plans["address"]["dictionary"])
+
+    def test_ratio_bound(self):
+        half = int(ROWS * ColumnFormat.DICTIONARY_MAX_RATIO)
+        self.assertTrue(self.fmt.dictionary_pays(half, ROWS))
+        self.assertFalse(self.fmt.dictionary_pays(half + 1, ROWS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from model.DatabaseModel import DatabaseModel
+from model.QueryModel import Query
+from model.TableModel import Table
+from optimization.ZoneMap import ZoneMap
+from utils.index_store import IndexStore
+
+TOWNS = ["BEDOK", "YISHUN", "TAMPINES"]
+ROWS = 600
+BLOCK_SIZE = 50
+
+
+class LegacyZoneMapTest(unittest.TestCase):
+    """Queries on a text-format column database whose zone maps predate row groups.
+
+    Zone map blocks there (BLOCK_SIZE rows) are not row groups of the
+    column files, so filtering must read the column rather than decode
+    row groups.
+    """
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self._base_dir = DatabaseModel.BASE_DIR
+        DatabaseModel.BASE_DIR = self._tmp.name
+        self.towns = [TOWNS[i % len(TOWNS)] for i in range(ROWS)]
+        self.months = [201501 + (i * 12 // ROWS) for i in range(ROWS)]
+
+    def tearDown(self):
+        DatabaseModel.BASE_DIR = self._base_dir
+        self._tmp.cleanup()
+
+    def _create(self, name: str, sidecar: bool) -> Table:
+        """A legacy database: one value per line, the month_num zone map as a sidecar or inline JSON."""
+        path = os.path.join(self._tmp.name, name)
+        os.makedirs(path)
+        for col, values in (("town", self.towns), ("month_num", self.months)):
+            with open(os.path.join(path, f"{col}.col"), "w") as f:
+                f.writelines(f"{v}\n" for v in values)
+        meta = {"name": name, "path": path, "engine": "column", "columns": ["town", "month_num"],
+                "sorted_columns": []}
+        zonemap = ZoneMap.build(self.months, BLOCK_SIZE)
+        if sidecar:
+            IndexStore.write_zonemap(os.path.join(path, IndexStore.zonemap_file("month_num")), zonemap)
+            meta["indexes"] = {"month_num": {"zonemap": IndexStore.zonemap_file("month_num")}}
+        else:
+            meta["zonemaps"] = {"month_num": zonemap.to_dict()}
+        with open(os.path.join(path, "db.meta.json"), "w") as f:
+            json.dump(meta, f)
+        with contextlib.redirect_stdout(io.StringIO()):
+            table = Table(DatabaseModel(name).get_engine(), name=name)
+            table.load()
+        return table
+
+    def _expected(self, towns: set, low: int, high: int) -> list:
+        return [i for i in range(ROWS) if self.towns[i] in towns and low <= self.months[i] <= high]
+
+    def _query(self, table: Table, towns: set, low: int, high: int) -> list:
+        with contextlib.redirect_stdout(io.StringIO()):
+            q = Query(table).where_in("town", towns).where_between("month_num", low, high)
+            return q.select().tolist()
+
+    def test_sidecar_zonemap(self):
+        table = self._create("sidecar", sidecar=True)
+        self.assertIn("month_num", table.zonemaps)
+        self.assertEqual(self._query(table, {"BEDOK", "YISHUN"}, 201503, 201507),
+                         self._expected({"BEDOK", "YISHUN"}, 201503, 201507))
+
+    def test_json_zonemap(self):
+        table = self._create("inline", sidecar=False)
+        self.assertEqual(self._query(table, {"TAMPINES"}, 201501, 201512),
+                         self._expected({"TAMPINES"}, 201501, 201512))
+
+    def test_loaded_column(self):
+        # A column loaded before the query (e.g. by prefetch) is sliced in memory
+        table = self._create("loaded", sidecar=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            table.get_unit("month_num").load()
+        self.assertEqual(self._query(table, {"BEDOK"}, 201506, 201506),
+                         self._expected({"BEDOK"}, 201506, 201506))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -35,22 +35,6 @@ class BaseFormat(ABC):
         pass
 
     @abstractmethod
-    def compress_town(self) -> None:
-        """Compress 'town' by mapping town names to integers."""
+    def dictionary_encode(self, df: pd.DataFrame) -> tuple[pd.DataFrame, Dict[str, list]]:
+        """Replace low-cardinality string columns with integer dictionary codes."""
         pass
-
-    @abstractmethod
-    def encode_flat_type(self) -> None:
-        """Encode 'flat_type' by mapping flat types to integers."""
-        pass
-
-    @abstractmethod
-    def encode_storey_range(self) -> None:
-        """Encode 'storey_range' by mapping storey ranges to integers."""
-        pass
-
-    @abstractmethod
-    def encode_flat_model(self) -> None:
-        """Encode 'flat_model' by mapping flat models to integers."""
-        pass
-
@@ -0,0 +1,84 @@
+import bz2
+import lzma
+import time
+import zlib
+from typing import Dict, List, Tuple
+
+
+class BlockCodec:
+    """General-purpose compression applied to each encoded row-group chunk.
+
+    none  chunk stored as encoded (plain chunks stay zero-copy through mmap)
+    zlib  DEFLATE, fast to decode
+    lzma  best ratio, slowest to decode
+    bz2   Burrows-Wheeler, good on repetitive text-like payloads
+
+    Chunks are compressed independently, so a reader decompresses only the
+    row groups it needs.
+    """
+
+    CODES = {"none": 0, "zlib": 1, "lzma": 2, "bz2": 3}
+    NAMES = {code: name for name, code in CODES.items()}
+
+    # Storage read bandwidth assumed by choose(); slower storage favours
+    # higher ratios, faster storage favours cheap (or no) decompression.
+    READ_MBPS = 150.0
+    # Number of chunks compressed when profiling a column
+    SAMPLE_CHUNKS = 4
+
+    @staticmethod
+    def compress(data: bytes, codec: str) -> bytes:
+        if codec == "none":
+            return bytes(data)
+        if codec == "zlib":
+            return zlib.compress(data, 6)
+        if codec == "lzma":
+            return lzma.compress(data, preset=6)
+        if codec == "bz2":
+            return bz2.compress(data, 9)
+        raise ValueError(f"Unknown codec '{codec}'")
+
+    @staticmethod
+    def decompress(data, codec: str):
+        if codec == "none":
+            return data
+        if codec == "zlib":
+            return zlib.decompress(data)
+        if codec == "lzma":
+            return lzma.decompress(data)
+        if codec == "bz2":
+            return bz2.decompress(data)
+        raise ValueError(f"Unknown codec '{codec}'")
+
+    @staticmethod
+    def profile(chunks: List[bytes]) -> Dict[str, Tuple[float, float]]:
+        """Compression ratio and decode throughput (MB/s) of every codec on a sample of chunks."""
+        sample = chunks[:BlockCodec.SAMPLE_CHUNKS]
+        raw_bytes = sum(len(chunk) for chunk in sample)
+        results = {"none": (1.0, float("inf"))}
+        if raw_bytes == 0:
+            return results
+
+        for codec in BlockCodec.CODES:
+            if codec == "none":
+                continue
+            compressed = [BlockCodec.compress(chunk, codec) for chunk in sample]
+            start = time.perf_counter()
+            for blob in compressed:
+                BlockCodec.decompress(blob, codec)
+            elapsed = max(time.perf_counter() - start, 1e-9)
+            ratio = raw_bytes / max(sum(len(blob) for blob in compressed), 1)
+            results[codec] = (ratio, raw_bytes / elapsed / 1e6)
+        return results
+
+    @staticmethod
+    def read_cost(ratio: float, decode_mbps: float) -> float:
+        """Estimated seconds to read one MB of encoded data: fetch compressed bytes, then decode."""
+        return 1.0 / (ratio * BlockCodec.READ_MBPS) + 1.0 / decode_mbps
+
+    @staticmethod
+    def choose(chunks: List[bytes]) -> Tuple[str, Dict[str, Tuple[float, float]]]:
+        """Codec with the lowest estimated read cost for these chunks, plus the profile."""
+        profile = BlockCodec.profile(chunks)
+        codec = min(profile, key=lambda name: (BlockCodec.read_cost(*profile[name]), name != "none"))
+        return codec, profile
@@ -0,0 +1,556 @@
+import mmap
+import os
+import struct
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+from utils.block_codec import BlockCodec
+from utils.encodings import Encoding, RunLengthColumn
+
+
+class ColumnFile:
+    """Typed binary column file: fixed-width values in row groups behind a small header.
+
+    Layout (little-endian):
+        header   magic(8) version(u16) dtype(u8) encoding(u8) rows(u64) nulls(u64)
+                 group_rows(u32) groups(u32) codec(u8) pad(3)
+        chunks   one independently encoded (then compressed) chunk of group_rows
+                 values per row group
+        validity ceil(rows / 8) bytes, only present when nulls > 0 (bit set = valid)
+        footer   per row group: offset(u64) length(u64) rows(u32) nulls(u32) min max
+
+    Files are opened through mmap, so a plain numeric column is usable straight
+    from the OS page cache without parsing every value. Encoded payloads
+    (see utils.encodings) are decoded with vectorized kernels on open. The
+    footer statistics let readers skip row groups a predicate cannot match
+    and decode only the chunks they need (read_groups); the footer offsets
+    double as the block table for compressed chunks (see utils.block_codec).
+    """
+
+    MAGIC = b"\x89SCCOL\r\n"
+    VERSION = 3
+    # Version 2 files are version 3 files without a codec (the byte was padding)
+    READABLE_VERSIONS = (2, 3)
+    HEADER = struct.Struct("<8sHBBQQIIB3x")
+    # Rows per row group; a multiple of 8 so groups own whole validity bytes
+    GROUP_ROWS = 16384
+
+    # dtype name -> (header code, numpy dtype, memoryview typecode, python type)
+    DTYPES = {
+        "int32": (1, np.dtype("<i4"), "i", int),
+        "int64": (2, np.dtype("<i8"), "q", int),
+        "float64": (3, np.dtype("<f8"), "d", float),
+    }
+    # Footer entry per python type (min/max stored in the column's own domain)
+    FOOTERS = {
+        int: struct.Struct("<QQIIqq"),
+        float: struct.Struct("<QQIIdd"),
+    }
+    _BY_CODE = {code: name for name, (code, _, _, _) in DTYPES.items()}
+
+    INT32_MIN = -(2 ** 31)
+    INT32_MAX = 2 ** 31 - 1
+
+    @staticmethod
+    def is_binary(path: str) -> bool:
+        """True when the file at path starts with the binary column magic."""
+        try:
+            with open(path, "rb") as f:
+                return f.read(len(ColumnFile.MAGIC)) == ColumnFile.MAGIC
+        except OSError:
+            return False
+
+    @staticmethod
+    def dtype_for(values) -> str | None:
+        """Pick the narrowest fixed-width dtype for values, or None for text."""
+        ints = []
+        saw_float = False
+        for v in values:
+            if v is None:
+                continue
+            if isinstance(v, bool):
+                return None
+            if isinstance(v, int):
+                ints.append(v)
+            elif isinstance(v, float):
+                saw_float = True
+            else:
+                return None
+
+        if saw_float:
+            return "float64"
+        if not ints:
+            return None
+        if ColumnFile.INT32_MIN <= min(ints) and max(ints) <= ColumnFile.INT32_MAX:
+            return "int32"
+        return "int64"
+
+    @staticmethod
+    def _to_array(values: List, dtype: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Convert values to (typed array, validity mask)."""
+        _, np_dtype, _, py_type = ColumnFile.DTYPES[dtype]
+        try:
+            arr = np.asarray(values, dtype=np_dtype)
+            if py_type is float:
+                return arr, ~np.isnan(arr)
+            return arr, np.ones(len(arr), dtype=bool)
+        except TypeError:
+            # Integer column with None entries
+            valid = np.array([v is not None for v in values], dtype=bool)
+            arr = np.array([0 if v is None else v for v in values], dtype=np_dtype)
+            return arr, valid
+
+    @staticmethod
+    def _group_stats(arr: np.ndarray, valid: np.ndarray) -> Tuple[int, object, object]:
+        """(nulls, min, max) of one row group; min/max are 0 when all values are null."""
+        nulls = int(len(arr) - np.count_nonzero(valid))
+        if nulls == len(arr):
+            return nulls, 0, 0
+        values = arr[valid] if nulls else arr
+        return nulls, values.min().item(), values.max().item()
+
+    @staticmethod
+    def write(path: str, values: List, dtype: str, encoding: str = None, codec: str = None) -> Dict:
+        """Write values as a typed binary column (atomically replaces path).
+
+        Values are split into row groups of GROUP_ROWS, each encoded on its
+        own, compressed with codec and described by a footer entry. When
+        encoding is None the smallest encoding over all groups is chosen;
+        columns with nulls are always stored plain. When codec is None it is
+        chosen from the measured ratio and decode throughput of the chunks.
+
+        Returns {"encoding", "codec", "ratio", "decode_mbps"} for the column.
+        """
+        if dtype not in ColumnFile.DTYPES:
+            raise ValueError(f"Unsupported column dtype '{dtype}'")
+        if codec is not None and codec not in BlockCodec.CODES:
+            raise ValueError(f"Unsupported codec '{codec}'")
+
+        arr, valid = ColumnFile._to_array(values, dtype)
+        nulls = int(len(arr) - np.count_nonzero(valid))
+        group_rows = ColumnFile.GROUP_ROWS
+        bounds = [(i, min(i + group_rows, len(arr))) for i in range(0, len(arr), group_rows)]
+
+        if encoding is None:
+            encoding = ColumnFile._choose_encoding([Encoding.sizes(arr[lo:hi]) for lo, hi in bounds], nulls)
+        elif nulls:
+            encoding = "plain"
+        groups = ((arr[lo:hi], valid[lo:hi]) for lo, hi in bounds)
+        return ColumnFile._write_groups(path, dtype, encoding, codec, len(arr), nulls, groups, len(bounds))
+
+    @staticmethod
+    def _choose_encoding(group_sizes: List[dict], nulls: int) -> str:
+        """Smallest encoding over all groups; columns with nulls stay plain."""
+        if nulls:
+            return "plain"
+        # An encoding is a candidate only if it applies to every group
+        totals = {
+            name: sum(sizes[name] for sizes in group_sizes)
+            for name in Encoding.CODES
+            if all(name in sizes for sizes in group_sizes)
+        }
+        return min(totals, key=lambda name: (totals[name], name != "plain"))
+
+    @staticmethod
+    def _write_groups(path: str, dtype: str, encoding: str, codec: str | None,
+                      rows: int, nulls: int, groups, group_count: int) -> Dict:
+        """Encode, compress and write (values, validity) row groups as a column file.
+
+        groups is consumed once, one row group at a time, so a caller can
+        stream groups from disk; only the codec sample is held in memory.
+        """
+        code, _, _, py_type = ColumnFile.DTYPES[dtype]
+        groups = iter(groups)
+        pending = []
+        decode_mbps = None
+        if codec is None:
+            # Profile the first chunks, then stream the rest
+            for arr, valid in groups:
+                pending.append((arr, valid, Encoding.encode(arr, encoding)))
+                if len(pending) == BlockCodec.SAMPLE_CHUNKS:
+                    break
+            codec, profile = BlockCodec.choose([chunk for _, _, chunk in pending])
+            decode_mbps = profile[codec][1]
+
+        def encoded():
+            yield from pending
+            for arr, valid in groups:
+                yield arr, valid, Encoding.encode(arr, encoding)
+
+        header = ColumnFile.HEADER.pack(
+            ColumnFile.MAGIC, ColumnFile.VERSION, code, Encoding.CODES[encoding],
+            rows, nulls, ColumnFile.GROUP_ROWS, group_count, BlockCodec.CODES[codec],
+        )
+        footer_entry = ColumnFile.FOOTERS[py_type]
+        encoded_bytes = stored_bytes = 0
+
+        # Write beside the target and swap in, so readers that still hold a
+        # mapping of the previous file never see it truncated underneath them.
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            footer = []
+            validity = []
+            offset = ColumnFile.HEADER.size
+            for arr, valid, chunk in encoded():
+                block = BlockCodec.compress(chunk, codec)
+                f.write(block)
+                group_nulls, gmin, gmax = ColumnFile._group_stats(arr, valid)
+                footer.append(footer_entry.pack(offset, len(block), len(arr), group_nulls, gmin, gmax))
+                if nulls:
+                    validity.append(np.packbits(valid, bitorder="little").tobytes())
+                offset += len(block)
+                encoded_bytes += len(chunk)
+                stored_bytes += len(block)
+            f.write(b"".join(validity))
+            f.write(b"".join(footer))
+        os.replace(tmp_path, path)
+
+        return {
+            "encoding": encoding,
+            "codec": codec,
+            "ratio": encoded_bytes / stored_bytes if stored_bytes else 1.0,
+            "decode_mbps": decode_mbps,
+        }
+
+    @staticmethod
+    def replace_tail(path: str, from_group: int, values: List, out_path: str = None) -> Dict:
+        """Replace every row from row group from_group onward with values.
+
+        Row groups before from_group are kept byte for byte (they must be
+        full) and copied without decoding; only the new groups, the validity
+        bitmap and the footer are encoded, so appending costs time
+        proportional to the new rows. The file keeps its dtype, encoding and
+        codec. When the new rows cannot use the encoding (nulls in an encoded
+        column, or values the encoding does not cover) the whole column is
+        rewritten with ColumnFile.write.
+
+        Like write(), the result is built beside the target and swapped in,
+        so the old file stays whole for its readers. With out_path the result
+        is left there instead and path is not touched; the caller swaps it
+        in with os.replace once every column is staged.
+        Returns {"encoding", "codec", "rewritten"}.
+        """
+        out_path = out_path or path
+        mm, (code, encoding, rows, nulls, group_rows, groups, codec) = ColumnFile._open(path)
+        dtype = ColumnFile._BY_CODE[code]
+        py_type = ColumnFile.DTYPES[dtype][3]
+        footer = ColumnFile._footer(mm, py_type, groups)
+        from_group = max(0, min(from_group, groups))
+        kept = footer[:from_group]
+        if any(entry[2] != group_rows for entry in kept):
+            mm.close()
+            raise ValueError(f"'{path}': only full row groups can be kept")
+
+        arr, valid = ColumnFile._to_array(values, dtype)
+        keep_rows = from_group * group_rows
+        kept_nulls = sum(entry[3] for entry in kept)
+        new_nulls = int(len(arr) - np.count_nonzero(valid))
+        total_nulls = kept_nulls + new_nulls
+        bounds = [(i, min(i + group_rows, len(arr))) for i in range(0, len(arr), group_rows)]
+        compatible = group_rows == ColumnFile.GROUP_ROWS and (encoding == "plain" or total_nulls == 0) and all(
+            encoding in Encoding.sizes(arr[lo:hi]) for lo, hi in bounds
+        )
+
+        if not compatible:
+            _, old = ColumnFile.read(path)
+            prefix = list(old[:keep_rows]) if not isinstance(old, RunLengthColumn) else [old[i] for i in range(keep_rows)]
+            mm.close()
+            info = ColumnFile.write(out_path, prefix + list(values), dtype, codec=codec)
+            return {"encoding": info["encoding"], "codec": info["codec"], "rewritten": True}
+
+        start = footer[from_group][0] if from_group < groups else ColumnFile._validity_start(footer)
+        validity = b""
+        if total_nulls:
+            if nulls:
+                validity_start = ColumnFile._validity_start(footer)
+                validity = bytes(mm[validity_start:validity_start + keep_rows // 8])
+            else:
+                validity = b"\xff" * (keep_rows // 8)
+            validity += np.packbits(valid, bitorder="little").tobytes()
+
+        footer_entry = ColumnFile.FOOTERS[py_type]
+        entries = [footer_entry.pack(*entry) for entry in kept]
+        tmp_path = out_path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(ColumnFile.HEADER.pack(
+                    ColumnFile.MAGIC, ColumnFile.VERSION, code, Encoding.CODES[encoding],
+                    keep_rows + len(arr), total_nulls, group_rows, from_group + len(bounds), BlockCodec.CODES[codec],
+                ))
+                f.write(memoryview(mm)[ColumnFile.HEADER.size:start])
+                offset = start
+                for lo, hi in bounds:
+                    block = BlockCodec.compress(Encoding.encode(arr[lo:hi], encoding), codec)
+                    f.write(block)
+                    group_nulls, gmin, gmax = ColumnFile._group_stats(arr[lo:hi], valid[lo:hi])
+                    entries.append(footer_entry.pack(offset, len(block), hi - lo, group_nulls, gmin, gmax))
+                    offset += len(block)
+                f.write(validity)
+                f.write(b"".join(entries))
+        finally:
+            mm.close()
+        os.replace(tmp_path, out_path)
+        return {"encoding": encoding, "codec": codec, "rewritten": False}
+
+    @staticmethod
+    def _open(path: str):
+        """Map path and validate its header; returns (mmap, header fields)."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, code, enc_code, rows, nulls, group_rows, groups, codec = ColumnFile.HEADER.unpack_from(mm, 0)
+        if magic != ColumnFile.MAGIC:
+            raise ValueError(f"'{path}' is not a binary column file")
+        if version not in ColumnFile.READABLE_VERSIONS:
+            raise ValueError(f"'{path}' has unsupported column file version {version}")
+        if code not in ColumnFile._BY_CODE:
+            raise ValueError(f"'{path}' has unknown dtype code {code}")
+        if enc_code not in Encoding.NAMES:
+            raise ValueError(f"'{path}' has unknown encoding code {enc_code}")
+        if codec not in BlockCodec.NAMES:
+            raise ValueError(f"'{path}' has unknown codec code {codec}")
+        return mm, (code, Encoding.NAMES[enc_code], rows, nulls, group_rows, groups, BlockCodec.NAMES[codec])
+
+    @staticmethod
+    def _maps(encoding: str, codec: str, nulls: int, py_type: type) -> bool:
+        """Whether decoded values stay views over the mapping (uncompressed plain, no None slots).
+
+        Any other values are copies, so the mapping can be closed once they are decoded.
+        """
+        return encoding == "plain" and codec == "none" and not (nulls and py_type is int)
+
+    @staticmethod
+    def _chunk(mm, offset: int, length: int, codec: str):
+        """Encoded payload of one row group, decompressed if the file uses a codec."""
+        return BlockCodec.decompress(memoryview(mm)[offset:offset + length], codec)
+
+    @staticmethod
+    def _validity_start(footer: List[tuple]) -> int:
+        """Offset of the validity bitmap, which follows the last chunk."""
+        if not footer:
+            return ColumnFile.HEADER.size
+        offset, length = footer[-1][:2]
+        return offset + length
+
+    @staticmethod
+    def _with_nulls(values, validity: bytes, count: int) -> np.ndarray:
+        """Integer values as an object array with None where the validity bit is clear."""
+        present = np.unpackbits(np.frombuffer(validity, dtype=np.uint8), count=count, bitorder="little").view(bool)
+        result = np.asarray(values).astype(object)
+        result[~present] = None
+        return result
+
+    @staticmethod
+    def _footer(mm, py_type: type, groups: int) -> List[tuple]:
+        entry = ColumnFile.FOOTERS[py_type]
+        start = len(mm) - groups * entry.size
+        return [entry.unpack_from(mm, start + g * entry.size) for g in range(groups)]
+
+    @staticmethod
+    def read_footer(path: str) -> Tuple[int, List[Dict]]:
+        """Row group statistics without touching the column data.
+
+        Returns (group_rows, groups); each group is a dict with start/end row,
+        rows, nulls and min/max (None when every value in the group is null).
+        """
+        mm, (code, _, _, _, group_rows, groups, _) = ColumnFile._open(path)
+        py_type = ColumnFile.DTYPES[ColumnFile._BY_CODE[code]][3]
+        stats = []
+        start = 0
+        for _, _, rows, nulls, gmin, gmax in ColumnFile._footer(mm, py_type, groups):
+            empty = nulls == rows
+            stats.append({
+                "min": None if empty else gmin,
+                "max": None if empty else gmax,
+                "start": start,
+                "end": start + rows,
+                "rows": rows,
+                "nulls": nulls,
+            })
+            start += rows
+        mm.close()
+        return group_rows, stats
+
+    @staticmethod
+    def read(path: str) -> Tuple[type, memoryview | np.ndarray | RunLengthColumn]:
+        """Map a binary column file and return (python type, values).
+
+        Plain values are a read-only memoryview over the mapped payload.
+        Integer columns containing nulls are materialized to an object array
+        with None in the null slots; float nulls are already NaN in the payload.
+        The mapping is closed unless the values are a view over it.
+        """
+        mm, (code, encoding, rows, nulls, _, groups, codec) = ColumnFile._open(path)
+        _, np_dtype, typecode, py_type = ColumnFile.DTYPES[ColumnFile._BY_CODE[code]]
+        if ColumnFile._maps(encoding, codec, nulls, py_type):
+            # Uncompressed plain chunks are fixed-width and back to back: one view covers them all
+            start = ColumnFile.HEADER.size
+            return py_type, memoryview(mm)[start:start + rows * np_dtype.itemsize].cast(typecode)
+        with mm:
+            return py_type, ColumnFile._decode_all(mm, np_dtype, py_type, encoding, rows, nulls, groups, codec)
+
+    @staticmethod
+    def _decode_all(mm, np_dtype: np.dtype, py_type: type, encoding: str, rows: int, nulls: int,
+                    groups: int, codec: str) -> memoryview | np.ndarray | RunLengthColumn:
+        """Every row group of a mapped file decoded into copies (see read)."""
+        footer = ColumnFile._footer(mm, py_type, groups)
+
+        if encoding == "rle":
+            # Stitch the runs of every group into one run-length view
+            run_values, run_ends = [], []
+            for offset, length, count, _, _, _ in footer:
+                chunk = Encoding.decode(ColumnFile._chunk(mm, offset, length, codec), encoding, count, np_dtype)
+                base = run_ends[-1] if run_ends else 0
+                for value, _, end in chunk.runs():
+                    if run_values and run_values[-1] == value:
+                        run_ends[-1] = base + end
+                    else:
+                        run_values.append(value)
+                        run_ends.append(base + end)
+            return RunLengthColumn(run_values, run_ends)
+
+        chunks = [
+            np.frombuffer(Encoding.decode(ColumnFile._chunk(mm, offset, length, codec), encoding, count, np_dtype), dtype=np_dtype)
+            for offset, length, count, _, _, _ in footer
+        ]
+        values = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np_dtype)
+
+        if nulls and py_type is int:
+            validity_start = ColumnFile._validity_start(footer)
+            return ColumnFile._with_nulls(values, mm[validity_start:validity_start + (rows + 7) // 8], rows)
+        return memoryview(values)
+
+    @staticmethod
+    def read_groups(path: str, groups) -> Iterator[Tuple[type, memoryview | np.ndarray]]:
+        """Decode the given row groups, in order, from one mapping of the file.
+
+        Yields (python type, values) per group. Only those groups' chunks are
+        decompressed and decoded, so a scan restricted to a few groups reads
+        part of the file. Uncompressed plain chunks are views over the
+        mapping; otherwise the mapping is closed after the last group.
+        """
+        mm, (code, encoding, rows, nulls, group_rows, count, codec) = ColumnFile._open(path)
+        _, np_dtype, _, py_type = ColumnFile.DTYPES[ColumnFile._BY_CODE[code]]
+        try:
+            footer = ColumnFile._footer(mm, py_type, count)
+            for group in groups:
+                if not 0 <= group < count:
+                    raise IndexError(f"'{path}' has no row group {group}")
+                offset, length, rows, _, _, _ = footer[group]
+                values = Encoding.decode(ColumnFile._chunk(mm, offset, length, codec), encoding, rows, np_dtype)
+                if nulls and py_type is int:
+                    validity_start = ColumnFile._validity_start(footer) + group * group_rows // 8
+                    values = ColumnFile._with_nulls(values, mm[validity_start:validity_start + (rows + 7) // 8], rows)
+                yield py_type, values
+                del values
+        finally:
+            if not ColumnFile._maps(encoding, codec, nulls, py_type):
+                mm.close()
+
+    @staticmethod
+    def read_group(path: str, group: int) -> Tuple[type, memoryview | np.ndarray]:
+        """Decode a single row group and return (python type, values) (see read_groups)."""
+        (result,) = ColumnFile.read_groups(path, [group])
+        return result
+
+
+class ColumnFileWriter:
+    """Build a column file from values appended in batches, in bounded memory.
+
+    Full row groups are spilled as plain values to a scratch file next to the
+    target; close() then picks the encoding over all groups (as
+    ColumnFile.write does) and encodes the groups one at a time into the
+    final file. At most one row group of values is buffered in memory, plus
+    the validity bits of a nullable column.
+    """
+
+    def __init__(self, path: str, dtype: str, codec: str = None):
+        if dtype not in ColumnFile.DTYPES:
+            raise ValueError(f"Unsupported column dtype '{dtype}'")
+        self.path = path
+        self.dtype = dtype
+        self.codec = codec
+        self.np_dtype = ColumnFile.DTYPES[dtype][1]
+        self.rows = 0
+        self.nulls = 0
+        # Non-decreasing so far (NaN breaks it, as in pandas)
+        self.monotonic = True
+        self._last = None
+        self._buffer: List[np.ndarray] = []
+        self._valid: List[np.ndarray] = []
+        self._buffered = 0
+        self._groups = 0
+        self._spill_path = path + ".spill"
+        self._spill = open(self._spill_path, "wb")
+        self._validity: List[np.ndarray] = []
+
+    def append(self, values: np.ndarray, valid: np.ndarray = None) -> None:
+        """Append a batch; valid marks non-null entries (float NaN counts as null)."""
+        arr = np.asarray(values).astype(self.np_dtype, copy=False)
+        if valid is None:
+            valid = ~np.isnan(arr) if arr.dtype.kind == "f" else np.ones(len(arr), dtype=bool)
+        if len(arr) == 0:
+            return
+
+        if self.monotonic:
+            if not valid.all():
+                self.monotonic = False
+            else:
+                first = arr[0] if self._last is None else self._last
+                self.monotonic = bool(first <= arr[0]) and bool((arr[1:] >= arr[:-1]).all())
+                self._last = arr[-1]
+
+        self.rows += len(arr)
+        self.nulls += int(len(arr) - np.count_nonzero(valid))
+        self._buffer.append(arr)
+        self._valid.append(valid)
+        self._buffered += len(arr)
+        if self._buffered >= ColumnFile.GROUP_ROWS:
+            self._flush(final=False)
+
+    def _flush(self, final: bool) -> None:
+        """Spill every complete row group (and the tail when final)."""
+        arr = np.concatenate(self._buffer) if self._buffer else np.zeros(0, dtype=self.np_dtype)
+        valid = np.concatenate(self._valid) if self._valid else np.zeros(0, dtype=bool)
+        group_rows = ColumnFile.GROUP_ROWS
+        full = len(arr) if final else len(arr) - len(arr) % group_rows
+        self._spill.write(arr[:full].tobytes())
+        # Packed validity: full groups are whole bytes (GROUP_ROWS is a multiple of 8)
+        self._validity.append(np.packbits(valid[:full], bitorder="little"))
+        self._groups += (full + group_rows - 1) // group_rows
+        self._buffer = [arr[full:]] if full < len(arr) else []
+        self._valid = [valid[full:]] if full < len(arr) else []
+        self._buffered = len(arr) - full
+
+    def _groups_from_spill(self, validity: np.ndarray):
+        """Yield (values, validity) row groups back from the spill file."""
+        group_rows = ColumnFile.GROUP_ROWS
+        itemsize = self.np_dtype.itemsize
+        with open(self._spill_path, "rb") as f:
+            for lo in range(0, self.rows, group_rows):
+                count = min(group_rows, self.rows - lo)
+                arr = np.frombuffer(f.read(count * itemsize), dtype=self.np_dtype)
+                packed = validity[lo // 8:(lo + count + 7) // 8]
+                yield arr, np.unpackbits(packed, count=count, bitorder="little").astype(bool)
+
+    def close(self) -> Dict:
+        """Write the final column file; returns the ColumnFile.write summary."""
+        try:
+            self._flush(final=True)
+            self._spill.close()
+            validity = np.concatenate(self._validity) if self._validity else np.zeros(0, dtype=np.uint8)
+            self._validity = []
+
+            group_sizes = [Encoding.sizes(arr) for arr, _ in self._groups_from_spill(validity)]
+            encoding = ColumnFile._choose_encoding(group_sizes, self.nulls)
+            return ColumnFile._write_groups(
+                self.path, self.dtype, encoding, self.codec, self.rows, self.nulls,
+                self._groups_from_spill(validity), self._groups,
+            )
+        finally:
+            if not self._spill.closed:
+                self._spill.close()
+            if os.path.exists(self._spill_path):
+                os.remove(self._spill_path)
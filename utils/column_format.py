@@ -1,11 +1,24 @@
+import json
 import os
-from typing import Dict
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+import numpy as np
 import pandas as pd
 
 from utils.base_format import BaseFormat
 from model.StorageModel import StorageModel
-from optimization.BitmapIndex import BitmapIndex
-from optimization.ZoneMap import ZoneMap
+from utils.column_file import ColumnFile, ColumnFileWriter
+from utils.external_sort import ExternalSort
+from utils.index_store import IndexStore
+from utils.metadata import MetaLoader
+from utils.schema import Schema, SchemaError
+from utils.helpers import Helpers
+from optimization.BitSlicedIndex import BitSlicedIndex
+from optimization.BitmapIndex import BitmapBuilder, BitmapIndex
+from optimization.ColumnStats import ColumnStats
+from optimization.Projection import Projection
+from optimization.SortedIndex import SortedIndex
 
 
 
@@ -14,188 +27,782 @@ class ColumnFormat(BaseFormat):
 
     FORMAT_NAME = "column"
 
-    TOWN_MAP = {
-        "ANG MO KIO": 1,
-        "BEDOK": 2,
-        "BISHAN": 3,
-        "BUKIT BATOK": 4,
-        "BUKIT MERAH": 5,
-        "BUKIT PANJANG": 6,
-        "BUKIT TIMAH": 7,
-        "CENTRAL AREA": 8,
-        "CHOA CHU KANG": 9,
-        "CLEMENTI": 10,
-        "GEYLANG": 11,
-        "HOUGANG": 12,
-        "JURONG EAST": 13,
-        "JURONG WEST": 14,
-        "KALLANG/WHAMPOA": 15,
-        "MARINE PARADE": 16,
-        "PASIR RIS": 17,
-        "PUNGGOL": 18,
-        "QUEENSTOWN": 19,
-        "SEMBAWANG": 20,
-        "SENGKANG": 21,
-        "SERANGOON": 22,
-        "TAMPINES": 23,
-        "TOA PAYOH": 24,
-        "WOODLANDS": 25,
-        "YISHUN": 26
+    # String columns with at most this many distinct values are stored as
+    # integer codes into a sorted dictionary sidecar ("<col>.dict.json").
+    DICTIONARY_MAX_CARDINALITY = 65536
+    # ... and only when the distinct values are at most this fraction of the
+    # rows: a near-unique column gets a dictionary as large as its data.
+    DICTIONARY_MAX_RATIO = 0.5
+
+    # Rows per row group in binary column files (footer statistics granularity)
+    GROUP_ROWS = ColumnFile.GROUP_ROWS
+
+    # Worker threads for writing column files and building bitmaps at ingest;
+    # encoding, compression and file I/O release the GIL.
+    INGEST_WORKERS = min(8, os.cpu_count() or 1)
+    # Worker threads for reading every column of a table (read)
+    READ_WORKERS = min(8, os.cpu_count() or 1)
+
+    # Columns that get bitmap indexes at ingest, when their measured distinct
+    # count (one bitmap per value) is at most BITMAP_MAX_DISTINCT
+    BITMAP_COLUMNS = ["town"]
+    BITMAP_MAX_DISTINCT = 64
+    # Numeric columns that get a bit-sliced range index at ingest
+    RANGE_INDEX_COLUMNS = ["floor_area_sqm", "psm_price"]
+    # Numeric columns that get a sorted (permutation) index at ingest
+    SORTED_INDEX_COLUMNS = ["floor_area_sqm", "psm_price", "resale_price"]
+
+    # Additional sort orders of the table (name -> sort key), each stored
+    # under projections/<name>/ as its key columns plus the table row of each row
+    PROJECTIONS = {
+        "town_month": ["town", "month_num"],
     }
 
-    FLAT_TYPE_MAP = {
-        "1 ROOM": 0,
-        "2 ROOM": 1,
-        "3 ROOM": 2,
-        "4 ROOM": 3,
-        "5 ROOM": 4,
-        "EXECUTIVE": 5,
-        "MULTI-GENERATION": 6
-    }
-
-    STOREY_RANGE_MAP = {
-        "01 TO 03": 0,
-        "04 TO 06": 1,
-        "07 TO 09": 2,
-        "10 TO 12": 3,
-        "13 TO 15": 4,
-        "16 TO 18": 5,
-        "19 TO 21": 6,
-        "22 TO 24": 7,
-        "25 TO 27": 8,
-        "28 TO 30": 9,
-        "31 TO 33": 10,
-        "34 TO 36": 11,
-        "37 TO 39": 12,
-        "40 TO 42": 13,
-        "43 TO 45": 14,
-        "46 TO 48": 15,
-        "49 TO 51": 16
-    }
-
-    FLAT_MODEL_MAP = {
-        "2-room": 0,
-        "3Gen": 1,
-        "Adjoined flat": 2,
-        "Apartment": 3,
-        "DBSS": 4,
-        "Improved": 5,
-        "Improved-Maisonette": 6,
-        "Maisonette": 7,
-        "Model A": 8,
-        "Model A2": 9,
-        "Model A-Maisonette": 10,
-        "Multi Generation": 11,
-        "New Generation": 12,
-        "Premium Apartment": 13,
-        "Premium Apartment Loft": 14,
-        "Premium Maisonette": 15,
-        "Simplified": 16,
-        "Standard": 17,
-        "Terrace": 18,
-        "Type S1": 19,
-        "Type S2": 20
+    # Whether the engine can ingest a CSV in chunks (write_stream) and append
+    # rows in place (append_rows); engines that cannot override these as False
+    STREAMS = True
+    APPENDS = True
+
+    # Default memory budget of streaming ingest (write_stream)
+    STREAM_MEMORY_MB = 256
+    # Smallest CSV chunk / merge window, whatever the budget
+    STREAM_MIN_ROWS = 1024
+    # In-memory size of a row relative to its pandas footprint while a chunk
+    # is derived, converted and sorted
+    STREAM_ROW_OVERHEAD = 3
+
+    MONTHS = {
+        "Jan": 1, "Feb": 2, "Mar": 3, "Apr": 4, "May": 5, "Jun": 6,
+        "Jul": 7, "Aug": 8, "Sep": 9, "Oct": 10, "Nov": 11, "Dec": 12,
     }
 
     def __init__(self, db_path: str = None):
         self.column_path = db_path
+        # Python types of columns read from typed binary files (no casting needed)
+        self.dtypes: Dict[str, type] = {}
 
     def format_name(self) -> str:
         """Return the format name for metadata."""
         return self.FORMAT_NAME
 
     def write(self, df: pd.DataFrame, metadata: dict) -> None:
-        try:
-            os.makedirs(self.column_path, exist_ok=True)
-            
+        os.makedirs(self.column_path, exist_ok=True)
+        timings = {}
+
+        with Helpers.timed(timings, "derive"):
             df = self.psm_price(df)
             df = self.month_num(df)
-            df = self.compress_town(df)
-            # df = self.encode_flat_type(df)
-            # df = self.encode_storey_range(df)
-            # df = self.encode_flat_model(df)
+        with Helpers.timed(timings, "dictionary"):
+            df, dictionaries = self.dictionary_encode(df)
+        with Helpers.timed(timings, "sort"):
             df = self.sort_column("month_num", df)
-            
-            columns = df.columns.tolist()
-            sorted_columns = [
-                # "month_num",
-            ]
-            
-            BITMAP_CANDIDATES = {
-                "town_int": 26,           # Town integers (26 towns)
-            }
 
-            ZONEMAP_CANDIDATES = [
-                # "month_num",
-                # "floor_area_sqm", 
-                # "psm_price"
-            ]
-            
-            bitmap_indexes = {}
-            for col, expected_cardinality in BITMAP_CANDIDATES.items():
-                if col not in columns:
-                    continue
-                try:
-                    vals = df[col].tolist()
-                    unique_vals = pd.Series(vals).dropna().unique().tolist()
-                    # Only create bitmap if actual cardinality is reasonable
-                    if 0 < len(unique_vals) <= expected_cardinality * 1.2:
-                        bitmap_indexes[col] = {}
-                        for uv in unique_vals:
-                            bi = BitmapIndex.from_values(vals, uv)
-                            # store using string key to be JSON-serializable
-                            bitmap_indexes[col][str(uv)] = bi.to_base64()
-                        print(f"[ColumnFormat] Created bitmap index for '{col}' ({len(unique_vals)} unique values)")
-                except Exception as e:
-                    print(f"Warning: Could not create bitmap for '{col}': {e}")
-                    # skip columns that can't be processed
-                    continue
-            
-            for col in columns:
-                file_path = os.path.join(self.column_path, f"{col}.col")
-                # Preserve native numeric representations when writing.
-                df[col].to_csv(file_path, index=False, header=False)
+        columns = df.columns.tolist()
+        # Plain (non-dictionary) columns that came out non-decreasing,
+        # e.g. month_num after the sort; queries bisect these.
+        sorted_columns = [
+            col for col in columns
+            if col not in dictionaries and df[col].is_monotonic_increasing
+        ]
+        schema = Schema.from_frame(df, dictionaries)
+
+        # Column files (with their row-group zone maps in the footer) and
+        # bitmap indexes are independent, so they are built concurrently.
+        # Codecs preset in the metadata are kept; other columns are profiled
+        codecs = dict(metadata.get("codecs", {}))
+        with Helpers.timed(timings, "columns+bitmaps"):
+            with ThreadPoolExecutor(max_workers=self.INGEST_WORKERS) as pool:
+                bitmaps = pool.submit(self.build_bitmaps, df)
+                ranges = pool.submit(self.build_range_indexes, {
+                    col: df[col].to_numpy() for col in self.range_index_columns() if col in df.columns
+                })
+                projections = pool.submit(self.build_projections, {
+                    col: df[col].to_numpy() for col in self.projection_columns() if col in df.columns
+                })
+                files = pool.map(
+                    lambda col: self._write_column_file(
+                        col, df[col].to_numpy(), codecs.get(col), self.storage_dtype(schema[col])
+                    ),
+                    columns,
+                )
+                for col, dictionary in dictionaries.items():
+                    self.write_dictionary(col, dictionary)
+                infos = list(files)
+                indexes = self._merge_manifests(bitmaps.result(), ranges.result())
+
+        encodings = {}
+        for col, (dtype, info) in zip(columns, infos):
+            if info is not None:
+                self._report_column(col, dtype, info)
+                encodings[col] = info["encoding"]
+                codecs[col] = info["codec"]
+                schema[col]["encoding"] = info["encoding"]
+
+        metadata.update({
+            "columns": columns,
+            "sorted_columns": sorted_columns,
+            "dictionaries": {col: self.dictionary_file(col) for col in dictionaries},
+            "encodings": encodings,
+            "codecs": codecs,
+            "rows": len(df),
+            "schema": schema,
+            "indexes": indexes,
+            "projections": projections.result(),
+        })
+        print(f"[ColumnFormat] Wrote {len(df)} rows × {len(columns)} columns → '{self.column_path}'")
+        print(f"[ColumnFormat] Ingest timings: {Helpers.format_timings(timings)}")
+
+    def build_bitmaps(self, df: pd.DataFrame) -> Dict[str, dict]:
+        """Write bitmap index sidecars for BITMAP_COLUMNS; returns their manifest entries."""
+        indexes = {}
+        for col in self.BITMAP_COLUMNS:
+            if col not in df.columns:
+                continue
+            try:
+                bitmaps = BitmapIndex.build_all(df[col].to_numpy())
+                # Only create bitmap if actual cardinality is reasonable
+                if 0 < len(bitmaps) <= self.BITMAP_MAX_DISTINCT:
+                    indexes[col] = self.write_bitmap_index(col, bitmaps, len(df))
+            except Exception as e:
+                print(f"Warning: Could not create bitmap for '{col}': {e}")
+        return indexes
 
-            zonemaps = {}
+    def range_index_columns(self) -> List[str]:
+        """Columns that get a bit-sliced or a sorted index, or both."""
+        return list(dict.fromkeys(self.RANGE_INDEX_COLUMNS + self.SORTED_INDEX_COLUMNS))
+
+    def build_range_indexes(self, columns: Dict[str, np.ndarray]) -> Dict[str, dict]:
+        """Write the bit-sliced and sorted index sidecars of numeric columns; returns their manifest entries."""
+        indexes = {}
+        for col, values in columns.items():
             try:
-                # combine sorted columns and explicit candidates (avoid duplicates)
-                for sc in ZONEMAP_CANDIDATES:
-                    if sc in columns:
-                        vals = df[sc].tolist()
-                        zm = ZoneMap.build(vals, block_size=1024)
-                        zonemaps[sc] = zm.to_dict()
-                        print(f"[ColumnFormat] Created zonemap for '{sc}' with {len(zm.blocks)} blocks")
+                if col in self.RANGE_INDEX_COLUMNS:
+                    indexes.setdefault(col, {}).update(self._write_range_index(col, BitSlicedIndex.build(values)))
+                if col in self.SORTED_INDEX_COLUMNS:
+                    indexes.setdefault(col, {}).update(self._write_sorted_index(col, SortedIndex.build(values)))
             except Exception as e:
-                print(f"Warning: Could not create zonemap: {e}")
-
-            metadata.update({
-                "columns": columns,
-                "sorted_columns": sorted_columns,
-                "bitmap_indexes": bitmap_indexes,
-                "zonemaps": zonemaps,
-            })
-            print(f"[ColumnFormat] Wrote {len(df)} rows × {len(columns)} columns → '{self.column_path}'")
-        except Exception as e:
-            print(f"Error in ColumnFormat.write: {e}")
+                print(f"Warning: Could not create range index for '{col}': {e}")
+        return {col: files for col, files in indexes.items() if files}
+
+    def _write_range_index(self, col: str, index: BitSlicedIndex | None) -> dict:
+        if index is None:
+            return {}
+        file_name = IndexStore.range_index_file(col)
+        IndexStore.write_range_index(os.path.join(self.column_path, file_name), index)
+        print(f"[ColumnFormat] Wrote range index for '{col}' ({len(index.slices)} bit slices) → '{file_name}'")
+        return {"bsi": file_name}
+
+    def _write_sorted_index(self, col: str, index: SortedIndex | None) -> dict:
+        if index is None:
+            return {}
+        file_name = IndexStore.sorted_index_file(col)
+        IndexStore.write_sorted_index(os.path.join(self.column_path, file_name), index)
+        print(f"[ColumnFormat] Wrote sorted index for '{col}' ({len(index.values)} values) → '{file_name}'")
+        return {"sorted": file_name}
+
+    def _append_range_indexes(self, indexes: Dict[str, dict], merged: pd.DataFrame, start: int, rows: int) -> Dict[str, dict]:
+        """Update the range index sidecars for rows from start on replaced by the merged rows.
+
+        A bit-sliced index gets the bits of those rows only; it is rebuilt
+        from the stored column when the new values do not fit its encoding.
+        A sorted index merges the sorted new entries into its kept ones.
+        Returns the manifest entries of the range-indexed columns.
+        """
+        updated = {}
+        for col, files in indexes.items():
+            try:
+                if "bsi" in files:
+                    index = IndexStore.read_range_index(os.path.join(self.column_path, files["bsi"]))
+                    index = index.append(start, merged[col].to_numpy(), rows)
+                    if index is None:
+                        print(f"[ColumnFormat] Rebuilding range index for '{col}': new values do not fit its encoding")
+                        index = BitSlicedIndex.build(self._as_array(self.read_column(col)))
+                    updated.setdefault(col, {}).update(self._write_range_index(col, index))
+                if "sorted" in files:
+                    index = IndexStore.read_sorted_index(os.path.join(self.column_path, files["sorted"]))
+                    index = index.append(start, merged[col].to_numpy(), rows)
+                    updated.setdefault(col, {}).update(self._write_sorted_index(col, index))
+            except Exception as e:
+                print(f"Warning: Could not update range index for '{col}': {e}")
+        return updated
+
+    def projection_columns(self) -> List[str]:
+        """Columns that are part of a projection's sort key."""
+        return list(dict.fromkeys(col for sort_key in self.PROJECTIONS.values() for col in sort_key))
+
+    def build_projections(self, columns: Dict[str, np.ndarray]) -> Dict[str, dict]:
+        """Write the PROJECTIONS whose key columns are all in columns; returns their metadata entries."""
+        projections = {}
+        for name, sort_key in self.PROJECTIONS.items():
+            if any(col not in columns for col in sort_key):
+                continue
+            try:
+                keys = [self._as_array(columns[col]) for col in sort_key]
+                if any(key.dtype.kind not in "iuf" for key in keys):
+                    print(f"Warning: Projection '{name}' needs numeric or dictionary-encoded keys; skipped")
+                    continue
+                order = Projection.order(keys)
+                projections[name] = self._write_projection(name, sort_key, [key[order] for key in keys], order)
+                print(f"[ColumnFormat] Wrote projection '{name}' sorted by {sort_key} → '{projections[name]['path']}'")
+            except Exception as e:
+                print(f"Warning: Could not create projection '{name}': {e}")
+        return projections
+
+    def _write_projection(self, name: str, sort_key: List[str], keys: List[np.ndarray], row_ids: np.ndarray) -> dict:
+        """Write a projection's sorted key columns and row ids; returns its metadata entry."""
+        path = f"projections/{name}"
+        files = ColumnFormat(os.path.join(self.column_path, path))
+        os.makedirs(files.column_path, exist_ok=True)
+        for col, key in zip(sort_key, keys):
+            files._write_column_file(col, key, dtype="float64" if key.dtype.kind == "f" else "int64")
+        files._write_column_file(Projection.ROW_ID, row_ids, dtype="int64")
+        return {"sort_key": sort_key, "path": path, "rows": len(row_ids)}
+
+    def _append_projections(self, projections: Dict[str, dict], merged: pd.DataFrame, start: int, rows: int) -> Dict[str, dict]:
+        """Update the projections for rows from start on replaced by the merged rows.
+
+        Entries of the rewritten rows are dropped; only the merged rows are
+        sorted, and they are inserted into the kept order by binary search
+        (Projection.insertion_points). Returns the updated metadata entries.
+        """
+        updated = {}
+        for name, entry in projections.items():
+            try:
+                files = ColumnFormat(os.path.join(self.column_path, entry["path"]))
+                sort_key = entry["sort_key"]
+                row_ids = self._as_array(files.read_column(Projection.ROW_ID))
+                keep = row_ids < start
+                kept = [self._as_array(files.read_column(col))[keep] for col in sort_key]
+                new = [merged[col].to_numpy() for col in sort_key]
+                new = [key.astype(np.result_type(old.dtype, key.dtype)) for old, key in zip(kept, new)]
+                order = Projection.order(new)
+                new = [key[order] for key in new]
+                at = Projection.insertion_points(kept, new)
+                keys = [np.insert(old.astype(key.dtype), at, key) for old, key in zip(kept, new)]
+                updated[name] = self._write_projection(name, sort_key, keys, np.insert(row_ids[keep], at, order + start))
+                print(f"[ColumnFormat] Merged {len(order)} rows into projection '{name}'")
+            except Exception as e:
+                print(f"Warning: Could not update projection '{name}': {e}")
+        return updated
+
+    @staticmethod
+    def _merge_manifests(*manifests: Dict[str, dict]) -> Dict[str, dict]:
+        """Combine per-column index entries ({col: {kind: file}}) of several builders."""
+        merged = {}
+        for manifest in manifests:
+            for col, files in manifest.items():
+                merged.setdefault(col, {}).update(files)
+        return merged
+
+    def _range_columns(self, columns: list) -> Dict[str, np.ndarray]:
+        """Stored values of the range-indexed columns among columns, read back from their files."""
+        return self._stored_arrays(self.range_index_columns(), columns)
+
+    def _stored_arrays(self, wanted: List[str], columns: list) -> Dict[str, np.ndarray]:
+        """Stored values of the binary columns in both wanted and columns."""
+        wanted = [col for col in wanted if col in columns and self.read_row_groups(col) is not None]
+        return {col: self._as_array(self.read_column(col)) for col in wanted}
+
+    @staticmethod
+    def _as_array(values) -> np.ndarray:
+        """Decoded column values (view, run-length column or list) as an array."""
+        to_array = getattr(values, "to_array", None)
+        return to_array() if to_array is not None else np.asarray(values)
+
+    def write_bitmap_index(self, col_name: str, bitmaps: Dict[object, BitmapIndex], rows: int) -> dict:
+        """Write a column's bitmaps to its sidecar file; returns the manifest entry."""
+        file_name = IndexStore.bitmap_file(col_name)
+        IndexStore.write_bitmaps(os.path.join(self.column_path, file_name), bitmaps, rows)
+        print(f"[ColumnFormat] Wrote bitmap index for '{col_name}' ({len(bitmaps)} unique values) → '{file_name}'")
+        return {"bitmap": file_name}
+
+    def write_stream(self, csv_path: str, metadata: dict, memory_mb: float = None) -> None:
+        """Build the database from a CSV larger than memory.
+
+        The CSV is read in chunks sized to the memory budget; each chunk gets
+        its derived columns, is sorted by month_num and spilled as a run
+        (ExternalSort), while the column types and the string dictionaries
+        are collected. A k-way merge of the runs then feeds streaming column
+        writers (ColumnFileWriter) and the bitmap builders, so peak memory is
+        bounded by the budget rather than the table. The result matches
+        write() on the same CSV.
+        """
+        os.makedirs(self.column_path, exist_ok=True)
+        memory_mb = memory_mb or self.STREAM_MEMORY_MB
+        timings = {}
+
+        sample = pd.read_csv(csv_path, dtype=str, nrows=self.STREAM_MIN_ROWS)
+        row_bytes = max(1, int(sample.memory_usage(deep=True).sum() / max(len(sample), 1)))
+        budget_rows = max(self.STREAM_MIN_ROWS, int(memory_mb * 2 ** 20) // (row_bytes * self.STREAM_ROW_OVERHEAD))
+
+        with tempfile.TemporaryDirectory(prefix="ingest_", dir=self.column_path) as work_dir:
+            sorter = ExternalSort("month_num", work_dir, budget_rows)
+            with Helpers.timed(timings, "spill runs"):
+                profile = self._spill_runs(csv_path, budget_rows, sorter)
+            sorter.window_rows = max(self.STREAM_MIN_ROWS, budget_rows // max(len(sorter.runs), 1))
+            print(f"[ColumnFormat] Spilled {sorter.rows} rows as {len(sorter.runs)} sorted runs "
+                  f"({budget_rows} rows per run, {memory_mb:g} MB budget)")
+
+            with Helpers.timed(timings, "merge+write"):
+                self._merge_runs(sorter, profile, metadata)
+        print(f"[ColumnFormat] Wrote {sorter.rows} rows × {len(sorter.columns)} columns → '{self.column_path}'")
+        print(f"[ColumnFormat] Ingest timings: {Helpers.format_timings(timings)}")
+
+    def _spill_runs(self, csv_path: str, chunk_rows: int, sorter: ExternalSort) -> Dict[str, dict]:
+        """Read the CSV in chunks, derive, sort and spill each as a run.
+
+        Raw columns are spilled as UTF-8 bytes (b"" for a missing value),
+        since a column's type is only known once every chunk has been seen.
+        Returns the profile of every column: numeric / integer / nullable,
+        the integer range and the distinct strings (None past the
+        dictionary limit).
+        """
+        profile: Dict[str, dict] = {}
+        invalid_months = missing_psm = 0
+        for chunk in pd.read_csv(csv_path, dtype=str, chunksize=chunk_rows):
+            if not profile:
+                profile = {
+                    col: {"numeric": True, "integer": True, "nullable": False,
+                          "min": None, "max": None, "distinct": set(), "rows": 0}
+                    for col in chunk.columns
+                }
+            run = {}
+            for col in chunk.columns:
+                self._profile_chunk(profile[col], chunk[col])
+                run[col] = np.array([v.encode("utf-8") for v in chunk[col].fillna("").tolist()], dtype="S")
+
+            run["psm_price"] = self.psm_values(chunk).to_numpy()
+            missing_psm += int(np.isnan(run["psm_price"]).sum())
+            month_num = self.parse_months(chunk["month"])
+            invalid_months += int(month_num.isna().sum())
+            run["month_num"] = month_num.to_numpy()
+            sorter.add_run(run)
+
+        if invalid_months:
+            print(f"Warning: Skipping {invalid_months} unrecognised months")
+        profile["psm_price"] = {"numeric": True, "integer": False, "nullable": missing_psm > 0}
+        profile["month_num"] = {"numeric": True, "integer": invalid_months == 0, "nullable": invalid_months > 0}
+        return profile
+
+    def _profile_chunk(self, info: dict, series: pd.Series) -> None:
+        """Fold one chunk of a raw column into its profile."""
+        missing = series.isna()
+        info["rows"] += len(series)
+        info["nullable"] |= bool(missing.any())
+        if info["numeric"] and not self._looks_numeric(series.dropna().head(64)):
+            info["numeric"] = False
+        if info["numeric"]:
+            numbers = pd.to_numeric(series, errors="coerce")
+            if (numbers.isna() & ~missing).any():
+                info["numeric"] = False
+            elif not missing.all():
+                # Parsed as read_csv would: ints only if every value is an integer literal
+                info["integer"] &= numbers.dtype.kind in "iu"
+                low, high = numbers.min(), numbers.max()
+                info["min"] = low if info["min"] is None else min(info["min"], low)
+                info["max"] = high if info["max"] is None else max(info["max"], high)
+        if info["distinct"] is not None:
+            info["distinct"].update(series.dropna().unique().tolist())
+            if len(info["distinct"]) > self.DICTIONARY_MAX_CARDINALITY:
+                info["distinct"] = None
+
+    @staticmethod
+    def _looks_numeric(sample: pd.Series) -> bool:
+        return not pd.to_numeric(sample, errors="coerce").isna().any()
+
+    def _column_plans(self, profile: Dict[str, dict]) -> Dict[str, dict]:
+        """Storage of every column from its profile: the schema entry plus a dictionary for strings."""
+        plans = {}
+        for col, info in profile.items():
+            if not info["numeric"] and info["distinct"] is not None and self.dictionary_pays(len(info["distinct"]), info["rows"]):
+                dictionary = sorted(info["distinct"])
+                if info["nullable"]:
+                    dictionary.append(None)
+                plans[col] = {"dtype": "string", "nullable": info["nullable"], "dictionary": dictionary}
+            elif not info["numeric"]:
+                plans[col] = {"dtype": "string", "nullable": info["nullable"], "dictionary": None}
+            elif info["integer"] and not info["nullable"]:
+                fits = info.get("min") is None or (
+                    Schema.INT32_MIN <= info["min"] and info["max"] <= Schema.INT32_MAX
+                )
+                plans[col] = {"dtype": "int32" if fits else "int64", "nullable": False, "dictionary": None}
+            else:
+                plans[col] = {"dtype": "float64", "nullable": info["nullable"], "dictionary": None}
+        return plans
+
+    def _merge_runs(self, sorter: ExternalSort, profile: Dict[str, dict], metadata: dict) -> None:
+        """Merge the sorted runs into the final column files, dictionaries and bitmaps."""
+        plans = self._column_plans(profile)
+        columns = sorter.columns
+        dictionaries = {col: plan["dictionary"] for col, plan in plans.items() if plan["dictionary"] is not None}
+        codecs = dict(metadata.get("codecs", {}))
+
+        writers, text_files, lookups = {}, {}, {}
+        bitmaps = {
+            col: BitmapBuilder(self.BITMAP_MAX_DISTINCT)
+            for col in self.BITMAP_COLUMNS if col in dictionaries
+        }
+        try:
+            for col in columns:
+                plan = plans[col]
+                dtype = self.storage_dtype(plan if plan["dictionary"] is None else {"dictionary": True})
+                path = os.path.join(self.column_path, f"{col}.col")
+                if dtype is None:
+                    text_files[col] = open(path, "w", encoding="utf-8")
+                    continue
+                writers[col] = ColumnFileWriter(path, dtype, codecs.get(col))
+                if col in dictionaries:
+                    dictionary = dictionaries[col]
+                    lookups[col] = {value.encode("utf-8"): code for code, value in enumerate(dictionary) if value is not None}
+                    lookups[col][b""] = len(dictionary) - 1 if dictionary and dictionary[-1] is None else -1
+
+            for batch in sorter.merge():
+                for col in columns:
+                    values = batch[col]
+                    if col in text_files:
+                        text_files[col].write("".join(v + "\n" for v in np.char.decode(values, "utf-8").tolist()))
+                        continue
+                    if col in lookups:
+                        values = pd.Series(values).map(lookups[col]).to_numpy(dtype=np.int32)
+                        if col in bitmaps:
+                            bitmaps[col].append(values)
+                    elif values.dtype.kind == "S":
+                        present = values != b""
+                        numbers = np.full(len(values), np.nan)
+                        numbers[present] = values[present].astype(np.float64)
+                        values = numbers if plans[col]["dtype"] == "float64" else values.astype(np.int64)
+                    writers[col].append(values)
+        finally:
+            for f in text_files.values():
+                f.close()
+
+        schema, encodings, sorted_columns = {}, {}, []
+        for col in columns:
+            plan = plans[col]
+            schema[col] = {
+                "dtype": plan["dtype"],
+                "nullable": plan["nullable"],
+                "encoding": "text",
+                "dictionary": col in dictionaries,
+            }
+            if col not in writers:
+                continue
+            info = writers[col].close()
+            self._report_column(col, writers[col].dtype, info)
+            encodings[col] = schema[col]["encoding"] = info["encoding"]
+            codecs[col] = info["codec"]
+            if col not in dictionaries and writers[col].monotonic:
+                sorted_columns.append(col)
+        for col, dictionary in dictionaries.items():
+            self.write_dictionary(col, dictionary)
+            print(f"Dictionary-encoded '{col}' ({len(dictionary)} distinct values)")
+
+        indexes = {}
+        for col, builder in bitmaps.items():
+            built = builder.finish()
+            if built:
+                indexes[col] = self.write_bitmap_index(col, built, sorter.rows)
+        # Range indexes rank all of a column's values, so they are built from
+        # the finished column files, one column at a time.
+        indexes = self._merge_manifests(indexes, self.build_range_indexes(self._range_columns(columns)))
+        projections = self.build_projections(self._stored_arrays(self.projection_columns(), columns))
+
+        metadata.update({
+            "columns": columns,
+            "sorted_columns": sorted_columns,
+            "dictionaries": {col: self.dictionary_file(col) for col in dictionaries},
+            "encodings": encodings,
+            "codecs": codecs,
+            "rows": sorter.rows,
+            "schema": schema,
+            "indexes": indexes,
+            "projections": projections,
+        })
+
+    def append_rows(self, df: pd.DataFrame, metadata: dict) -> None:
+        """Append new rows (raw CSV columns, read as text) to an existing database.
+
+        The rows are checked against the stored schema, get their derived
+        columns and are placed by month_num. Only the row groups from the
+        first one holding a month later than the earliest new month are
+        rewritten — just the last, partial group when the new months come
+        after every stored one. The rewritten column files are staged
+        beside the old ones and swapped in together once all are written;
+        zone maps (the footers of the rewritten groups), dictionaries,
+        bitmap, bit-sliced and sorted indexes and projections follow. The
+        new rows are merged into the column statistics (ColumnStats.append);
+        when there are no current statistics to merge into, "stats" is
+        dropped from metadata for the caller to analyze again. metadata is
+        updated for the caller to save last.
+        """
+        timings = {}
+        schema = metadata.get("schema")
+        if not schema:
+            raise SchemaError("Database was written without a schema; rebuild it to append rows")
+        columns = metadata["columns"]
+        rows = metadata.get("rows", 0)
+        group_rows = self.GROUP_ROWS
+
+        # psm_price and month_num are derived below, not read from the CSV
+        missing = [col for col in columns if col not in df.columns and col not in ("psm_price", "month_num")]
+        extra = [col for col in df.columns if col not in columns]
+        if missing or extra:
+            raise SchemaError(f"Appended rows do not match the schema (missing {missing}, unexpected {extra})")
+
+        with Helpers.timed(timings, "derive"):
+            df = df.copy()
+            df["psm_price"] = self.psm_values(df)
+            df["month_num"] = self.parse_months(df["month"]) if "month" in df.columns else np.nan
+
+            dictionaries = {col: self.read_dictionary(col) for col in columns if schema[col].get("dictionary")}
+            added = {col: len(dictionary) for col, dictionary in dictionaries.items()}
+            new = {col: self._encode_appended(col, df[col], schema[col], dictionaries.get(col)) for col in columns}
+
+        # Rows before the first group holding a month past the earliest new
+        # one stay where they are; that group onward is merged and rewritten.
+        _, month_groups = self.read_row_groups("month_num")
+        earliest = min((v for v in new["month_num"] if v == v), default=None)
+        from_group = next(
+            (g for g, block in enumerate(month_groups)
+             if earliest is not None and (block["nulls"] or block["max"] > earliest)),
+            len(month_groups),
+        )
+        if from_group == len(month_groups) and month_groups and month_groups[-1]["rows"] < group_rows:
+            from_group -= 1
+        start = from_group * group_rows
+
+        with Helpers.timed(timings, "merge"):
+            tail = {col: self._read_tail(col, from_group, rows) + list(new[col]) for col in columns}
+            merged = pd.DataFrame(tail).sort_values("month_num", kind="mergesort")
+
+        with Helpers.timed(timings, "columns"):
+            encodings = dict(metadata.get("encodings", {}))
+            codecs = dict(metadata.get("codecs", {}))
+            # Every column is written beside its file first; the files are
+            # swapped in only once all of them are staged.
+            staged = {}
+            try:
+                for col in columns:
+                    values = merged[col].tolist()
+                    file_path = os.path.join(self.column_path, f"{col}.col")
+                    staged[file_path] = file_path + ".new"
+                    if not ColumnFile.is_binary(file_path):
+                        self._replace_text_tail(file_path, start, values, staged[file_path])
+                        continue
+                    info = ColumnFile.replace_tail(file_path, from_group, values, staged[file_path])
+                    encodings[col] = schema[col]["encoding"] = info["encoding"]
+                    codecs[col] = info["codec"]
+                    if info["rewritten"]:
+                        print(f"[ColumnFormat] Rewrote '{col}' ({info['encoding']}+{info['codec']}): new rows did not fit its encoding")
+            except Exception:
+                for staged_path in staged.values():
+                    if os.path.exists(staged_path):
+                        os.remove(staged_path)
+                raise
+            for file_path, staged_path in staged.items():
+                os.replace(staged_path, file_path)
+            for col, dictionary in dictionaries.items():
+                if len(dictionary) != added[col]:
+                    self.write_dictionary(col, dictionary)
+                    print(f"[ColumnFormat] Added {len(dictionary) - added[col]} values to the '{col}' dictionary")
+
+        with Helpers.timed(timings, "indexes"):
+            indexes = self._append_bitmaps(metadata, merged, start, rows + len(df))
+            # Range indexes are listed again only if their update succeeds
+            ranged = {col: files for col, files in indexes.items() if "bsi" in files or "sorted" in files}
+            kept = {col: {kind: f for kind, f in files.items() if kind not in ("bsi", "sorted")} for col, files in indexes.items()}
+            manifest = self._merge_manifests(kept, self._append_range_indexes(ranged, merged, start, rows + len(df)))
+            metadata["indexes"] = {col: files for col, files in manifest.items() if files}
+            if metadata.get("projections"):
+                metadata["projections"] = self._append_projections(metadata["projections"], merged, start, rows + len(df))
+            metadata.pop("bitmap_indexes", None)
+            metadata["sorted_columns"] = [
+                col for col in metadata.get("sorted_columns", [])
+                if merged[col].is_monotonic_increasing and (
+                    from_group == 0 or merged.empty or self.read_row_groups(col)[1][from_group - 1]["max"] <= merged[col].iloc[0]
+                )
+            ]
+        with Helpers.timed(timings, "stats"):
+            self._append_stats(metadata, new, dictionaries, rows)
+        metadata.update({"rows": rows + len(df), "encodings": encodings, "codecs": codecs, "schema": schema})
+        print(f"[ColumnFormat] Appended {len(df)} rows (rewrote rows {start}–{rows + len(df)} "
+              f"from row group {from_group}) → '{self.column_path}'")
+        print(f"[ColumnFormat] Append timings: {Helpers.format_timings(timings)}")
+
+    def _append_stats(self, metadata: dict, new: dict, dictionaries: dict, rows: int) -> None:
+        """Merge the appended values into the stats sidecar, or drop "stats" if it is not current."""
+        stored = {}
+        if metadata.get("stats"):
+            try:
+                stored = MetaLoader.load_stats(self.column_path, metadata["stats"])
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not read column statistics: {e}")
+        if set(stored) != set(metadata["columns"]) or any(d["rows"] != rows for d in stored.values()):
+            metadata.pop("stats", None)
+            return
+        merged = {
+            col: ColumnStats.from_dict(d).append(new[col], dictionaries.get(col)).to_dict()
+            for col, d in stored.items()
+        }
+        metadata["stats"] = MetaLoader.save_stats(self.column_path, merged)
+
+    def _encode_appended(self, col_name: str, series: pd.Series, spec: dict, dictionary: list | None) -> list:
+        """Values of an appended column in their stored form, validated against the schema.
+
+        Strings new to a dictionary are added at its end (as Column.encode does).
+        """
+        if dictionary is not None:
+            codes = {value: code for code, value in enumerate(dictionary)}
+            values = []
+            for row, value in enumerate(series.tolist()):
+                value = None if pd.isna(value) else str(value)
+                if value is None and not spec.get("nullable"):
+                    raise SchemaError(f"Column '{col_name}' is not nullable but appended row {row} is empty")
+                if value not in codes:
+                    codes[value] = len(dictionary)
+                    dictionary.append(value)
+                values.append(codes[value])
+            return values
+
+        if series.dtype.kind in "fi":
+            missing = series.isna()
+            if missing.any() and not spec.get("nullable"):
+                row = int(np.flatnonzero(missing.to_numpy())[0])
+                raise SchemaError(f"Column '{col_name}' is not nullable but appended row {row} is empty")
+            if spec["dtype"] in ("int32", "int64"):
+                return series.astype(np.int64).tolist()
+            return series.tolist()
+
+        values = series.where(series.notna(), "").astype(str).tolist()
+        return Schema.decode_text(col_name, values, spec)
+
+    def _read_tail(self, col_name: str, from_group: int, rows: int) -> list:
+        """Stored values of a column from row group from_group to the end."""
+        file_path = os.path.join(self.column_path, f"{col_name}.col")
+        if not ColumnFile.is_binary(file_path):
+            with open(file_path, "r", encoding="utf-8") as f:
+                return [line.rstrip("\n") for i, line in enumerate(f) if i >= from_group * self.GROUP_ROWS]
+        groups = (rows + self.GROUP_ROWS - 1) // self.GROUP_ROWS
+        values = []
+        # Every tail group from one mapping of the file
+        for group in self.read_groups(col_name, range(from_group, groups)):
+            values.extend(group)
+        return values
+
+    def _replace_text_tail(self, file_path: str, start: int, values: list, out_path: str) -> None:
+        """Write the first start lines of a text column, then values, to out_path."""
+        with open(file_path, "r", encoding="utf-8") as f, open(out_path, "w", encoding="utf-8") as out:
+            for _ in range(start):
+                out.write(f.readline())
+            out.write("".join(("" if value is None else str(value)) + "\n" for value in values))
+
+    def _append_bitmaps(self, metadata: dict, merged: pd.DataFrame, start: int, rows: int) -> dict:
+        """Rewrite the bitmap sidecars with bits from start on replaced by those of the merged rows.
+
+        Only the containers from start's chunk on are rebuilt
+        (BitmapIndex.replace_tail); earlier chunks are kept as they are.
+        Bitmaps still inline in the metadata (older databases) move to
+        sidecars. Returns the updated index manifest.
+        """
+        indexes = {col: dict(files) for col, files in metadata.get("indexes", {}).items()}
+        stored = {
+            col: IndexStore.read_bitmaps(os.path.join(self.column_path, files["bitmap"]))
+            for col, files in indexes.items() if "bitmap" in files
+        }
+        for col, encoded in metadata.get("bitmap_indexes", {}).items():
+            stored[col] = {value: BitmapIndex.from_base64(b64) for value, b64 in encoded.items()}
+
+        empty = np.empty(0, dtype=np.int64)
+        for col, existing in stored.items():
+            tail = {str(v): positions for v, positions in BitmapIndex.group_positions(merged[col].to_numpy())}
+            bitmaps = {}
+            for value, bitmap in existing.items():
+                bitmaps[value] = bitmap.replace_tail(start, tail.get(value, empty) + start, rows)
+            for value in tail:
+                if value not in existing:
+                    bitmaps[value] = BitmapIndex.from_positions(tail[value] + start, rows)
+            if col in self.BITMAP_COLUMNS and len(bitmaps) > self.BITMAP_MAX_DISTINCT:
+                print(f"[ColumnFormat] Dropped bitmap index for '{col}' ({len(bitmaps)} unique values)")
+                file_path = os.path.join(self.column_path, IndexStore.bitmap_file(col))
+                if os.path.exists(file_path):
+                    os.remove(file_path)
+                indexes.get(col, {}).pop("bitmap", None)
+                continue
+            indexes.setdefault(col, {}).update(self.write_bitmap_index(col, bitmaps, rows))
+        return {col: files for col, files in indexes.items() if files}
 
     def write_units(self, units: Dict[str, StorageModel]) -> None:
         try:
             os.makedirs(self.column_path, exist_ok=True)
 
+            meta_exists = os.path.exists(os.path.join(self.column_path, MetaLoader.META_FILE))
+            meta = MetaLoader.load(self.column_path) if meta_exists else {}
+            codecs = meta.get("codecs", {})
+            schema = meta.get("schema", {})
+
             for name, unit in units.items():
-                file_path = os.path.join(self.column_path, f"{name}.col")
-                with open(file_path, "w", encoding="utf-8") as f:
-                    for value in unit.scan():
-                        f.write(str(value) + "\n")
+                dtype = self.storage_dtype(schema[name]) if name in schema else None
+                self.write_column(name, np.asarray(unit.scan()).tolist(), codecs.get(name), dtype)
+                dictionary = getattr(unit, "dictionary", None)
+                if dictionary is not None:
+                    self.write_dictionary(name, dictionary)
+
+            # Keep the recorded row count in step with the rewritten columns
+            if units and meta_exists:
+                meta["rows"] = len(next(iter(units.values())).scan())
+                MetaLoader.save(self.column_path, meta)
 
             print(f"[ColumnFormat] Wrote {len(units)} columns → '{self.column_path}'")
         except Exception as e:
             print(f"Error in ColumnFormat.write_units: {e}")
 
+    @staticmethod
+    def storage_dtype(spec: dict) -> str | None:
+        """Binary dtype a schema entry is stored as (None for text)."""
+        if spec.get("dictionary"):
+            return "int32"
+        return spec["dtype"] if spec["dtype"] in ColumnFile.DTYPES else None
+
+    def write_column(self, col_name: str, values: list, codec: str = None, dtype: str = None) -> dict | None:
+        """Write one column: typed binary for numeric data, text otherwise.
+
+        dtype is the binary dtype from the schema; without it the narrowest
+        dtype is picked from the values. codec forces the block codec of a
+        binary column; by default it is chosen per column from measured ratio
+        and decode throughput. Returns the ColumnFile.write summary (None for text).
+        """
+        dtype, info = self._write_column_file(col_name, values, codec, dtype)
+        if info is not None:
+            self._report_column(col_name, dtype, info)
+        return info
+
+    def _write_column_file(self, col_name: str, values, codec: str = None, dtype: str = None) -> tuple:
+        """Write one column file without logging; returns (dtype, ColumnFile.write summary or None)."""
+        file_path = os.path.join(self.column_path, f"{col_name}.col")
+        if dtype is None:
+            dtype = ColumnFile.dtype_for(values)
+        if dtype is not None:
+            return dtype, ColumnFile.write(file_path, values, dtype, codec=codec)
+
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write("".join(("" if value is None else str(value)) + "\n" for value in values))
+        return None, None
+
+    @staticmethod
+    def _report_column(col_name: str, dtype: str, info: dict) -> None:
+        decode = f", {info['decode_mbps']:.0f} MB/s decode" if info["decode_mbps"] not in (None, float("inf")) else ""
+        print(f"[ColumnFormat] Encoded '{col_name}' as {dtype}/{info['encoding']}+{info['codec']} "
+              f"(ratio {info['ratio']:.2f}x{decode})")
+
     def read_column(self, col_name: str)-> list:
         """Reads only the necessary column file."""
         try:
             file_path = os.path.join(self.column_path, f"{col_name}.col")
+            if ColumnFile.is_binary(file_path):
+                dtype, data = ColumnFile.read(file_path)
+                self.dtypes[col_name] = dtype
+                print(f"[ColumnFormat] Mapped column '{col_name}' ({len(data)} rows, {dtype.__name__})")
+                return data
             if os.path.exists(file_path):
                 with open(file_path, "r", encoding="utf-8") as f:
                     # Preserve empty lines so row alignment is maintained.
@@ -207,6 +814,25 @@ class ColumnFormat(BaseFormat):
             print(f"Error in read_column: {e}")
             return []
     
+    def read_row_groups(self, col_name: str) -> tuple[int, list] | None:
+        """Footer statistics (group_rows, groups) of a binary column, None for text."""
+        file_path = os.path.join(self.column_path, f"{col_name}.col")
+        if not ColumnFile.is_binary(file_path):
+            return None
+        return ColumnFile.read_footer(file_path)
+
+    def read_group(self, col_name: str, group: int):
+        """Decode one row group of a binary column."""
+        (data,) = self.read_groups(col_name, [group])
+        return data
+
+    def read_groups(self, col_name: str, groups):
+        """Decode row groups of a binary column in order, from one mapping of its file."""
+        file_path = os.path.join(self.column_path, f"{col_name}.col")
+        for dtype, data in ColumnFile.read_groups(file_path, groups):
+            self.dtypes[col_name] = dtype
+            yield data
+
     def month_num(self, df: pd.DataFrame) -> pd.DataFrame:
         """Convert 'month.col' (MMM-YY format) to 'month_num' column in YYYYMM format.
         e.g. 'Jan-15' → '201501'"""
@@ -215,23 +841,14 @@ class ColumnFormat(BaseFormat):
                 print("Warning: 'month' column not found.")
                 return df
 
-            month_map = {
-                "Jan": "01", "Feb": "02", "Mar": "03", "Apr": "04",
-                "May": "05", "Jun": "06", "Jul": "07", "Aug": "08",
-                "Sep": "09", "Oct": "10", "Nov": "11", "Dec": "12"
-            }
-
-            def parse_month(month_str):
-                try:
-                    mmm, yy = str(month_str).strip().split("-")
-                    yyyy = int(f"20{yy}")
-                    mm = month_map[mmm]
-                    return int(f"{yyyy}{mm}")
-                except (ValueError, KeyError):
-                    print(f"Warning: Skipping unrecognised month '{month_str}'")
-                    return None
-
-            df["month_num"] = df["month"].apply(parse_month)
+            month_num = self.parse_months(df["month"])
+            invalid = month_num.isna()
+            if invalid.any():
+                examples = ", ".join(repr(v) for v in df["month"][invalid].unique()[:3])
+                print(f"Warning: Skipping {int(invalid.sum())} unrecognised months (e.g. {examples})")
+                df["month_num"] = month_num
+            else:
+                df["month_num"] = month_num.astype(np.int64)
             print(f"Created 'month_num' column with {len(df)} rows")
             return df
         except Exception as e:
@@ -245,34 +862,44 @@ class ColumnFormat(BaseFormat):
                 print("Error: 'resale_price' or 'floor_area_sqm' columns not found.")
                 return df
 
-            def calc_psm(row):
-                try:
-                    price = float(row["resale_price"])
-                    area = float(row["floor_area_sqm"])
-                    if area == 0:
-                        return float("nan")
-                    return price / area
-                except (ValueError, TypeError):
-                    return float("nan")
-
-            df["psm_price"] = df.apply(calc_psm, axis=1)
+            df["psm_price"] = self.psm_values(df)
             print(f"Created 'psm_price' column with {len(df)} rows")
             return df
         except Exception as e:
             print(f"Error in psm_price: {e}")
             return df
 
+    def parse_months(self, months: pd.Series) -> pd.Series:
+        """YYYYMM numbers (float, NaN where unrecognised) for 'Mmm-yy' labels."""
+        # Parse each distinct label once, then expand through the codes
+        codes, labels = pd.factorize(months)
+        parts = pd.Series(labels).astype(str).str.strip().str.extract(r"^([A-Za-z]{3})-(\d+)$")
+        parsed = pd.to_numeric("20" + parts[1], errors="coerce") * 100 + parts[0].map(self.MONTHS)
+        return pd.Series(np.append(parsed.to_numpy(dtype=np.float64), np.nan)[codes], index=months.index)
+
+    @staticmethod
+    def psm_values(df: pd.DataFrame) -> pd.Series:
+        """resale_price / floor_area_sqm, NaN where either is missing or the area is 0."""
+        price = pd.to_numeric(df["resale_price"], errors="coerce").astype(np.float64)
+        area = pd.to_numeric(df["floor_area_sqm"], errors="coerce").astype(np.float64)
+        return price / area.where(area != 0)
+
+    def list_columns(self) -> list[str]:
+        """Names of the .col files in the database directory."""
+        if not os.path.exists(self.column_path):
+            raise FileNotFoundError(f"Database directory not found: {self.column_path}")
+        return [file[:-4] for file in sorted(os.listdir(self.column_path)) if file.endswith(".col")]
+
     def read(self) -> Dict[str, list]:
         try:
             if not os.path.exists(self.column_path):
                 raise FileNotFoundError(f"Database directory not found: {self.column_path}")
 
-            column_data = {}
-
-            for file in sorted(os.listdir(self.column_path)):
-                if file.endswith(".col"):
-                    col_name = file[:-4]
-                    column_data[col_name] = self.read_column(col_name)
+            # Reads are mostly file I/O and numpy decoding, which release the
+            # GIL, so columns are read concurrently.
+            columns = self.list_columns()
+            with ThreadPoolExecutor(max_workers=self.READ_WORKERS) as pool:
+                column_data = dict(zip(columns, pool.map(self.read_column, columns)))
 
             print(f"[ColumnFormat] read loaded {len(column_data)} columns from '{self.column_path}'")
             return column_data
@@ -280,67 +907,60 @@ class ColumnFormat(BaseFormat):
             print(f"Error in read: {e}")
             return {}
         
-    def compress_town(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Compress town names to integers."""
-        try:
-            if "town" not in df.columns:
-                print("Warning: 'town' column not found.")
-                return df
+    def dictionary_pays(self, distinct: int, rows: int) -> bool:
+        """Whether a string column with distinct values over rows is worth a dictionary."""
+        return distinct <= self.DICTIONARY_MAX_CARDINALITY and distinct <= rows * self.DICTIONARY_MAX_RATIO
 
-            df["town_int"] = df["town"].apply(lambda t: str(self.TOWN_MAP.get(t, "")))
-            print(f"Created 'town_int' column with {len(df)} rows")
-            return df
-        except Exception as e:
-            print(f"Error in compress_town: {e}")
-            return df
+    def dictionary_encode(self, df: pd.DataFrame) -> tuple[pd.DataFrame, Dict[str, list]]:
+        """Replace low-cardinality string columns with integer dictionary codes.
 
-    def encode_flat_type(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Encode flat_type to integers."""
+        Each dictionary is the sorted list of distinct values; a missing value
+        gets its own trailing None entry so every row decodes by plain indexing.
+        """
+        dictionaries: Dict[str, list] = {}
         try:
-            if "flat_type" not in df.columns:
-                print("Warning: 'flat_type' column not found.")
-                return df
+            for col in df.columns:
+                series = df[col]
+                if pd.api.types.infer_dtype(series, skipna=True) != "string":
+                    continue
+                if not self.dictionary_pays(series.nunique(dropna=True), len(series)):
+                    continue
 
-            df["flat_type_int"] = df["flat_type"].apply(
-                lambda t: str(self.FLAT_TYPE_MAP.get(t.strip().upper(), ""))
-            )
-            print(f"Created 'flat_type_int' column with {len(df)} rows")
-            return df
+                codes, uniques = pd.factorize(series, sort=True)
+                dictionary = [str(v) for v in uniques]
+                if (codes < 0).any():
+                    codes[codes < 0] = len(dictionary)
+                    dictionary.append(None)
+
+                df[col] = codes
+                dictionaries[col] = dictionary
+                print(f"Dictionary-encoded '{col}' ({len(dictionary)} distinct values)")
+            return df, dictionaries
         except Exception as e:
-            print(f"Error in encode_flat_type: {e}")
-            return df
+            print(f"Error in dictionary_encode: {e}")
+            return df, dictionaries
 
-    def encode_storey_range(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Encode storey_range to integers."""
-        try:
-            if "storey_range" not in df.columns:
-                print("Warning: 'storey_range' column not found.")
-                return df
+    @staticmethod
+    def dictionary_file(col_name: str) -> str:
+        return f"{col_name}.dict.json"
 
-            df["storey_range_int"] = df["storey_range"].apply(
-                lambda s: str(self.STOREY_RANGE_MAP.get(s.strip().upper(), ""))
-            )
-            print(f"Created 'storey_range_int' column with {len(df)} rows")
-            return df
-        except Exception as e:
-            print(f"Error in encode_storey_range: {e}")
-            return df
+    def write_dictionary(self, col_name: str, dictionary: list) -> None:
+        """Persist a column dictionary as its JSON sidecar."""
+        file_path = os.path.join(self.column_path, self.dictionary_file(col_name))
+        with open(file_path, "w", encoding="utf-8") as f:
+            json.dump(dictionary, f)
 
-    def encode_flat_model(self, df: pd.DataFrame) -> pd.DataFrame:
-        """Encode flat_model to integers."""
+    def read_dictionary(self, col_name: str) -> list | None:
+        """Load the dictionary sidecar for a column, or None if it is not encoded."""
         try:
-            if "flat_model" not in df.columns:
-                print("Warning: 'flat_model' column not found.")
-                return df
-
-            df["flat_model_int"] = df["flat_model"].apply(
-                lambda m: str(self.FLAT_MODEL_MAP.get(m.strip(), ""))
-            )
-            print(f"Created 'flat_model_int' column with {len(df)} rows")
-            return df
+            file_path = os.path.join(self.column_path, self.dictionary_file(col_name))
+            if not os.path.exists(file_path):
+                return None
+            with open(file_path, "r", encoding="utf-8") as f:
+                return json.load(f)
         except Exception as e:
-            print(f"Error in encode_flat_model: {e}")
-            return df
+            print(f"Error in read_dictionary: {e}")
+            return None
 
     def sort_column(self, col_name: str, df: pd.DataFrame) -> pd.DataFrame:
         """Sort the DataFrame by one column and save it as sorted_{column_name}.csv."""
@@ -0,0 +1,218 @@
+import bisect
+import struct
+from itertools import repeat
+
+import numpy as np
+
+
+class RunLengthColumn:
+    """Read-only sequence view over run-length encoded values.
+
+    Stores one (value, end) pair per run. Row lookups binary-search the run
+    ends, and on sorted columns value bounds resolve from the runs alone, so
+    range predicates never touch individual rows.
+    """
+
+    def __init__(self, values: list, ends: list):
+        self.values = values    # value of each run
+        self.ends = ends        # exclusive end row of each run (cumulative)
+        self._arrays = None     # (values, ends) as arrays, for take
+
+    def __len__(self) -> int:
+        return self.ends[-1] if self.ends else 0
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("RunLengthColumn index out of range")
+        return self.values[bisect.bisect_right(self.ends, i)]
+
+    def __iter__(self):
+        start = 0
+        for value, end in zip(self.values, self.ends):
+            yield from repeat(value, end - start)
+            start = end
+
+    def to_array(self, dtype=None) -> np.ndarray:
+        """All rows expanded into one array (one np.repeat over the runs)."""
+        lengths = np.diff(np.asarray(self.ends, dtype=np.int64), prepend=0)
+        return np.repeat(np.asarray(self.values, dtype=dtype), lengths)
+
+    def take(self, positions, dtype=None) -> np.ndarray:
+        """Rows at positions as an array (one binary search over the run ends per row)."""
+        if self._arrays is None:
+            self._arrays = (np.asarray(self.values), np.asarray(self.ends, dtype=np.int64))
+        values, ends = self._arrays
+        runs = np.searchsorted(ends, positions, side="right")
+        return (values if dtype is None else values.astype(dtype))[runs]
+
+    def runs(self):
+        """Yield (value, start, end) for every run without expanding rows."""
+        start = 0
+        for value, end in zip(self.values, self.ends):
+            yield value, start, end
+            start = end
+
+    def _run_start(self, run: int) -> int:
+        return self.ends[run - 1] if run > 0 else 0
+
+    def bisect_left(self, x) -> int:
+        """First row whose value is >= x. Run values must be sorted."""
+        return self._run_start(bisect.bisect_left(self.values, x))
+
+    def bisect_right(self, x) -> int:
+        """First row whose value is > x. Run values must be sorted."""
+        return self._run_start(bisect.bisect_right(self.values, x))
+
+
+class Encoding:
+    """Lightweight per-column encodings for typed binary column payloads.
+
+    plain  raw fixed-width values (zero-copy through mmap)
+    rle    run values + cumulative run ends, for sorted or clustered columns
+    delta  first value + frame-of-reference packed differences, for monotonic columns
+    for    frame-of-reference bit packing (value - min in the fewest bits), for bounded integers
+    """
+
+    CODES = {"plain": 0, "rle": 1, "delta": 2, "for": 3}
+    NAMES = {code: name for name, code in CODES.items()}
+
+    _FOR_HEADER = struct.Struct("<qB")
+    _COUNT = struct.Struct("<Q")
+    _FIRST = struct.Struct("<q")
+
+    @staticmethod
+    def _bit_width(span: int) -> int:
+        return int(span).bit_length()
+
+    @staticmethod
+    def _is_integral(arr: np.ndarray) -> bool:
+        if arr.dtype.kind in "iu":
+            return True
+        if not np.isfinite(arr).all():
+            return False
+        return bool((arr == np.round(arr)).all()) and bool((np.abs(arr) < 2 ** 53).all())
+
+    @staticmethod
+    def sizes(arr: np.ndarray) -> dict:
+        """Estimated payload bytes of every applicable encoding for arr."""
+        n = len(arr)
+        itemsize = arr.dtype.itemsize
+        sizes = {"plain": n * itemsize}
+        if n == 0:
+            return sizes
+
+        runs = 1 + int(np.count_nonzero(arr[1:] != arr[:-1]))
+        sizes["rle"] = Encoding._COUNT.size + runs * (itemsize + 8)
+
+        if Encoding._is_integral(arr):
+            ints = arr.astype(np.int64)
+            width = Encoding._bit_width(int(ints.max()) - int(ints.min()))
+            sizes["for"] = Encoding._FOR_HEADER.size + (n * width + 7) // 8
+            if n > 1:
+                deltas = np.diff(ints)
+                width = Encoding._bit_width(int(deltas.max()) - int(deltas.min()))
+                sizes["delta"] = (
+                    Encoding._FIRST.size + Encoding._FOR_HEADER.size + ((n - 1) * width + 7) // 8
+                )
+        return sizes
+
+    @staticmethod
+    def choose(arr: np.ndarray) -> str:
+        """Pick the smallest encoding for arr; plain wins ties (it maps zero-copy)."""
+        sizes = Encoding.sizes(arr)
+        return min(sizes, key=lambda name: (sizes[name], name != "plain"))
+
+    @staticmethod
+    def _pack_bits(values: np.ndarray, width: int) -> bytes:
+        if width == 0 or len(values) == 0:
+            return b""
+        bits = np.empty((len(values), width), dtype=np.uint8)
+        for b in range(width):
+            bits[:, b] = (values >> np.uint64(b)) & np.uint64(1)
+        return np.packbits(bits.ravel(), bitorder="little").tobytes()
+
+    @staticmethod
+    def _unpack_bits(buf, count: int, width: int) -> np.ndarray:
+        out = np.zeros(count, dtype=np.uint64)
+        if width == 0 or count == 0:
+            return out
+        bits = np.unpackbits(
+            np.frombuffer(buf, dtype=np.uint8), count=count * width, bitorder="little"
+        ).reshape(count, width)
+        for b in range(width):
+            out |= bits[:, b].astype(np.uint64) << np.uint64(b)
+        return out
+
+    @staticmethod
+    def _encode_for(ints: np.ndarray) -> bytes:
+        ref = int(ints.min()) if len(ints) else 0
+        width = Encoding._bit_width(int(ints.max()) - ref) if len(ints) else 0
+        offsets = (ints - ref).astype(np.uint64)
+        return Encoding._FOR_HEADER.pack(ref, width) + Encoding._pack_bits(offsets, width)
+
+    @staticmethod
+    def _decode_for(buf, count: int) -> tuple[np.ndarray, int]:
+        """Decode a frame-of-reference block; returns (int64 values, bytes consumed)."""
+        ref, width = Encoding._FOR_HEADER.unpack_from(buf, 0)
+        start = Encoding._FOR_HEADER.size
+        end = start + (count * width + 7) // 8
+        values = Encoding._unpack_bits(buf[start:end], count, width).astype(np.int64) + ref
+        return values, end
+
+    @staticmethod
+    def encode(arr: np.ndarray, encoding: str) -> bytes:
+        """Encode arr (no nulls) into the payload bytes of the given encoding."""
+        if encoding == "plain":
+            return arr.tobytes()
+
+        if encoding == "rle":
+            if len(arr) == 0:
+                return Encoding._COUNT.pack(0)
+            boundaries = np.flatnonzero(arr[1:] != arr[:-1]) + 1
+            ends = np.append(boundaries, len(arr)).astype(np.int64)
+            values = arr[np.append(0, boundaries)]
+            return Encoding._COUNT.pack(len(ends)) + values.tobytes() + ends.tobytes()
+
+        ints = arr.astype(np.int64)
+        if encoding == "for":
+            return Encoding._encode_for(ints)
+        if encoding == "delta":
+            first = int(ints[0]) if len(ints) else 0
+            return Encoding._FIRST.pack(first) + Encoding._encode_for(np.diff(ints))
+
+        raise ValueError(f"Unknown encoding '{encoding}'")
+
+    @staticmethod
+    def decode(buf, encoding: str, count: int, dtype: np.dtype):
+        """Decode a payload into a sequence of Python-typed values.
+
+        rle keeps its runs (RunLengthColumn); other encodings decode to an
+        array exposed as a memoryview, like a mapped plain column.
+        """
+        if encoding == "plain":
+            return memoryview(np.frombuffer(buf, dtype=dtype, count=count))
+
+        if encoding == "rle":
+            (runs,) = Encoding._COUNT.unpack_from(buf, 0)
+            start = Encoding._COUNT.size
+            values = np.frombuffer(buf, dtype=dtype, count=runs, offset=start)
+            ends = np.frombuffer(buf, dtype=np.int64, count=runs, offset=start + runs * dtype.itemsize)
+            return RunLengthColumn(values.tolist(), ends.tolist())
+
+        if encoding == "for":
+            ints, _ = Encoding._decode_for(buf, count)
+        elif encoding == "delta":
+            if count == 0:
+                ints = np.zeros(0, dtype=np.int64)
+            else:
+                (first,) = Encoding._FIRST.unpack_from(buf, 0)
+                deltas, _ = Encoding._decode_for(buf[Encoding._FIRST.size:], count - 1)
+                ints = np.concatenate(([first], first + np.cumsum(deltas)))
+        else:
+            raise ValueError(f"Unknown encoding '{encoding}'")
+
+        return memoryview(ints.astype(dtype))
@@ -0,0 +1,95 @@
+import os
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+
+class ExternalSort:
+    """Sort a table larger than memory by one key column.
+
+    add_run() sorts a batch of columns in memory and spills it to work_dir as
+    one .npy file per column (a sorted run). merge() then streams the runs
+    back through memory-mapped windows of window_rows rows each and yields
+    batches in key order, so at most runs × window_rows rows are resident.
+
+    The merge is stable: equal keys come out in run order, then in their
+    order within the run — the same order as a stable in-memory sort of the
+    runs concatenated. NaN keys sort last. Columns must be fixed-width numpy
+    arrays (numbers or bytes), since object arrays cannot be mapped.
+    """
+
+    def __init__(self, key: str, work_dir: str, window_rows: int):
+        self.key = key
+        self.work_dir = work_dir
+        self.window_rows = max(1, int(window_rows))
+        self.columns: List[str] = []
+        self.runs: List[str] = []
+        self.rows = 0
+
+    @staticmethod
+    def _sort_key(values: np.ndarray) -> np.ndarray:
+        """Comparable float keys with NaN mapped past every real value."""
+        keys = np.asarray(values, dtype=np.float64)
+        return np.where(np.isnan(keys), np.inf, keys)
+
+    def add_run(self, columns: Dict[str, np.ndarray]) -> None:
+        """Sort one batch by the key and spill it as a run."""
+        if not self.columns:
+            self.columns = list(columns)
+        order = np.argsort(self._sort_key(columns[self.key]), kind="stable")
+
+        run_dir = os.path.join(self.work_dir, f"run_{len(self.runs):05d}")
+        os.makedirs(run_dir)
+        for i, name in enumerate(self.columns):
+            np.save(os.path.join(run_dir, f"{i}.npy"), np.asarray(columns[name])[order])
+        self.runs.append(run_dir)
+        self.rows += len(order)
+
+    def _open_run(self, run_dir: str) -> Dict[str, np.ndarray]:
+        return {
+            name: np.load(os.path.join(run_dir, f"{i}.npy"), mmap_mode="r")
+            for i, name in enumerate(self.columns)
+        }
+
+    def merge(self) -> Iterator[Dict[str, np.ndarray]]:
+        """Yield the rows of every run in key order, one batch at a time.
+
+        Each round reads the next window of every run. The window whose last
+        key is smallest (ties: earliest run) bounds the round: everything up
+        to that (key, run) position is final, since the unread rows of every
+        run sort after it. That window is emitted whole, so each round makes
+        progress.
+        """
+        runs = [self._open_run(run_dir) for run_dir in self.runs]
+        sizes = [len(run[self.key]) for run in runs]
+        pos = [0] * len(runs)
+
+        while any(p < n for p, n in zip(pos, sizes)):
+            windows = {}
+            for r, run in enumerate(runs):
+                if pos[r] < sizes[r]:
+                    hi = min(pos[r] + self.window_rows, sizes[r])
+                    windows[r] = (hi, self._sort_key(run[self.key][pos[r]:hi]))
+
+            # Only runs with rows beyond their window constrain the round
+            bounds = [(keys[-1], r) for r, (hi, keys) in windows.items() if hi < sizes[r]]
+            bound_key, bound_run = min(bounds) if bounds else (np.inf, len(runs))
+
+            takes = {}
+            for r, (hi, keys) in windows.items():
+                if not bounds or r == bound_run:
+                    takes[r] = hi - pos[r]
+                else:
+                    side = "right" if r < bound_run else "left"
+                    takes[r] = int(np.searchsorted(keys, bound_key, side=side))
+
+            keys = np.concatenate([windows[r][1][:take] for r, take in takes.items()])
+            order = np.argsort(keys, kind="stable")
+            batch = {
+                name: np.concatenate([runs[r][name][pos[r]:pos[r] + take] for r, take in takes.items()])[order]
+                for name in self.columns
+            }
+            for r, take in takes.items():
+                pos[r] += take
+            if len(order):
+                yield batch
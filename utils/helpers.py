@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import time
+from contextlib import contextmanager
 from datetime import datetime
     
 class Helpers:
@@ -31,6 +33,21 @@ class Helpers:
 
         return year * 100 + month
         
+    @staticmethod
+    @contextmanager
+    def timed(timings: dict, stage: str):
+        """Record the wall-clock seconds of a with-block under timings[stage]."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+    @staticmethod
+    def format_timings(timings: dict) -> str:
+        """'stage 0.12s, stage 1.30s' in recording order."""
+        return ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in timings.items())
+
     @staticmethod
     def cast(val):
         try: return int(val)
@@ -0,0 +1,374 @@
+import mmap
+import os
+import struct
+from typing import Callable, Dict, Iterator, List
+
+import numpy as np
+
+from optimization.BitSlicedIndex import BitSlicedIndex
+from optimization.BitmapIndex import BitmapIndex
+from optimization.SortedIndex import SortedIndex
+from optimization.ZoneMap import ZoneMap
+from utils.metadata import MetaLoader
+
+
+class IndexStore:
+    """Binary index sidecars, listed in the "indexes" manifest of db.meta.json.
+
+    The manifest maps a column to its index files, e.g.
+        "indexes": {"town": {"bitmap": "town.bitmap"}}
+
+    Bitmap file (<col>.bitmap, little-endian):
+        header     magic(8) version(u16) pad(2) count(u32) rows(u64)
+        directory  per value: offset(u64) length(u32) key_len(u16) pad(2), then the key (UTF-8)
+        payloads   one BitmapIndex.to_bytes() per value (version 2: chunked
+                   containers); version 1 files hold raw bitmaps, bit i of
+                   byte i // 8 = row i, and are still read
+
+    Zone map file (<col>.zonemap, little-endian):
+        header     magic(8) version(u16) type(u8) pad(1) block_size(u32) blocks(u64)
+        arrays     start[int64] end[int64] min[type] max[type], one entry per block
+
+    Range index file (<col>.bsi, little-endian), a BitSlicedIndex:
+        header     magic(8) version(u16) decimals(i8) pad(1) slices(u32) base(i64) rows(u64)
+        bitmaps    exists, then slice 0, 1, ...: each length(u64) + BitmapIndex.to_bytes()
+        Version 1 files are rank-encoded (type(u8) in place of decimals,
+        distinct(u64) in place of base, then the sorted distinct values
+        before the bitmaps) and are re-encoded when read.
+
+    Sorted index file (<col>.sidx, little-endian), a SortedIndex:
+        header     magic(8) version(u16) type(u8) width(u8) pad(4) rows(u64) count(u64)
+        values     the non-null values in ascending order [type]
+        rows       the row of each value [uint32, or int64 when width is 8]
+
+    Files are mapped on first use, so loading a table reads only the
+    manifest; a bitmap is turned into a BitmapIndex when a predicate asks
+    for that value.
+    """
+
+    BITMAP_MAGIC = b"\x89SCBMP\r\n"
+    ZONEMAP_MAGIC = b"\x89SCZMP\r\n"
+    RANGE_MAGIC = b"\x89SCBSI\r\n"
+    SORTED_MAGIC = b"\x89SCSIX\r\n"
+    VERSION = 1
+    BITMAP_VERSION = 2
+    RANGE_VERSION = 2
+    BITMAP_HEADER = struct.Struct("<8sH2xIQ")
+    BITMAP_ENTRY = struct.Struct("<QIH2x")
+    ZONEMAP_HEADER = struct.Struct("<8sHBxIQ")
+    RANGE_HEADER = struct.Struct("<8sHbxIqQ")
+    SORTED_HEADER = struct.Struct("<8sHBB4xQQ")
+    LENGTH = struct.Struct("<Q")
+    # Zone map value type code -> numpy dtype
+    ZONEMAP_TYPES = {1: np.dtype("<i8"), 2: np.dtype("<f8")}
+
+    @staticmethod
+    def bitmap_file(col_name: str) -> str:
+        return f"{col_name}.bitmap"
+
+    @staticmethod
+    def zonemap_file(col_name: str) -> str:
+        return f"{col_name}.zonemap"
+
+    @staticmethod
+    def range_index_file(col_name: str) -> str:
+        return f"{col_name}.bsi"
+
+    @staticmethod
+    def sorted_index_file(col_name: str) -> str:
+        return f"{col_name}.sidx"
+
+    @staticmethod
+    def write_bitmaps(path: str, bitmaps: Dict[object, BitmapIndex], rows: int) -> None:
+        """Write one column's bitmaps (value -> BitmapIndex of rows bits) atomically."""
+        keys = [str(value).encode("utf-8") for value in bitmaps]
+        payloads = [bitmap.to_bytes() for bitmap in bitmaps.values()]
+        directory_size = sum(IndexStore.BITMAP_ENTRY.size + len(key) for key in keys)
+        offset = IndexStore.BITMAP_HEADER.size + directory_size
+
+        directory = []
+        for key, payload in zip(keys, payloads):
+            directory.append(IndexStore.BITMAP_ENTRY.pack(offset, len(payload), len(key)) + key)
+            offset += len(payload)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(IndexStore.BITMAP_HEADER.pack(IndexStore.BITMAP_MAGIC, IndexStore.BITMAP_VERSION, len(keys), rows))
+            f.write(b"".join(directory))
+            f.write(b"".join(payloads))
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def write_zonemap(path: str, zonemap: ZoneMap) -> bool:
+        """Write a numeric zone map; False (nothing written) when min/max are not all numbers."""
+        blocks = zonemap.blocks
+        bounds = [blk[key] for blk in blocks for key in ("min", "max")]
+        if any(isinstance(v, bool) or not isinstance(v, (int, float)) for v in bounds):
+            return False
+        code = 1 if all(isinstance(v, int) for v in bounds) else 2
+        dtype = IndexStore.ZONEMAP_TYPES[code]
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(IndexStore.ZONEMAP_HEADER.pack(
+                IndexStore.ZONEMAP_MAGIC, IndexStore.VERSION, code, zonemap.block_size, len(blocks)
+            ))
+            for key, key_dtype in (("start", np.dtype("<i8")), ("end", np.dtype("<i8")), ("min", dtype), ("max", dtype)):
+                f.write(np.array([blk[key] for blk in blocks], dtype=key_dtype).tobytes())
+        os.replace(tmp_path, path)
+        return True
+
+    @staticmethod
+    def read_zonemap(path: str) -> ZoneMap:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, code, block_size, count = IndexStore.ZONEMAP_HEADER.unpack_from(data, 0)
+        if magic != IndexStore.ZONEMAP_MAGIC or version != IndexStore.VERSION:
+            raise ValueError(f"'{path}' is not a zone map file")
+        offset = IndexStore.ZONEMAP_HEADER.size
+        arrays = {}
+        for key, dtype in (("start", np.dtype("<i8")), ("end", np.dtype("<i8")),
+                           ("min", IndexStore.ZONEMAP_TYPES[code]), ("max", IndexStore.ZONEMAP_TYPES[code])):
+            arrays[key] = np.frombuffer(data, dtype=dtype, count=count, offset=offset).tolist()
+            offset += count * dtype.itemsize
+        blocks = [
+            {"min": lo, "max": hi, "start": start, "end": end}
+            for start, end, lo, hi in zip(arrays["start"], arrays["end"], arrays["min"], arrays["max"])
+        ]
+        return ZoneMap(blocks, block_size)
+
+    @staticmethod
+    def write_range_index(path: str, index: BitSlicedIndex) -> None:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(IndexStore.RANGE_HEADER.pack(
+                IndexStore.RANGE_MAGIC, IndexStore.RANGE_VERSION, index.decimals, len(index.slices), index.base, index.rows
+            ))
+            for bitmap in [index.exists] + index.slices:
+                payload = bitmap.to_bytes()
+                f.write(IndexStore.LENGTH.pack(len(payload)) + payload)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_range_index(path: str) -> BitSlicedIndex:
+        with open(path, "rb") as f:
+            data = f.read()
+        magic, version, decimals, count, base, rows = IndexStore.RANGE_HEADER.unpack_from(data, 0)
+        if magic != IndexStore.RANGE_MAGIC or version not in (1, IndexStore.RANGE_VERSION):
+            raise ValueError(f"'{path}' is not a range index file")
+        offset = IndexStore.RANGE_HEADER.size
+        if version == 1:
+            # decimals and base hold the value type code and the distinct count
+            dtype = IndexStore.ZONEMAP_TYPES[decimals]
+            values = np.frombuffer(data, dtype=dtype, count=base, offset=offset)
+            offset += base * dtype.itemsize
+        bitmaps = []
+        for _ in range(count + 1):
+            (length,) = IndexStore.LENGTH.unpack_from(data, offset)
+            offset += IndexStore.LENGTH.size
+            bitmaps.append(BitmapIndex.from_bytes(memoryview(data)[offset:offset + length]))
+            offset += length
+        if version == 1:
+            return IndexStore._from_ranks(values, bitmaps[1:], bitmaps[0])
+        return BitSlicedIndex(bitmaps[1:], bitmaps[0], base, decimals)
+
+    @staticmethod
+    def _from_ranks(values: np.ndarray, slices: List[BitmapIndex], exists: BitmapIndex) -> BitSlicedIndex:
+        """A rank-encoded (version 1) index re-encoded by value: the rows' values are recovered first."""
+        ranks = np.zeros(exists.length, dtype=np.int64)
+        for bit, bitmap in enumerate(slices):
+            ranks[bitmap.positions()] |= 1 << bit
+        column = np.full(exists.length, np.nan)
+        present = exists.positions()
+        column[present] = values[ranks[present]]
+        return BitSlicedIndex.build(column)
+
+    @staticmethod
+    def write_sorted_index(path: str, index: SortedIndex) -> None:
+        code = 2 if index.values.dtype.kind == "f" else 1
+        width = index.permutation.dtype.itemsize
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(IndexStore.SORTED_HEADER.pack(
+                IndexStore.SORTED_MAGIC, IndexStore.VERSION, code, width, index.rows, len(index.values)
+            ))
+            f.write(index.values.astype(IndexStore.ZONEMAP_TYPES[code]).tobytes())
+            f.write(index.permutation.astype("<u4" if width == 4 else "<i8").tobytes())
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_sorted_index(path: str) -> SortedIndex:
+        """Index whose arrays are views over the mapped file; a lookup reads only the pages it touches."""
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, code, width, rows, count = IndexStore.SORTED_HEADER.unpack_from(mm, 0)
+        if magic != IndexStore.SORTED_MAGIC or version != IndexStore.VERSION:
+            raise ValueError(f"'{path}' is not a sorted index file")
+        dtype = IndexStore.ZONEMAP_TYPES[code]
+        offset = IndexStore.SORTED_HEADER.size
+        values = np.frombuffer(mm, dtype=dtype, count=count, offset=offset)
+        offset += count * dtype.itemsize
+        permutation = np.frombuffer(mm, dtype="<u4" if width == 4 else "<i8", count=count, offset=offset)
+        return SortedIndex(values, permutation, rows)
+
+    @staticmethod
+    def read_bitmaps(path: str) -> Dict[str, BitmapIndex]:
+        """Every bitmap of a column file, decoded."""
+        bitmaps = BitmapFile(path)
+        return {key: bitmaps[key] for key in bitmaps}
+
+    @staticmethod
+    def bitmap_version(path: str) -> int:
+        with open(path, "rb") as f:
+            magic, version, _, _ = IndexStore.BITMAP_HEADER.unpack(f.read(IndexStore.BITMAP_HEADER.size))
+        return version if magic == IndexStore.BITMAP_MAGIC else 0
+
+    @staticmethod
+    def outdated_bitmaps(db_path: str, meta: dict) -> List[str]:
+        """Columns whose bitmap sidecar is in an older layout."""
+        return [
+            col for col, files in meta.get("indexes", {}).items()
+            if "bitmap" in files
+            and IndexStore.bitmap_version(os.path.join(db_path, files["bitmap"])) < IndexStore.BITMAP_VERSION
+        ]
+
+    @staticmethod
+    def migrate(db_path: str) -> dict:
+        """Move legacy JSON indexes ("bitmap_indexes", "zonemaps") of a database into sidecars.
+
+        Bitmap sidecars in an older layout are rewritten in the current one.
+        Zone maps whose min/max are not numbers stay in db.meta.json.
+        Returns the updated metadata (already saved).
+        """
+        meta = MetaLoader.load(db_path)
+        for col in IndexStore.outdated_bitmaps(db_path, meta):
+            path = os.path.join(db_path, meta["indexes"][col]["bitmap"])
+            bitmaps = IndexStore.read_bitmaps(path)
+            IndexStore.write_bitmaps(path, bitmaps, max((b.length for b in bitmaps.values()), default=0))
+        manifest = meta.setdefault("indexes", {})
+
+        for col, encoded in meta.pop("bitmap_indexes", {}).items():
+            bitmaps = {value: BitmapIndex.from_base64(b64) for value, b64 in encoded.items()}
+            rows = max((bitmap.length for bitmap in bitmaps.values()), default=0)
+            IndexStore.write_bitmaps(os.path.join(db_path, IndexStore.bitmap_file(col)), bitmaps, rows)
+            manifest.setdefault(col, {})["bitmap"] = IndexStore.bitmap_file(col)
+
+        remaining = {}
+        for col, zm_d in meta.pop("zonemaps", {}).items():
+            path = os.path.join(db_path, IndexStore.zonemap_file(col))
+            if IndexStore.write_zonemap(path, ZoneMap.from_dict(zm_d)):
+                manifest.setdefault(col, {})["zonemap"] = IndexStore.zonemap_file(col)
+            else:
+                remaining[col] = zm_d
+        if remaining:
+            meta["zonemaps"] = remaining
+        if not manifest:
+            meta.pop("indexes")
+
+        MetaLoader.save(db_path, meta)
+        return meta
+
+
+class BitmapFile:
+    """Read-only mapping value key -> BitmapIndex over a mapped <col>.bitmap file.
+
+    Nothing is read until a key is looked up; the directory is parsed then,
+    and each bitmap is built from its bytes on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._mm = None
+        self._directory: Dict[str, tuple] | None = None
+        self.rows = 0
+        self.version = 0
+
+    def _open(self) -> Dict[str, tuple]:
+        if self._directory is None:
+            with open(self.path, "rb") as f:
+                self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, self.version, count, self.rows = IndexStore.BITMAP_HEADER.unpack_from(self._mm, 0)
+            if magic != IndexStore.BITMAP_MAGIC or self.version not in (1, IndexStore.BITMAP_VERSION):
+                raise ValueError(f"'{self.path}' is not a bitmap index file")
+            directory = {}
+            pos = IndexStore.BITMAP_HEADER.size
+            for _ in range(count):
+                offset, length, key_len = IndexStore.BITMAP_ENTRY.unpack_from(self._mm, pos)
+                pos += IndexStore.BITMAP_ENTRY.size
+                directory[self._mm[pos:pos + key_len].decode("utf-8")] = (offset, length)
+                pos += key_len
+            self._directory = directory
+        return self._directory
+
+    def __contains__(self, key) -> bool:
+        return key in self._open()
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._open())
+
+    def __len__(self) -> int:
+        return len(self._open())
+
+    def __getitem__(self, key) -> BitmapIndex:
+        offset, length = self._open()[key]
+        if self.version == 1:
+            return BitmapIndex.from_bits(int.from_bytes(self._mm[offset:offset + length], "little"), self.rows)
+        # Containers are views over the mapped file
+        return BitmapIndex.from_bytes(memoryview(self._mm)[offset:offset + length])
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+
+class LazyIndexes:
+    """Per-column indexes built on first access.
+
+    Each column has loaders tried in registration order; the first that
+    returns an index wins and is cached. Columns with no index behave as
+    absent, so callers use it like a dict.
+    """
+
+    def __init__(self):
+        self._loaders: Dict[str, List[Callable]] = {}
+        self._loaded: Dict[str, object] = {}
+
+    def register(self, col_name: str, loader: Callable) -> None:
+        self._loaders.setdefault(col_name, []).append(loader)
+        self._loaded.pop(col_name, None)
+
+    def __setitem__(self, col_name: str, index) -> None:
+        self._loaders.pop(col_name, None)
+        self._loaded[col_name] = index
+
+    def get(self, col_name: str, default=None):
+        if col_name not in self._loaded:
+            if col_name not in self._loaders:
+                return default
+            index = None
+            for loader in self._loaders.pop(col_name):
+                try:
+                    index = loader()
+                except Exception as e:
+                    print(f"Warning: Could not load index for '{col_name}': {e}")
+                if index is not None:
+                    break
+            self._loaded[col_name] = index
+        index = self._loaded[col_name]
+        return default if index is None else index
+
+    def __getitem__(self, col_name: str):
+        index = self.get(col_name)
+        if index is None:
+            raise KeyError(col_name)
+        return index
+
+    def __contains__(self, col_name: str) -> bool:
+        return self.get(col_name) is not None
+
+    def loaded(self) -> List[str]:
+        """Columns whose index has been built so far."""
+        return [col for col, index in self._loaded.items() if index is not None]
+
+    def clear(self) -> None:
+        self._loaders.clear()
+        self._loaded.clear()
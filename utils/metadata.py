@@ -3,6 +3,8 @@ import os
 
 class MetaLoader:
     META_FILE = "db.meta.json"
+    # Column statistics (see DatabaseModel.analyze), listed as "stats" in the metadata
+    STATS_FILE = "db.stats.json"
 
     def __init__(self):
         pass
@@ -27,4 +29,16 @@ class MetaLoader:
     def save(db_path: str, meta: dict):
         meta_path = os.path.join(db_path, MetaLoader.META_FILE)
         with open(meta_path, "w") as f:
-            json.dump(meta, f, indent=4)
\ No newline at end of file
+            json.dump(meta, f, indent=4)
+
+    @staticmethod
+    def load_stats(db_path: str, file_name: str = STATS_FILE) -> dict:
+        with open(os.path.join(db_path, file_name), "r") as f:
+            return json.load(f)
+
+    @staticmethod
+    def save_stats(db_path: str, stats: dict) -> str:
+        """Write {column: stats dict} compactly; returns the file name."""
+        with open(os.path.join(db_path, MetaLoader.STATS_FILE), "w") as f:
+            json.dump(stats, f, separators=(",", ":"))
+        return MetaLoader.STATS_FILE
@@ -17,6 +17,8 @@ class OutputWriter:
         "Lease_Commence_Date",
         "Price_Per_Square_Meter",
     ]
+    # Table columns a result row needs
+    COLUMNS = ["month_num", "town", "block", "floor_area_sqm", "flat_model", "lease_commence_date", "psm_price"]
 
     def __init__(self, matric_num: str):
         self.output_file = f"result/ScanResult_{matric_num}.csv"
@@ -0,0 +1,187 @@
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from model.StorageModel import StorageModel
+from utils.column_format import ColumnFormat
+from utils.metadata import MetaLoader
+from utils.schema import Schema
+
+
+class ParquetFormat(ColumnFormat):
+    """Parquet file I/O engine. The whole table → one table.parquet file.
+
+    Strings are stored with Parquet dictionary pages rather than .dict.json
+    sidecars, and every row group carries min/max/null statistics in the file
+    footer, which back the table's zone maps for row-group pruning. Derived
+    columns (psm_price, month_num) and the month_num sort are shared with the
+    column engine.
+    """
+
+    FORMAT_NAME = "parquet"
+    FILE_NAME = "table.parquet"
+    COMPRESSION = "zstd"
+    # One Parquet file: no streaming ingest or in-place append
+    STREAMS = False
+    APPENDS = False
+
+    def __init__(self, db_path: str = None):
+        super().__init__(db_path)
+        self.file_path = os.path.join(db_path, self.FILE_NAME) if db_path else None
+
+    def write(self, df: pd.DataFrame, metadata: dict) -> None:
+        os.makedirs(self.column_path, exist_ok=True)
+
+        df = self.psm_price(df)
+        df = self.month_num(df)
+        df = self.sort_column("month_num", df)
+
+        columns = df.columns.tolist()
+        sorted_columns = [
+            col for col in columns
+            if pd.api.types.is_numeric_dtype(df[col]) and df[col].is_monotonic_increasing
+        ]
+
+        self._write_table(pa.Table.from_pandas(df, preserve_index=False))
+
+        metadata.update({
+            "columns": columns,
+            "sorted_columns": sorted_columns,
+            "rows": len(df),
+            "schema": Schema.from_frame(df, default_encoding=self.FORMAT_NAME),
+            "row_group_size": self.GROUP_ROWS,
+            "compression": self.COMPRESSION,
+        })
+        print(f"[ParquetFormat] Wrote {len(df)} rows × {len(columns)} columns → '{self.file_path}'")
+
+    def write_stream(self, csv_path: str, metadata: dict, memory_mb: float = None) -> None:
+        raise NotImplementedError(f"The {self.FORMAT_NAME} engine does not support streaming ingest")
+
+    def append_rows(self, df: pd.DataFrame, metadata: dict) -> None:
+        raise NotImplementedError(f"The {self.FORMAT_NAME} engine does not support appending rows")
+
+    def write_units(self, units: Dict[str, StorageModel]) -> None:
+        try:
+            os.makedirs(self.column_path, exist_ok=True)
+            table = pa.table({name: np.asarray(unit.scan()).tolist() for name, unit in units.items()})
+            self._write_table(table)
+
+            if os.path.exists(os.path.join(self.column_path, MetaLoader.META_FILE)):
+                meta = MetaLoader.load(self.column_path)
+                meta["rows"] = table.num_rows
+                MetaLoader.save(self.column_path, meta)
+
+            print(f"[ParquetFormat] Wrote {len(units)} columns → '{self.file_path}'")
+        except Exception as e:
+            print(f"Error in ParquetFormat.write_units: {e}")
+
+    def _write_table(self, table: pa.Table) -> None:
+        """Write table atomically with dictionary pages and row-group statistics."""
+        tmp_path = self.file_path + ".tmp"
+        pq.write_table(
+            table, tmp_path,
+            row_group_size=self.GROUP_ROWS,
+            compression=self.COMPRESSION,
+            use_dictionary=True,
+            write_statistics=True,
+        )
+        os.replace(tmp_path, self.file_path)
+
+    def _to_values(self, col_name: str, array: pa.ChunkedArray):
+        """Convert an Arrow column to an indexable sequence of Python values.
+
+        Numeric columns without nulls become a memoryview over the Arrow
+        buffer (float nulls read as NaN, as in .col files); everything else
+        becomes a list.
+        """
+        if pa.types.is_floating(array.type):
+            values = memoryview(array.to_numpy().astype(np.float64, copy=False))
+            self.dtypes[col_name] = float
+        elif pa.types.is_integer(array.type) and array.null_count == 0:
+            values = memoryview(array.to_numpy().astype(np.int64, copy=False))
+            self.dtypes[col_name] = int
+        else:
+            values = array.to_pylist()
+            if pa.types.is_integer(array.type):
+                self.dtypes[col_name] = int
+            else:
+                self.dtypes[col_name] = str
+        return values
+
+    def list_columns(self) -> list[str]:
+        """Column names from the Parquet schema (footer only)."""
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"Parquet file not found: {self.file_path}")
+        return pq.read_schema(self.file_path).names
+
+    def read(self) -> Dict[str, list]:
+        try:
+            # One read decodes the column chunks on Arrow's own thread pool
+            table = pq.read_table(self.file_path, use_threads=True)
+            return {col: self._to_values(col, table.column(col)) for col in table.column_names}
+        except Exception as e:
+            print(f"Error in ParquetFormat.read: {e}")
+            return {}
+
+    def read_column(self, col_name: str) -> list:
+        """Read one column chunk set from the Parquet file."""
+        try:
+            array = pq.read_table(self.file_path, columns=[col_name]).column(0)
+            data = self._to_values(col_name, array)
+            print(f"[ParquetFormat] Read column '{col_name}' ({len(data)} rows)")
+            return data
+        except Exception as e:
+            print(f"Error in read_column: {e}")
+            return []
+
+    def read_row_groups(self, col_name: str) -> tuple[int, list] | None:
+        """Row group statistics of a column from the Parquet footer.
+
+        None when any row group lacks min/max statistics, since a block
+        without them could not be pruned safely.
+        """
+        meta = pq.ParquetFile(self.file_path).metadata
+        index = meta.schema.to_arrow_schema().get_field_index(col_name)
+        if index < 0 or meta.num_row_groups == 0:
+            return None
+
+        blocks = []
+        start = 0
+        for g in range(meta.num_row_groups):
+            row_group = meta.row_group(g)
+            stats = row_group.column(index).statistics
+            rows = row_group.num_rows
+            if stats is None:
+                return None
+            nulls = stats.null_count if stats.has_null_count else 0
+            if not stats.has_min_max and nulls != rows:
+                return None
+            blocks.append({
+                "min": stats.min if stats.has_min_max else None,
+                "max": stats.max if stats.has_min_max else None,
+                "start": start,
+                "end": start + rows,
+                "rows": rows,
+                "nulls": nulls,
+            })
+            start += rows
+        return meta.row_group(0).num_rows, blocks
+
+    def read_group(self, col_name: str, group: int):
+        """Decode one row group of a column."""
+        (data,) = self.read_groups(col_name, [group])
+        return data
+
+    def read_groups(self, col_name: str, groups):
+        """Decode row groups of a column in order, from one open of the file."""
+        parquet = pq.ParquetFile(self.file_path)
+        for group in groups:
+            yield self._to_values(col_name, parquet.read_row_group(group, columns=[col_name]).column(0))
+
+    def read_dictionary(self, col_name: str) -> list | None:
+        """Parquet keeps its dictionaries in-file; values are read decoded."""
+        return None
@@ -0,0 +1,62 @@
+import os
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+
+class Prefetcher:
+    """Run named load jobs on a thread pool, in the order they will be needed.
+
+    Jobs are submitted in plan order, so with fewer workers than jobs the
+    first columns a query filters on start first. wait(name) blocks only
+    until that one job is done; the caller can start working on it while
+    later jobs are still running. A job that fails is reported and left to
+    the caller to redo synchronously.
+    """
+
+    WORKERS = min(8, os.cpu_count() or 1)
+
+    def __init__(self, workers: int = None):
+        self.workers = workers or self.WORKERS
+        self._pool: ThreadPoolExecutor | None = None
+        self._pending: Dict[str, Future] = {}
+        self.timings: Dict[str, float] = {}
+
+    def start(self, jobs: Dict[str, Callable]) -> List[str]:
+        """Submit jobs {name: callable} not already pending; returns the names submitted."""
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="prefetch")
+        started = time.perf_counter()
+        submitted = []
+        for name, job in jobs.items():
+            if name in self._pending:
+                continue
+            self._pending[name] = self._pool.submit(self._run, name, job, started)
+            submitted.append(name)
+        return submitted
+
+    def _run(self, name: str, job: Callable, started: float):
+        result = job()
+        self.timings[name] = time.perf_counter() - started
+        return result
+
+    def wait(self, name: str) -> None:
+        """Block until the job for name (if any) has finished."""
+        future = self._pending.pop(name, None)
+        if future is None:
+            return
+        try:
+            future.result()
+        except Exception as e:
+            print(f"Warning: Prefetch of '{name}' failed: {e}")
+
+    def pending(self) -> List[str]:
+        return [name for name, future in self._pending.items() if not future.done()]
+
+    def shutdown(self) -> None:
+        """Wait for every job and release the worker threads."""
+        for name in list(self._pending):
+            self.wait(name)
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
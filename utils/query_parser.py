@@ -0,0 +1,271 @@
+import re
+from typing import List
+
+
+class QuerySyntaxError(ValueError):
+    """A statement that does not follow the query grammar."""
+
+
+class SelectItem:
+    """An output column: a table column, or an aggregate over one (column "*" for COUNT(*))."""
+
+    def __init__(self, column: str, func: str = None, alias: str = None):
+        self.column = column
+        self.func = func
+        self.alias = alias
+
+    @property
+    def name(self) -> str:
+        if self.alias:
+            return self.alias
+        return f"{self.func}({self.column})" if self.func else self.column
+
+
+class Comparison:
+    """column op operands, e.g. town IN ('BEDOK', 'YISHUN') or month_num BETWEEN 201901 AND 201912."""
+
+    def __init__(self, column: str, op: str, operands: list):
+        self.column = column
+        self.op = op
+        self.operands = operands
+
+
+class OrderItem:
+    def __init__(self, key: str, descending: bool = False):
+        self.key = key
+        self.descending = descending
+
+
+class Statement:
+    """Parsed SELECT: the logical plan Executor runs.
+
+    Comparisons in where are ANDed. table is None when FROM is omitted
+    (the statement runs on whichever table it is given).
+    """
+
+    def __init__(self, items: List[SelectItem], table: str = None, where: List[Comparison] = None,
+                 group_by: List[str] = None, order_by: List[OrderItem] = None, limit: int = None,
+                 explain: bool = False, analyze: bool = False):
+        self.items = items
+        self.table = table
+        self.where = where or []
+        self.group_by = group_by or []
+        self.order_by = order_by or []
+        self.limit = limit
+        self.explain = explain
+        self.analyze = analyze
+
+    def aggregates(self) -> List[SelectItem]:
+        return [item for item in self.items if item.func]
+
+    def star(self) -> bool:
+        return any(item.column == "*" and not item.func for item in self.items)
+
+
+class QueryParser:
+    """Parses the query language:
+
+        [EXPLAIN [ANALYZE]] SELECT * | item [, ...] [FROM table]
+            [WHERE comparison [AND ...]]
+            [GROUP BY column [, ...]]
+            [ORDER BY name [ASC | DESC] [, ...]]
+            [LIMIT n]
+
+    An item is column, COUNT(*) or MIN / MAX / SUM / AVG / COUNT(column),
+    with an optional AS alias. A comparison is column = != < <= > >= value,
+    column IN (value, ...) or column BETWEEN value AND value. Values are
+    numbers or 'quoted' strings; keywords are case-insensitive.
+    """
+
+    AGGREGATES = ("count", "min", "max", "sum", "avg")
+    COMPARISONS = ("=", "!=", "<>", "<", "<=", ">", ">=")
+
+    _TOKEN = re.compile(r"""\s*(?:
+        (?P<number>-?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?|-?\.\d+)
+      | (?P<string>'(?:[^']|'')*')
+      | (?P<name>[A-Za-z_][A-Za-z0-9_]*)
+      | (?P<symbol><=|>=|!=|<>|[=<>(),*;])
+    )""", re.VERBOSE)
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = self._tokenize(text)
+        self.pos = 0
+
+    @staticmethod
+    def parse(text: str) -> Statement:
+        return QueryParser(text)._statement()
+
+    # -- tokens --------------------------------------------------------------
+
+    @classmethod
+    def _tokenize(cls, text: str) -> List[tuple]:
+        """(kind, value) pairs; strings are unquoted and numbers converted."""
+        tokens, pos = [], 0
+        text = text.rstrip()
+        while pos < len(text):
+            match = cls._TOKEN.match(text, pos)
+            if match is None or match.end() == pos:
+                raise QuerySyntaxError(f"Unexpected character at position {pos}: {text[pos:pos + 10]!r}")
+            kind = match.lastgroup
+            value = match.group(kind)
+            if kind == "number":
+                value = float(value) if any(c in value for c in ".eE") else int(value)
+            elif kind == "string":
+                value = value[1:-1].replace("''", "'")
+            tokens.append((kind, value))
+            pos = match.end()
+        return tokens
+
+    def _peek(self, offset: int = 0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        if token[0] is None:
+            raise QuerySyntaxError("Unexpected end of query")
+        self.pos += 1
+        return token
+
+    def _at_keyword(self, *words: str) -> bool:
+        for offset, word in enumerate(words):
+            kind, value = self._peek(offset)
+            if kind != "name" or value.upper() != word:
+                return False
+        return True
+
+    def _accept(self, *words: str) -> bool:
+        if self._at_keyword(*words):
+            self.pos += len(words)
+            return True
+        return False
+
+    def _expect(self, *words: str) -> None:
+        if not self._accept(*words):
+            raise QuerySyntaxError(f"Expected {' '.join(words)} near {self._near()}")
+
+    def _symbol(self, symbol: str) -> bool:
+        if self._peek() == ("symbol", symbol):
+            self.pos += 1
+            return True
+        return False
+
+    def _expect_symbol(self, symbol: str) -> None:
+        if not self._symbol(symbol):
+            raise QuerySyntaxError(f"Expected '{symbol}' near {self._near()}")
+
+    def _identifier(self) -> str:
+        kind, value = self._next()
+        if kind != "name":
+            raise QuerySyntaxError(f"Expected a column name, got {value!r}")
+        return value
+
+    def _value(self):
+        kind, value = self._next()
+        if kind not in ("number", "string"):
+            raise QuerySyntaxError(f"Expected a number or 'string', got {value!r}")
+        return value
+
+    def _near(self) -> str:
+        kind, value = self._peek()
+        return "end of query" if kind is None else repr(value)
+
+    # -- grammar -------------------------------------------------------------
+
+    def _statement(self) -> Statement:
+        explain = self._accept("EXPLAIN")
+        analyze = explain and self._accept("ANALYZE")
+        self._expect("SELECT")
+        items = self._select_list()
+        table = self._identifier() if self._accept("FROM") else None
+        where = self._where() if self._accept("WHERE") else []
+        group_by = self._names() if self._accept("GROUP", "BY") else []
+        order_by = self._order_by() if self._accept("ORDER", "BY") else []
+        limit = None
+        if self._accept("LIMIT"):
+            limit = self._value()
+            if not isinstance(limit, int) or limit < 0:
+                raise QuerySyntaxError(f"LIMIT must be a non-negative integer, got {limit!r}")
+        self._symbol(";")
+        if self._peek()[0] is not None:
+            raise QuerySyntaxError(f"Unexpected {self._near()}")
+        return Statement(items, table, where, group_by, order_by, limit, explain, analyze)
+
+    def _select_list(self) -> List[SelectItem]:
+        if self._symbol("*"):
+            return [SelectItem("*")]
+        items = [self._select_item()]
+        while self._symbol(","):
+            items.append(self._select_item())
+        return items
+
+    def _select_item(self) -> SelectItem:
+        name = self._identifier()
+        if self._symbol("("):
+            func = name.lower()
+            if func not in self.AGGREGATES:
+                raise QuerySyntaxError(f"Unknown aggregate '{name}'; expected one of {', '.join(self.AGGREGATES)}")
+            if self._symbol("*"):
+                if func != "count":
+                    raise QuerySyntaxError(f"{name}(*) is not supported; only COUNT(*)")
+                column = "*"
+            else:
+                column = self._identifier()
+            self._expect_symbol(")")
+            item = SelectItem(column, func)
+        else:
+            item = SelectItem(name)
+        if self._accept("AS"):
+            item.alias = self._identifier()
+        return item
+
+    def _where(self) -> List[Comparison]:
+        comparisons = [self._comparison()]
+        while self._accept("AND"):
+            comparisons.append(self._comparison())
+        return comparisons
+
+    def _comparison(self) -> Comparison:
+        column = self._identifier()
+        if self._accept("BETWEEN"):
+            low = self._value()
+            self._expect("AND")
+            return Comparison(column, "BETWEEN", [low, self._value()])
+        if self._accept("IN"):
+            self._expect_symbol("(")
+            values = [self._value()]
+            while self._symbol(","):
+                values.append(self._value())
+            self._expect_symbol(")")
+            return Comparison(column, "IN", values)
+        kind, op = self._next()
+        if kind != "symbol" or op not in self.COMPARISONS:
+            raise QuerySyntaxError(f"Expected a comparison after '{column}', got {op!r}")
+        return Comparison(column, "!=" if op == "<>" else op, [self._value()])
+
+    def _names(self) -> List[str]:
+        names = [self._identifier()]
+        while self._symbol(","):
+            names.append(self._identifier())
+        return names
+
+    def _order_by(self) -> List[OrderItem]:
+        items = []
+        while True:
+            key = self._order_key()
+            descending = self._accept("DESC")
+            if not descending:
+                self._accept("ASC")
+            items.append(OrderItem(key, descending))
+            if not self._symbol(","):
+                return items
+
+    def _order_key(self) -> str:
+        """A column or alias, or an aggregate written as in the select list."""
+        name = self._identifier()
+        if not self._symbol("("):
+            return name
+        column = "*" if self._symbol("*") else self._identifier()
+        self._expect_symbol(")")
+        return f"{name.lower()}({column})"
@@ -0,0 +1,238 @@
+import json
+import mmap
+import os
+import struct
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from model.StorageModel import StorageModel
+from utils.column_format import ColumnFormat
+from utils.metadata import MetaLoader
+from utils.schema import Schema
+
+
+class RowFormat(ColumnFormat):
+    """Row-oriented file I/O engine. The whole table → one file of fixed-width records.
+
+    Layout (little-endian):
+        header   magic(8) version(u16) pad(2) layout_len(u32) rows(u64) page_rows(u32) pad(4)
+        layout   JSON list of [column, numpy dtype] pairs, padded to 8 bytes
+        records  rows × record_size bytes, one packed record per row
+
+    Strings go through the same dictionary encoding as the column engine
+    (int32 codes + .dict.json sidecars), so every field is fixed width;
+    high-cardinality strings fall back to a fixed-size UTF-8 byte field.
+    The file is read through mmap; extracting a column gathers one field from
+    every record, so scanning one column touches the whole file.
+    """
+
+    FORMAT_NAME = "row"
+    FILE_NAME = "table.rows"
+    MAGIC = b"\x89SCROW\r\n"
+    VERSION = 1
+    HEADER = struct.Struct("<8sH2xIQI4x")
+    # One file of packed records: no streaming ingest or in-place append
+    STREAMS = False
+    APPENDS = False
+    # Rows per page for PAX files; 0 means plain row-major records
+    PAGE_ROWS = 0
+
+    INT32_MIN = -(2 ** 31)
+    INT32_MAX = 2 ** 31 - 1
+
+    def __init__(self, db_path: str = None):
+        super().__init__(db_path)
+        self.file_path = os.path.join(db_path, self.FILE_NAME) if db_path else None
+
+    def write(self, df: pd.DataFrame, metadata: dict) -> None:
+        os.makedirs(self.column_path, exist_ok=True)
+
+        df = self.psm_price(df)
+        df = self.month_num(df)
+        df, dictionaries = self.dictionary_encode(df)
+        df = self.sort_column("month_num", df)
+
+        columns = df.columns.tolist()
+        sorted_columns = [
+            col for col in columns
+            if col not in dictionaries and df[col].is_monotonic_increasing
+        ]
+
+        records = self.to_records(df)
+        self._write_records(records)
+        for col, dictionary in dictionaries.items():
+            self.write_dictionary(col, dictionary)
+
+        metadata.update({
+            "columns": columns,
+            "sorted_columns": sorted_columns,
+            "dictionaries": {col: self.dictionary_file(col) for col in dictionaries},
+            "rows": len(df),
+            "schema": Schema.from_frame(df, dictionaries, default_encoding=self.FORMAT_NAME),
+            "record_size": records.dtype.itemsize,
+        })
+        print(f"[{type(self).__name__}] Wrote {len(df)} rows × {len(columns)} columns "
+              f"({records.dtype.itemsize}-byte records) → '{self.file_path}'")
+
+    def write_stream(self, csv_path: str, metadata: dict, memory_mb: float = None) -> None:
+        raise NotImplementedError(f"The {self.FORMAT_NAME} engine does not support streaming ingest")
+
+    def append_rows(self, df: pd.DataFrame, metadata: dict) -> None:
+        raise NotImplementedError(f"The {self.FORMAT_NAME} engine does not support appending rows")
+
+    def write_units(self, units: Dict[str, StorageModel]) -> None:
+        try:
+            os.makedirs(self.column_path, exist_ok=True)
+            df = pd.DataFrame({name: np.asarray(unit.scan()).tolist() for name, unit in units.items()})
+            self._write_records(self.to_records(df))
+            for name, unit in units.items():
+                dictionary = getattr(unit, "dictionary", None)
+                if dictionary is not None:
+                    self.write_dictionary(name, dictionary)
+
+            if os.path.exists(os.path.join(self.column_path, MetaLoader.META_FILE)):
+                meta = MetaLoader.load(self.column_path)
+                meta["rows"] = len(df)
+                MetaLoader.save(self.column_path, meta)
+
+            print(f"[{type(self).__name__}] Wrote {len(units)} columns → '{self.file_path}'")
+        except Exception as e:
+            print(f"Error in {type(self).__name__}.write_units: {e}")
+
+    def record_dtype(self, df: pd.DataFrame) -> np.dtype:
+        """Packed record dtype: int32/int64/float64 fields, or fixed-size bytes for text."""
+        fields = []
+        for col in df.columns:
+            series = df[col]
+            if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+                fits = series.empty or (self.INT32_MIN <= series.min() and series.max() <= self.INT32_MAX)
+                fields.append((col, "<i4" if fits else "<i8"))
+            elif pd.api.types.is_float_dtype(series):
+                fields.append((col, "<f8"))
+            else:
+                width = int(series.fillna("").astype(str).str.encode("utf-8").str.len().max() or 1)
+                fields.append((col, f"S{width}"))
+        return np.dtype(fields)
+
+    def to_records(self, df: pd.DataFrame) -> np.ndarray:
+        """Pack a DataFrame into an array of fixed-width records."""
+        dtype = self.record_dtype(df)
+        records = np.empty(len(df), dtype=dtype)
+        for col in df.columns:
+            field = dtype.fields[col][0]
+            if field.kind == "S":
+                records[col] = df[col].fillna("").astype(str).str.encode("utf-8").to_numpy(dtype=field)
+            else:
+                records[col] = df[col].to_numpy(dtype=field)
+        return records
+
+    def _layout_bytes(self, records: np.ndarray) -> bytes:
+        """Record payload; plain rows are the packed records back to back."""
+        return records.tobytes()
+
+    def _write_records(self, records: np.ndarray) -> None:
+        """Write header, layout and records atomically."""
+        layout = json.dumps([[name, records.dtype.fields[name][0].str] for name in records.dtype.names])
+        layout = layout.encode("utf-8")
+        layout += b" " * (-len(layout) % 8)
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, len(layout), len(records), self.PAGE_ROWS)
+
+        tmp_path = self.file_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(header)
+            f.write(layout)
+            f.write(self._layout_bytes(records))
+        os.replace(tmp_path, self.file_path)
+
+    def _open(self) -> Tuple[mmap.mmap, np.dtype, int, int, int]:
+        """Map the record file; returns (mmap, record dtype, rows, page_rows, data offset)."""
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(f"Record file not found: {self.file_path}")
+        with open(self.file_path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, layout_len, rows, page_rows = self.HEADER.unpack_from(mm, 0)
+        if magic != self.MAGIC:
+            raise ValueError(f"'{self.file_path}' is not a record file")
+        if version != self.VERSION:
+            raise ValueError(f"'{self.file_path}' has unsupported record file version {version}")
+        if page_rows != self.PAGE_ROWS:
+            raise ValueError(f"'{self.file_path}' has page size {page_rows}, expected {self.PAGE_ROWS}")
+
+        start = self.HEADER.size
+        layout = json.loads(mm[start:start + layout_len].decode("utf-8"))
+        dtype = np.dtype([(name, fmt) for name, fmt in layout])
+        return mm, dtype, rows, page_rows, start + layout_len
+
+    def _field(self, mm, dtype: np.dtype, rows: int, offset: int, col_name: str) -> np.ndarray:
+        """All values of one field: a strided view across the mapped records."""
+        return np.frombuffer(mm, dtype=dtype, count=rows, offset=offset)[col_name]
+
+    def list_columns(self) -> list[str]:
+        """Column names from the record layout in the file header."""
+        mm, dtype, _, _, _ = self._open()
+        mm.close()
+        return list(dtype.names)
+
+    def read(self) -> Dict[str, list]:
+        try:
+            return {col: self.read_column(col) for col in self.list_columns()}
+        except Exception as e:
+            print(f"Error in {type(self).__name__}.read: {e}")
+            return {}
+
+    def read_column(self, col_name: str) -> list:
+        """Extract one field from every record."""
+        try:
+            mm, dtype, rows, _, offset = self._open()
+            with mm:
+                values = self._field(mm, dtype, rows, offset, col_name)
+                if values.dtype.kind == "S":
+                    data = [v.decode("utf-8") for v in values.tolist()]
+                    self.dtypes[col_name] = str
+                else:
+                    # Gather the strided field into a contiguous native-typed copy
+                    # (packed records leave most fields unaligned), so the mapping can close.
+                    data = memoryview(values.astype(values.dtype.newbyteorder("="), order="C", copy=True))
+                    self.dtypes[col_name] = float if values.dtype.kind == "f" else int
+                del values
+            print(f"[{type(self).__name__}] Read column '{col_name}' ({len(data)} rows)")
+            return data
+        except Exception as e:
+            print(f"Error in read_column: {e}")
+            return []
+
+    def read_row_groups(self, col_name: str) -> tuple[int, list] | None:
+        """Record files keep no per-group statistics."""
+        return None
+
+
+class PaxFormat(RowFormat):
+    """PAX variant of the row engine: records grouped into pages of PAGE_ROWS rows.
+
+    Inside a page each column's values are stored together (a minipage), so a
+    page still holds whole records but a column scan reads contiguous runs.
+    """
+
+    FORMAT_NAME = "pax"
+    FILE_NAME = "table.pax"
+    PAGE_ROWS = 4096
+
+    def _layout_bytes(self, records: np.ndarray) -> bytes:
+        pages: List[bytes] = []
+        for start in range(0, len(records), self.PAGE_ROWS):
+            page = records[start:start + self.PAGE_ROWS]
+            pages.extend(np.ascontiguousarray(page[name]).tobytes() for name in records.dtype.names)
+        return b"".join(pages)
+
+    def _field(self, mm, dtype: np.dtype, rows: int, offset: int, col_name: str) -> np.ndarray:
+        """Stitch one column's minipages together."""
+        field, field_offset = dtype.fields[col_name][:2]
+        chunks = []
+        for start in range(0, rows, self.PAGE_ROWS):
+            count = min(self.PAGE_ROWS, rows - start)
+            page_offset = offset + start * dtype.itemsize
+            chunks.append(np.frombuffer(mm, dtype=field, count=count, offset=page_offset + count * field_offset))
+        return np.concatenate(chunks) if chunks else np.zeros(0, dtype=field)
@@ -0,0 +1,145 @@
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+class SchemaError(ValueError):
+    """Stored column data does not match the schema recorded at ingest."""
+
+
+class Schema:
+    """Authoritative per-column schema recorded in db.meta.json at ingest.
+
+    Each column maps to {"dtype", "nullable", "encoding", "dictionary"}:
+        dtype       logical type: int32, int64, float64 or string
+        nullable    whether the column held missing values at ingest
+        encoding    on-disk encoding (plain / rle / delta / for, text, or the
+                    engine's own layout)
+        dictionary  values are stored as codes into a .dict.json sidecar
+
+    Readers decode columns in bulk from this schema instead of sampling and
+    casting value by value.
+    """
+
+    DTYPES = {
+        "int32": (int, np.int32),
+        "int64": (int, np.int64),
+        "float64": (float, np.float64),
+        "string": (str, None),
+    }
+
+    INT32_MIN = -(2 ** 31)
+    INT32_MAX = 2 ** 31 - 1
+
+    @staticmethod
+    def dtype_of(series: pd.Series) -> str:
+        """Logical dtype of a DataFrame column."""
+        if pd.api.types.is_bool_dtype(series):
+            return "string"
+        if pd.api.types.is_integer_dtype(series):
+            if series.empty or (Schema.INT32_MIN <= series.min() and series.max() <= Schema.INT32_MAX):
+                return "int32"
+            return "int64"
+        if pd.api.types.is_float_dtype(series):
+            return "float64"
+        return "string"
+
+    @staticmethod
+    def from_frame(df: pd.DataFrame, dictionaries: Dict[str, list] = None,
+                   encodings: Dict[str, str] = None, default_encoding: str = "text") -> Dict[str, dict]:
+        """Schema of a DataFrame as it is about to be written.
+
+        Dictionary-encoded columns (already replaced by codes in df) keep
+        their logical string type.
+        """
+        dictionaries = dictionaries or {}
+        encodings = encodings or {}
+        schema = {}
+        for col in df.columns:
+            series = df[col]
+            if col in dictionaries:
+                schema[col] = {
+                    "dtype": "string",
+                    "nullable": None in dictionaries[col],
+                    "encoding": encodings.get(col, default_encoding),
+                    "dictionary": True,
+                }
+                continue
+            schema[col] = {
+                "dtype": Schema.dtype_of(series),
+                "nullable": bool(series.isna().any()),
+                "encoding": encodings.get(col, default_encoding),
+                "dictionary": False,
+            }
+        return schema
+
+    @staticmethod
+    def py_type(spec: dict) -> type:
+        """Python type of the values a column holds in memory (codes are int)."""
+        if spec.get("dictionary"):
+            return int
+        if spec["dtype"] not in Schema.DTYPES:
+            raise SchemaError(f"Unknown schema dtype '{spec['dtype']}'")
+        return Schema.DTYPES[spec["dtype"]][0]
+
+    @staticmethod
+    def check_typed(col_name: str, spec: dict, py_type: type) -> None:
+        """Validate a column decoded from a typed file against its schema."""
+        expected = Schema.py_type(spec)
+        if py_type is not expected:
+            raise SchemaError(
+                f"Column '{col_name}' is stored as {py_type.__name__} "
+                f"but the schema declares {spec['dtype']}"
+                + (" (dictionary codes)" if spec.get("dictionary") else "")
+            )
+
+    @staticmethod
+    def decode_text(col_name: str, values: list, spec: dict) -> list:
+        """Bulk-convert text values to the schema's type.
+
+        Empty strings are nulls: None for int columns, NaN for float columns.
+        Raises SchemaError naming the first offending row when a value does
+        not parse or a non-nullable column holds a null.
+        """
+        py_type, np_dtype = Schema.DTYPES.get(spec["dtype"], (None, None))
+        if py_type is None:
+            raise SchemaError(f"Unknown schema dtype '{spec['dtype']}' for column '{col_name}'")
+        if py_type is str:
+            return list(values)
+
+        # Fast path: every value parses (no nulls, no junk) in one vectorized call
+        text = np.asarray(values, dtype=str)
+        try:
+            if py_type is int:
+                return text.astype(np_dtype).tolist()
+            return text.astype(np.float64).tolist()
+        except ValueError:
+            pass
+
+        text = pd.Series(values, dtype=object)
+        missing = text.isna() | (text.astype(str).str.strip() == "")
+        if missing.any() and not spec.get("nullable"):
+            row = int(np.flatnonzero(missing.to_numpy())[0])
+            raise SchemaError(f"Column '{col_name}' is not nullable but row {row} is empty")
+
+        numbers = pd.to_numeric(text.where(~missing), errors="coerce")
+        invalid = numbers.isna() & ~missing
+        if invalid.any():
+            row = int(np.flatnonzero(invalid.to_numpy())[0])
+            raise SchemaError(
+                f"Column '{col_name}' declares {spec['dtype']} but row {row} holds {values[row]!r}"
+            )
+
+        if py_type is float:
+            return numbers.to_numpy(dtype=np.float64).tolist()
+
+        present = numbers[~missing]
+        if not (present == present.round()).all():
+            row = int(np.flatnonzero((numbers != numbers.round()).to_numpy() & ~missing.to_numpy())[0])
+            raise SchemaError(
+                f"Column '{col_name}' declares {spec['dtype']} but row {row} holds {values[row]!r}"
+            )
+        if not missing.any():
+            return numbers.to_numpy(dtype=np_dtype).tolist()
+        return [None if m else int(v) for v, m in zip(numbers.tolist(), missing.tolist())]
@@ -24,7 +24,33 @@ class DatabaseView:
     def display_error(self, message):
         print(f"\n[ERROR] {message}")
 
+    def display_stats(self, stats: dict, top: int = 3):
+        """Per-column statistics, with the most common values and their share of the rows."""
+        print(f"\n{'Column':<22}{'Rows':>10}{'Nulls':>8}{'Distinct':>10}  {'Min':<16}{'Max':<16}Most common")
+        for name, s in stats.items():
+            common = sorted(s.mcv, key=lambda entry: -entry[1])[:top]
+            shares = ", ".join(f"{value} ({count / max(1, s.rows):.1%})" for value, count in common)
+            print(f"{name:<22}{s.rows:>10}{s.nulls:>8}{s.distinct:>10}  {str(s.min)[:15]:<16}{str(s.max)[:15]:<16}{shares}")
+
+    def display_result(self, columns: list, rows: list, limit: int = 50):
+        """Query rows as an aligned table, showing at most limit of them."""
+        shown = [["" if v is None else (f"{v:.2f}" if isinstance(v, float) else str(v)) for v in row] for row in rows[:limit]]
+        widths = [max([len(c)] + [len(row[i]) for row in shown]) for i, c in enumerate(columns)]
+        print("\n" + "  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+        print("  ".join("-" * w for w in widths))
+        for row in shown:
+            print("  ".join(v.ljust(w) for v, w in zip(row, widths)))
+        more = f", {limit} shown" if len(rows) > limit else ""
+        print(f"({len(rows)} row{'s' if len(rows) != 1 else ''}{more})")
+
+    def display_plan(self, lines: list):
+        print()
+        for line in lines:
+            print(line)
+
     def select_orientation(self):
         print("\nSelect orientation:")
         print("1. Row-oriented")
-        print("2. Column-oriented")
\ No newline at end of file
+        print("2. Column-oriented")
+        print("3. Parquet (columnar, Arrow)")
+        print("4. Row-oriented, PAX pages")
\ No newline at end of file
@@ -6,7 +6,10 @@ class MainView:
         print("\n=== Big Data Management System ===")
         print("1. Load existing database")
         print("2. Create new database")
-        print("3. Exit")
+        print("3. Append CSV to existing database")
+        print("4. Analyze database statistics")
+        print("5. Run queries (SELECT / EXPLAIN)")
+        print("6. Exit")
 
     def get_input(self, prompt="\nEnter your choice: "):
         return input(prompt).strip()